@@ -1,11 +1,21 @@
 import numpy as np
+import os
 import sys
 import time
+import atexit
+import struct
+import hashlib
+import mmap
+import pickle
+import zlib
+import threading
+import weakref
 import colorsys
 import pygame
 import pygame.freetype
 import unicodedata
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 
 # region version and compatibility
 GUI_ENGINE_NAME = "krpc-gui"
@@ -135,6 +145,38 @@ PIXEL_SCALE = 1
 window_noframe = True
 window_always_on_top = True
 window_bg_color_rgb = (10, 10, 10)
+# Text-layer rasterizer: "blit" (glyph sprite batches), "numpy" (full-frame array compositor) or
+# "bands" (numpy compositor split into row bands across worker processes, see core/GUIBands.py).
+rasterizer = "blit"
+RASTERIZERS = ("blit", "numpy", "bands")
+# Worker processes for rasterizer="bands" (0 = os.cpu_count()).
+raster_workers = 0
+# Framebuffer color model: "rgb" (24/32-bit surfaces) or "indexed" (8-bit palette surfaces).
+color_mode = "rgb"
+COLOR_MODES = ("rgb", "indexed")
+# Palette slot holding the window background on indexed surfaces. Every slot is a user color, so
+# draws in this color use the closest other palette slot instead (see _indexed_color_lut).
+INDEXED_BG_INDEX = 255
+# Rasterize at native cell resolution and upscale by PIXEL_SCALE once at present time.
+scale_at_present = False
+# Scale used by draw_to_surface(): PIXEL_SCALE, or 1 when scale_at_present is on.
+_raster_scale = PIXEL_SCALE
+# LRU bounds for glyph bitmap caches and the glyph atlas (0 = unbounded).
+glyph_cache_max_entries = 4096
+glyph_cache_max_bytes = 0
+# LRU bound for pre-colored glyph sprites (one per char x color x scale).
+glyph_sprite_cache_max_entries = 8192
+# LRU bounds for pre-rendered super-text line surfaces (one per text x color x scale).
+text_run_cache_max_entries = 512
+text_run_cache_max_bytes = 16 * 1024 * 1024
+# LRU bound for measured/truncated text and text-box layouts (keyed by text, box, orientation, line step).
+text_layout_cache_max_entries = 4096
+# Directory for the persistent glyph atlas cache (None disables it).
+glyph_disk_cache_dir = None
+# Keep cached glyph bitmaps bit-packed (np.packbits, 1 bit/pixel); unpacked on lookup.
+glyph_cache_packed = False
+# Diff frames and only re-rasterize changed cell/overlay regions (see get_dirty_rects()).
+dirty_tracking = False
 loading_animation = ['-', '\\', '|', '/']
 blk = chr(31)
 hol = chr(30)
@@ -156,6 +198,19 @@ DISPLAY_SYSTEM_DEFAULTS = {
     "window_noframe": window_noframe,
     "window_always_on_top": window_always_on_top,
     "window_bg_color_rgb": window_bg_color_rgb,
+    "rasterizer": rasterizer,
+    "raster_workers": raster_workers,
+    "dirty_tracking": dirty_tracking,
+    "color_mode": color_mode,
+    "scale_at_present": scale_at_present,
+    "glyph_cache_packed": glyph_cache_packed,
+    "glyph_cache_max_entries": glyph_cache_max_entries,
+    "glyph_cache_max_bytes": glyph_cache_max_bytes,
+    "glyph_sprite_cache_max_entries": glyph_sprite_cache_max_entries,
+    "text_run_cache_max_entries": text_run_cache_max_entries,
+    "text_run_cache_max_bytes": text_run_cache_max_bytes,
+    "text_layout_cache_max_entries": text_layout_cache_max_entries,
+    "glyph_disk_cache_dir": glyph_disk_cache_dir,
 }
 DISPLAY_USER_DEFAULTS = dict(DISPLAY_SYSTEM_DEFAULTS)
 
@@ -175,7 +230,14 @@ FOCUS_BLOCKER_ORDER = []
 SYSTEM_DEFAULTS = {
     "poly": {"filled": True, "thickness": 1, "base_font_height_px": None},
     "rect": {"filled": True, "thickness": 1, "base_font_height_px": None},
-    "pattern": {"spacing": 4.0, "angle_deg": 45.0, "thickness": 1.0, "offset": 0.0, "base_font_height_px": None},
+    "pattern": {
+        "spacing": 4.0,
+        "angle_deg": 45.0,
+        "thickness": 1.0,
+        "offset": 0.0,
+        "mode": "lines",
+        "base_font_height_px": None,
+    },
     "box": {"padding": 0.0, "thickness": 1},
     "ani": {"local_offset": 0, "global_offset": 0, "slowdown": 1},
 }
@@ -234,6 +296,8 @@ hsv_palette = custom_hsv_palette(base_hsv_palette())
 index = [i for i in range(256)]
 _palette_name_to_index = {}
 _palette_rgb_cache = np.zeros((256, 3), dtype=np.uint8)
+# Palette index -> index written to indexed surfaces; identity except for INDEXED_BG_INDEX.
+_indexed_color_lut = np.arange(256, dtype=np.uint8)
 
 _LAYOUT_MODE_ENABLED = False
 _LAYOUT_MODE_BG_RGB = (200, 190, 180)
@@ -241,7 +305,7 @@ _LAYOUT_MODE_FG_RGB = (130, 159, 23)
 
 def refresh_palette_cache():
     """Rebuild palette lookup caches after mutating hsv_palette."""
-    global _palette_name_to_index, _palette_rgb_cache
+    global _palette_name_to_index, _palette_rgb_cache, _indexed_color_lut
     _palette_name_to_index = {}
     rgb = np.zeros((len(hsv_palette), 3), dtype=np.uint8)
     for i, (h, s, v, name) in enumerate(hsv_palette):
@@ -249,7 +313,18 @@ def refresh_palette_cache():
             _palette_name_to_index[name] = i
         r, g, b = colorsys.hsv_to_rgb(h, s, v)
         rgb[i] = (int(r * 255), int(g * 255), int(b * 255))
-    _palette_rgb_cache = rgb
+    # Closest color to the background slot's own (first exact match when the palette repeats it).
+    lut = np.arange(256, dtype=np.uint8)
+    if len(rgb) > INDEXED_BG_INDEX:
+        dist = ((rgb.astype(np.int32) - rgb[INDEXED_BG_INDEX].astype(np.int32)) ** 2).sum(axis=1)
+        dist[INDEXED_BG_INDEX] = np.iinfo(np.int32).max
+        lut[INDEXED_BG_INDEX] = int(np.argmin(dist))
+    with _raster_lock:
+        # A new stand-in slot changes indexed pixels, not just the uploaded palette.
+        remapped = lut[INDEXED_BG_INDEX] != _indexed_color_lut[INDEXED_BG_INDEX]
+        _palette_rgb_cache = rgb
+        _indexed_color_lut = lut
+        _invalidate_glyph_sprites(palette_only=not remapped)
 
 def pal(name):
     """Fetches color index by name from the palette."""
@@ -279,18 +354,37 @@ def set_layout_mode(enabled: bool, *, bg_rgb=None, fg_rgb=None):
     This is a pure API toggle (no keybinding). Anyware apps can call this too.
     """
     global _LAYOUT_MODE_ENABLED, _LAYOUT_MODE_BG_RGB, _LAYOUT_MODE_FG_RGB
-    _LAYOUT_MODE_ENABLED = bool(enabled)
-    if bg_rgb is not None:
-        if isinstance(bg_rgb, (list, tuple)) and len(bg_rgb) == 3:
-            _LAYOUT_MODE_BG_RGB = tuple(max(0, min(255, int(v))) for v in bg_rgb)
-    if fg_rgb is not None:
-        if isinstance(fg_rgb, (list, tuple)) and len(fg_rgb) == 3:
-            _LAYOUT_MODE_FG_RGB = tuple(max(0, min(255, int(v))) for v in fg_rgb)
+    with _raster_lock:
+        _LAYOUT_MODE_ENABLED = bool(enabled)
+        if bg_rgb is not None:
+            if isinstance(bg_rgb, (list, tuple)) and len(bg_rgb) == 3:
+                _LAYOUT_MODE_BG_RGB = tuple(max(0, min(255, int(v))) for v in bg_rgb)
+        if fg_rgb is not None:
+            if isinstance(fg_rgb, (list, tuple)) and len(fg_rgb) == 3:
+                _LAYOUT_MODE_FG_RGB = tuple(max(0, min(255, int(v))) for v in fg_rgb)
+        _invalidate_glyph_sprites(palette_only=True)
     return _LAYOUT_MODE_ENABLED
 
 def get_layout_mode():
     return bool(_LAYOUT_MODE_ENABLED)
 
+def rotate_palette_range(start, stop, steps=1):
+    """Rotate hsv_palette[start:stop] by steps (palette animation, e.g. the blink ramps).
+
+    On indexed surfaces this only changes the uploaded palette; no pixels are redrawn.
+    """
+    start = max(0, int(start))
+    stop = min(len(hsv_palette), int(stop))
+    if stop - start < 2:
+        return
+    span = hsv_palette[start:stop]
+    k = int(steps) % len(span)
+    # Names stay on their slots; only the colors move.
+    colors = [entry[:3] for entry in span[-k:] + span[:-k]] if k else [entry[:3] for entry in span]
+    with _raster_lock:
+        hsv_palette[start:stop] = [(*hsv, entry[3]) for hsv, entry in zip(colors, span)]
+        refresh_palette_cache()
+
 def get_layout_mode_colors():
     return {
         "enabled": bool(_LAYOUT_MODE_ENABLED),
@@ -302,14 +396,153 @@ def get_layout_mode_colors():
 # region screen/font
 screen = np.array([[' ' for _ in range(row_column_resolution[0])] for _ in range(row_column_resolution[1])])
 screen_color = np.zeros((row_column_resolution[1], row_column_resolution[0]), dtype=np.uint8)
-screen_raw = np.zeros((char_resolution[0]*row_column_resolution[1], char_resolution[1]*row_column_resolution[0]), dtype=int)
+screen_raw = np.zeros((char_resolution[0]*row_column_resolution[1], char_resolution[1]*row_column_resolution[0]), dtype=np.uint8)
 
 _font_ascii = None
 _font_cjk = None
 _font_ascii_path = None
 _font_cjk_path = None
-_glyph_cache = {}
-_glyph_cache_custom = {}
+
+_MISSING = object()
+
+class _LruCache:
+    """Dict-like cache bounded by entry count and/or bytes, evicting least recently used first."""
+
+    def __init__(self, *, max_entries=0, max_bytes=0, sizeof=None):
+        self._data = OrderedDict()
+        self._sizeof = sizeof
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, *, max_entries=None, max_bytes=None):
+        if max_entries is not None:
+            self.max_entries = int(max_entries)
+        if max_bytes is not None:
+            self.max_bytes = int(max_bytes)
+        self._evict()
+
+    def lookup(self, key, default=_MISSING):
+        """Counted lookup: refreshes recency on a hit, returns default on a miss."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self.bytes -= self._entry_bytes(self._data.pop(key))
+        self._data[key] = value
+        self.bytes += self._entry_bytes(value)
+        self._evict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def values(self):
+        return self._data.values()
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._data),
+            "bytes": int(self.bytes),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _entry_bytes(self, value):
+        if value is None or self._sizeof is None:
+            return 0
+        return int(self._sizeof(value))
+
+    def _evict(self):
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self.bytes > self.max_bytes)
+        ):
+            _, value = self._data.popitem(last=False)
+            self.bytes -= self._entry_bytes(value)
+            self.evictions += 1
+
+def _glyph_entry_bytes(entry):
+    return entry[1].nbytes if isinstance(entry, tuple) else entry.nbytes
+
+def _sprite_bytes(sprite):
+    return sprite.get_pitch() * sprite.get_height()
+
+_glyph_cache = _LruCache(max_entries=glyph_cache_max_entries, max_bytes=glyph_cache_max_bytes, sizeof=_glyph_entry_bytes)
+_glyph_cache_custom = _LruCache(
+    max_entries=glyph_cache_max_entries, max_bytes=glyph_cache_max_bytes, sizeof=_glyph_entry_bytes
+)
+# Pre-colored glyph surfaces keyed by (char, wide, palette index, raster scale).
+_glyph_sprite_cache = _LruCache(max_entries=glyph_sprite_cache_max_entries, sizeof=_sprite_bytes)
+# Pre-rendered super-text lines keyed by (run key, palette index, raster scale, indexed target).
+_text_run_cache = _LruCache(
+    max_entries=text_run_cache_max_entries, max_bytes=text_run_cache_max_bytes, sizeof=_sprite_bytes
+)
+# Text measurements, truncations and box layouts; pure functions of their key, so never invalidated.
+_text_layout_cache = _LruCache(max_entries=text_layout_cache_max_entries)
+# Library shapes scaled to render pixels, keyed by (PolyShape, base height, char height, PIXEL_SCALE).
+_poly_scaled_cache = _LruCache(max_entries=1024, sizeof=lambda entry: entry[0].nbytes + entry[1].nbytes)
+# Stacked glyph atlas for render(): glyph id -> (char_h, 2 * char_w) bitmap, id 0 is blank.
+# Narrow glyphs occupy the left half of their slot.
+_glyph_atlas = None
+_glyph_atlas_count = 1
+_glyph_atlas_ids = {}
+
+_glyph_atlas_resets = 0
+# Bumped on every atlas rebuild so shared copies (band workers) know ids were reassigned.
+_glyph_atlas_generation = 0
+
+def _reset_glyph_atlas():
+    global _glyph_atlas, _glyph_atlas_count, _glyph_atlas_generation, _band_glyph_ids, _screen_raw_pending
+    ch_h, ch_w = char_resolution
+    with _raster_lock:
+        _glyph_atlas_generation += 1
+        _band_glyph_ids = None
+        _screen_raw_pending = False
+        _glyph_atlas = np.zeros((64, ch_h, ch_w * 2), dtype=np.uint8)
+        _glyph_atlas_count = 1
+        _glyph_atlas_ids.clear()
+
+# Bumped whenever cached raster output becomes stale; forces a full redraw under dirty tracking.
+# Palette-only changes bump _palette_epoch instead: indexed surfaces just re-upload their palette.
+_raster_epoch = 0
+_palette_epoch = 0
+
+def _invalidate_glyph_sprites(*, palette_only=False):
+    """Drop pre-colored glyph sprites, text runs and pattern surfaces (fonts, palette, scale or layout mode changed)."""
+    global _raster_epoch, _palette_epoch
+    with _raster_lock:
+        _glyph_sprite_cache.clear()
+        _text_run_cache.clear()
+        _pattern_surface_cache.clear()
+        if palette_only:
+            _palette_epoch += 1
+        else:
+            _raster_epoch += 1
 
 def _sanitize_display_option(key, value):
     if key in ("fps", "target_fps", "char_height", "char_width", "rows", "cols"):
@@ -318,28 +551,55 @@ def _sanitize_display_option(key, value):
         return max(0, int(value))
     if key == "pixel_scale":
         return max(1, int(value))
-    if key in ("window_noframe", "window_always_on_top"):
+    if key in (
+        "glyph_cache_max_entries",
+        "glyph_cache_max_bytes",
+        "glyph_sprite_cache_max_entries",
+        "text_run_cache_max_entries",
+        "text_run_cache_max_bytes",
+        "text_layout_cache_max_entries",
+        "raster_workers",
+    ):
+        return max(0, int(value))
+    if key in ("window_noframe", "window_always_on_top", "dirty_tracking", "scale_at_present", "glyph_cache_packed"):
         return bool(value)
     if key == "window_bg_color_rgb":
         if isinstance(value, (list, tuple)) and len(value) == 3:
             return tuple(max(0, min(255, int(v))) for v in value)
         return DISPLAY_USER_DEFAULTS.get("window_bg_color_rgb", (10, 10, 10))
+    if key == "rasterizer":
+        name = str(value).strip().lower()
+        return name if name in RASTERIZERS else DISPLAY_SYSTEM_DEFAULTS["rasterizer"]
+    if key == "glyph_disk_cache_dir":
+        return None if value in (None, "") else str(os.fspath(value))
+    if key == "color_mode":
+        name = str(value).strip().lower()
+        return name if name in COLOR_MODES else DISPLAY_SYSTEM_DEFAULTS["color_mode"]
     return value
 
 def _allocate_framebuffers():
-    global screen, screen_color, screen_raw, _glyph_cache, _glyph_cache_custom
+    global screen, screen_color, screen_raw, _window_clip
     cols, rows = row_column_resolution
     ch_h, ch_w = char_resolution
-    screen = np.full((rows, cols), ' ', dtype='<U1')
-    screen_color = np.zeros((rows, cols), dtype=np.uint8)
-    screen_raw = np.zeros((ch_h * rows, ch_w * cols), dtype=int)
-    _glyph_cache = {}
-    _glyph_cache_custom = {}
+    with _raster_lock:
+        screen = np.full((rows, cols), ' ', dtype='<U1')
+        screen_color = np.zeros((rows, cols), dtype=np.uint8)
+        screen_raw = np.zeros((ch_h * rows, ch_w * cols), dtype=np.uint8)
+        _bump_font_generation()
+        _glyph_cache.clear()
+        _glyph_cache_custom.clear()
+        _poly_scaled_cache.clear()
+        _invalidate_glyph_sprites()
+        _reset_glyph_atlas()
+        _window_clip = None
 
 def _apply_display_defaults(rebuild_framebuffers=True):
     global fps, target_fps, char_resolution, row_column_resolution
     global char_block_spacing_px, line_block_spacing_px, border_padding_px, PIXEL_SCALE
-    global window_noframe, window_always_on_top, window_bg_color_rgb
+    global window_noframe, window_always_on_top, window_bg_color_rgb, rasterizer, raster_workers, dirty_tracking, color_mode
+    global scale_at_present, _raster_scale, glyph_cache_packed
+    global glyph_cache_max_entries, glyph_cache_max_bytes, glyph_sprite_cache_max_entries, glyph_disk_cache_dir
+    global text_run_cache_max_entries, text_run_cache_max_bytes, text_layout_cache_max_entries
 
     fps = _sanitize_display_option("fps", DISPLAY_USER_DEFAULTS["fps"])
     target_fps = _sanitize_display_option("target_fps", DISPLAY_USER_DEFAULTS["target_fps"])
@@ -356,6 +616,38 @@ def _apply_display_defaults(rebuild_framebuffers=True):
     window_noframe = _sanitize_display_option("window_noframe", DISPLAY_USER_DEFAULTS["window_noframe"])
     window_always_on_top = _sanitize_display_option("window_always_on_top", DISPLAY_USER_DEFAULTS["window_always_on_top"])
     window_bg_color_rgb = _sanitize_display_option("window_bg_color_rgb", DISPLAY_USER_DEFAULTS["window_bg_color_rgb"])
+    rasterizer = _sanitize_display_option("rasterizer", DISPLAY_USER_DEFAULTS["rasterizer"])
+    raster_workers = _sanitize_display_option("raster_workers", DISPLAY_USER_DEFAULTS["raster_workers"])
+    dirty_tracking = _sanitize_display_option("dirty_tracking", DISPLAY_USER_DEFAULTS["dirty_tracking"])
+    color_mode = _sanitize_display_option("color_mode", DISPLAY_USER_DEFAULTS["color_mode"])
+    scale_at_present = _sanitize_display_option("scale_at_present", DISPLAY_USER_DEFAULTS["scale_at_present"])
+    _raster_scale = 1 if scale_at_present else PIXEL_SCALE
+    glyph_cache_packed = _sanitize_display_option("glyph_cache_packed", DISPLAY_USER_DEFAULTS["glyph_cache_packed"])
+    glyph_cache_max_entries = _sanitize_display_option(
+        "glyph_cache_max_entries", DISPLAY_USER_DEFAULTS["glyph_cache_max_entries"]
+    )
+    glyph_cache_max_bytes = _sanitize_display_option("glyph_cache_max_bytes", DISPLAY_USER_DEFAULTS["glyph_cache_max_bytes"])
+    glyph_sprite_cache_max_entries = _sanitize_display_option(
+        "glyph_sprite_cache_max_entries", DISPLAY_USER_DEFAULTS["glyph_sprite_cache_max_entries"]
+    )
+    for cache in (_glyph_cache, _glyph_cache_custom):
+        cache.configure(max_entries=glyph_cache_max_entries, max_bytes=glyph_cache_max_bytes)
+    _glyph_sprite_cache.configure(max_entries=glyph_sprite_cache_max_entries)
+    text_run_cache_max_entries = _sanitize_display_option(
+        "text_run_cache_max_entries", DISPLAY_USER_DEFAULTS["text_run_cache_max_entries"]
+    )
+    text_run_cache_max_bytes = _sanitize_display_option(
+        "text_run_cache_max_bytes", DISPLAY_USER_DEFAULTS["text_run_cache_max_bytes"]
+    )
+    _text_run_cache.configure(max_entries=text_run_cache_max_entries, max_bytes=text_run_cache_max_bytes)
+    text_layout_cache_max_entries = _sanitize_display_option(
+        "text_layout_cache_max_entries", DISPLAY_USER_DEFAULTS["text_layout_cache_max_entries"]
+    )
+    _text_layout_cache.configure(max_entries=text_layout_cache_max_entries)
+    disk_dir = _sanitize_display_option("glyph_disk_cache_dir", DISPLAY_USER_DEFAULTS["glyph_disk_cache_dir"])
+    if disk_dir != glyph_disk_cache_dir:
+        _close_glyph_disk_stores()
+        glyph_disk_cache_dir = disk_dir
 
     if rebuild_framebuffers:
         _allocate_framebuffers()
@@ -368,13 +660,15 @@ def set_display_defaults(**overrides):
         if key not in DISPLAY_USER_DEFAULTS or value is None:
             continue
         DISPLAY_USER_DEFAULTS[key] = _sanitize_display_option(key, value)
-    _apply_display_defaults(rebuild_framebuffers=True)
+    with _raster_lock:
+        _apply_display_defaults(rebuild_framebuffers=True)
     return get_display_defaults()
 
 def reset_display_defaults():
     DISPLAY_USER_DEFAULTS.clear()
     DISPLAY_USER_DEFAULTS.update(DISPLAY_SYSTEM_DEFAULTS)
-    _apply_display_defaults(rebuild_framebuffers=True)
+    with _raster_lock:
+        _apply_display_defaults(rebuild_framebuffers=True)
     return get_display_defaults()
 
 def get_window_size_px():
@@ -385,6 +679,71 @@ def get_window_size_px():
     pad = border_padding_px * PIXEL_SCALE
     return (int(pad * 2 + cols * eff_w), int(pad * 2 + rows * eff_h))
 
+def get_present_size_px():
+    """Size of the presented (window) image; all pixel coordinates live in this space."""
+    return get_window_size_px()
+
+def get_render_size_px():
+    """Size of the surface draw_to_surface() expects (native when scale_at_present is on)."""
+    w, h = get_window_size_px()
+    div = PIXEL_SCALE // _raster_scale
+    return (w // div, h // div)
+
+def get_glyph_cache_stats():
+    """Hit/miss/eviction counters and bounds of the glyph caches."""
+    return {
+        "glyph_cache": _glyph_cache.stats(),
+        "glyph_cache_custom": _glyph_cache_custom.stats(),
+        "glyph_sprites": _glyph_sprite_cache.stats(),
+        "text_runs": _text_run_cache.stats(),
+        "text_layout": _text_layout_cache.stats(),
+        "glyph_atlas": {
+            "entries": int(_glyph_atlas_count),
+            "max_entries": glyph_cache_max_entries,
+            "resets": _glyph_atlas_resets,
+        },
+    }
+
+def reset_glyph_cache_stats():
+    global _glyph_atlas_resets
+    for cache in (_glyph_cache, _glyph_cache_custom, _glyph_sprite_cache, _text_run_cache, _text_layout_cache):
+        cache.reset_stats()
+    _glyph_atlas_resets = 0
+
+def get_memory_stats():
+    """Bytes held by framebuffers and glyph caches (entries counted per cache)."""
+    def _array(arr):
+        return {"bytes": int(arr.nbytes), "shape": tuple(arr.shape), "dtype": str(arr.dtype)}
+
+    atlas_bytes = 0 if _glyph_atlas is None else int(_glyph_atlas.nbytes)
+    fonts = {id(f): f for f in (_font_ascii, _font_cjk, *_builtin_bitmap_fonts.values()) if isinstance(f, BitmapFont)}
+    stats = {
+        "screen": _array(screen),
+        "screen_color": _array(screen_color),
+        "screen_raw": _array(screen_raw),
+        "glyph_cache": {"entries": len(_glyph_cache), "bytes": _glyph_cache.bytes, "packed": glyph_cache_packed},
+        "glyph_cache_custom": {
+            "entries": len(_glyph_cache_custom),
+            "bytes": _glyph_cache_custom.bytes,
+            "packed": glyph_cache_packed,
+        },
+        "glyph_atlas": {
+            "entries": int(_glyph_atlas_count),
+            "capacity": 0 if _glyph_atlas is None else int(_glyph_atlas.shape[0]),
+            "bytes": atlas_bytes,
+        },
+        "glyph_sprites": {"entries": len(_glyph_sprite_cache), "bytes": _glyph_sprite_cache.bytes},
+        "text_runs": {"entries": len(_text_run_cache), "bytes": _text_run_cache.bytes},
+        # Memory-mapped atlases are file-backed and reported apart from resident bytes.
+        "bitmap_fonts": {
+            "entries": len(fonts),
+            "bytes": sum(f.nbytes for f in fonts.values() if not f.mapped),
+            "mapped_bytes": sum(f.nbytes for f in fonts.values() if f.mapped),
+        },
+    }
+    stats["total_bytes"] = int(sum(item["bytes"] for item in stats.values()))
+    return stats
+
 def get_window_flags(extra_flags=0):
     flags = int(extra_flags or 0)
     if window_noframe:
@@ -399,6 +758,7 @@ def next_frame(step=1):
 
 def begin_frame(*, clear_char=' ', clear_color=0, reset_overlay=True, advance_frame=True):
     """Canonical frame start for dependent layers (Anyware-friendly)."""
+    _merge_prewarmed_glyphs()
     if advance_frame:
         next_frame(1)
     if reset_overlay:
@@ -406,10 +766,26 @@ def begin_frame(*, clear_char=' ', clear_color=0, reset_overlay=True, advance_fr
     clear_screen(char=clear_char, color=clear_color)
     return frame
 
+_native_target = None
+
 def finish_frame(surface, *, flip=False):
     """Canonical frame finish for dependent layers (Anyware-friendly)."""
+    global _native_target
     render(screen, screen_color)
-    draw_to_surface(surface)
+    if scale_at_present and PIXEL_SCALE > 1 and surface.get_size() != get_render_size_px():
+        # Present-sized target: rasterize natively, then upscale once.
+        size = get_render_size_px()
+        if _native_target is None or _native_target.get_size() != size or (
+            (_native_target.get_bitsize() == 8) != (color_mode == "indexed")
+        ):
+            _native_target = create_render_surface(size)
+        draw_to_surface(_native_target)
+        present_scaled(_native_target, surface, get_dirty_rects() if dirty_tracking else None)
+    else:
+        draw_to_surface(surface)
+    for store in _glyph_disk_stores.values():
+        if store is not None:
+            store.maybe_flush()
     if flip:
         pygame.display.flip()
     return frame
@@ -824,7 +1200,10 @@ def draw_focus_blockers(color, scope=None, *, thickness=1.0):
             continue
         p1 = _normalize_focus_point(blocker.get("p1"))
         p2 = _normalize_focus_point(blocker.get("p2"))
-        line_queue.append((p1[0], p1[1], p2[0], p2[1], c_idx, thickness))
+        pad = _line_pad(thickness)
+        clip = _clip_for(min(p1[0], p2[0]) - pad, min(p1[1], p2[1]) - pad, max(p1[0], p2[0]) + pad, max(p1[1], p2[1]) + pad)
+        if clip is not None:
+            line_queue.append((p1[0], p1[1], p2[0], p2[1], c_idx, thickness), clip)
         count += 1
     return count
 
@@ -1007,53 +1386,98 @@ def clear_cell(x, y, char=' ', color=0):
     return True
 
 def set_fonts(ascii_path=None, cjk_path=None, cell_w=None, cell_h=None, size_px=None):
-    """Load font files (TTF/OTF/TTC) and set cell size."""
+    """Load font files and set cell size.
+
+    TTF/OTF/TTC files are rasterized with freetype. PSF1/PSF2/BDF bitmap fonts are read directly
+    from their glyph atlas; when cell_w/cell_h are omitted the cell follows the ASCII bitmap font.
+    """
     global _font_ascii, _font_cjk, _font_ascii_path, _font_cjk_path
-    global char_resolution, screen_raw, _glyph_cache, _glyph_cache_custom
-    if cell_h is not None:
-        char_resolution[0] = int(cell_h)
-        DISPLAY_USER_DEFAULTS["char_height"] = int(char_resolution[0])
-    if cell_w is not None:
-        char_resolution[1] = int(cell_w)
-        DISPLAY_USER_DEFAULTS["char_width"] = int(char_resolution[1])
-    if size_px is None:
-        size_px = int(char_resolution[0])
-    if ascii_path is not None:
-        _font_ascii = pygame.freetype.Font(ascii_path, size_px)
-        _font_ascii_path = ascii_path
-    if cjk_path is not None:
-        _font_cjk = pygame.freetype.Font(cjk_path, size_px)
-        _font_cjk_path = cjk_path
-    _glyph_cache = {}
-    _glyph_cache_custom = {}
-    screen_raw = np.zeros((char_resolution[0]*row_column_resolution[1], char_resolution[1]*row_column_resolution[0]), dtype=int)
+    global char_resolution, screen_raw, _window_clip
+    bitmap_ascii = load_bitmap_font(ascii_path) if ascii_path is not None and _is_bitmap_font_file(ascii_path) else None
+    bitmap_cjk = load_bitmap_font(cjk_path) if cjk_path is not None and _is_bitmap_font_file(cjk_path) else None
+    if bitmap_ascii is not None:
+        cell_h = bitmap_ascii.cell_h if cell_h is None else cell_h
+        cell_w = bitmap_ascii.cell_w if cell_w is None else cell_w
+    with _raster_lock:
+        if cell_h is not None:
+            char_resolution[0] = int(cell_h)
+            DISPLAY_USER_DEFAULTS["char_height"] = int(char_resolution[0])
+        if cell_w is not None:
+            char_resolution[1] = int(cell_w)
+            DISPLAY_USER_DEFAULTS["char_width"] = int(char_resolution[1])
+        if size_px is None:
+            size_px = int(char_resolution[0])
+        if ascii_path is not None:
+            _font_ascii = bitmap_ascii or pygame.freetype.Font(ascii_path, size_px)
+            _font_ascii_path = ascii_path
+        if cjk_path is not None:
+            _font_cjk = bitmap_cjk or pygame.freetype.Font(cjk_path, size_px)
+            _font_cjk_path = cjk_path
+        _bump_font_generation()
+        _glyph_cache.clear()
+        _glyph_cache_custom.clear()
+        _close_glyph_disk_stores()
+        _poly_scaled_cache.clear()
+        _invalidate_glyph_sprites()
+        _reset_glyph_atlas()
+        screen_raw = np.zeros((char_resolution[0]*row_column_resolution[1], char_resolution[1]*row_column_resolution[0]), dtype=np.uint8)
+        _window_clip = None
 
 def set_font(filepath, cell_w=None, cell_h=None, size_px=None):
     set_fonts(ascii_path=filepath, cjk_path=filepath, cell_w=cell_w, cell_h=cell_h, size_px=size_px)
 
+# Display-cell width (1 or 2) of every BMP code point; other planes fall back to unicodedata.
+_BMP_CELL_WIDTHS = bytearray(
+    2 if unicodedata.east_asian_width(chr(cp)) in ("W", "F") else 1 for cp in range(0x10000)
+)
+
 def _is_wide_char(ch):
+    cp = ord(ch)
+    if cp < 0x10000:
+        return _BMP_CELL_WIDTHS[cp] == 2
     return unicodedata.east_asian_width(ch) in ("W", "F")
 
-def _get_glyph_bitmap(ch, wide):
-    font = _font_cjk if wide and _font_cjk is not None else _font_ascii
-    font_path = _font_cjk_path if wide and _font_cjk_path is not None else _font_ascii_path
-    if font is None:
-        return None
-    key = (ch, wide, char_resolution[0], char_resolution[1], font_path)
-    if key in _glyph_cache:
-        return _glyph_cache[key]
-    cell_w = char_resolution[1] * (2 if wide else 1)
-    cell_h = char_resolution[0]
-    surf, _ = font.render(ch, fgcolor=(255, 255, 255), bgcolor=None)
+def _cell_width(ch):
+    cp = ord(ch)
+    if cp < 0x10000:
+        return _BMP_CELL_WIDTHS[cp]
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+def _glyph_cache_put(cache, key, bmp):
+    """Store a 0/1 uint8 glyph bitmap (or None), bit-packed when glyph_cache_packed is on."""
+    if bmp is not None and glyph_cache_packed:
+        cache[key] = (bmp.shape, np.packbits(bmp, axis=None))
+    else:
+        cache[key] = bmp
+    return bmp
+
+def _glyph_cache_get(cache, key):
+    """Counted cache lookup; returns _MISSING when the glyph was never rasterized."""
+    entry = cache.lookup(key)
+    if isinstance(entry, tuple):
+        shape, packed = entry
+        return np.unpackbits(packed, count=shape[0] * shape[1]).reshape(shape)
+    return entry
+
+def _rasterize_glyph(font, ch, cell_h, span_w):
+    """Render ch with freetype and fit it into a (cell_h, span_w) 0/1 bitmap (None when blank)."""
+    # pygame.freetype is not thread-safe; every freetype load and render holds the raster lock.
+    with _raster_lock:
+        surf, _ = font.render(ch, fgcolor=(255, 255, 255), bgcolor=None)
     alpha = pygame.surfarray.array_alpha(surf)
     surf_w, surf_h = surf.get_size()
     if alpha.shape == (surf_w, surf_h):
         alpha = alpha.T
+    return _fit_glyph(alpha, cell_h, span_w)
+
+def _fit_glyph(alpha, cell_h, span_w):
+    """Downscale (nearest) and center a coverage bitmap in a (cell_h, span_w) 0/1 cell (None when empty)."""
     h, w = alpha.shape
     if h == 0 or w == 0:
-        _glyph_cache[key] = None
         return None
-    scale = min(cell_w / w, cell_h / h, 1.0)
+    if (h, w) == (cell_h, span_w):
+        return (alpha > 0).astype(np.uint8)
+    scale = min(span_w / w, cell_h / h, 1.0)
     if scale < 1.0:
         new_w = max(1, int(round(w * scale)))
         new_h = max(1, int(round(h * scale)))
@@ -1063,12 +1487,549 @@ def _get_glyph_bitmap(ch, wide):
     else:
         scaled = alpha
     h2, w2 = scaled.shape
-    out = np.zeros((cell_h, cell_w), dtype=int)
+    out = np.zeros((cell_h, span_w), dtype=np.uint8)
     y0 = max(0, (cell_h - h2) // 2)
-    x0 = max(0, (cell_w - w2) // 2)
-    out[y0:y0 + h2, x0:x0 + w2] = (scaled > 0).astype(int)
-    _glyph_cache[key] = out
+    x0 = max(0, (span_w - w2) // 2)
+    out[y0 : y0 + h2, x0 : x0 + w2] = scaled > 0
     return out
+
+# Fixed-cell bitmap fonts: glyphs are read straight from a packed 1-bit atlas, no freetype involved.
+_PSF1_MAGIC = b"\x36\x04"
+_PSF2_MAGIC = b"\x72\xb5\x4a\x86"
+_PSF2_HEADER = struct.Struct("<4sIIIIIII")
+
+class BitmapFont:
+    """Fixed-cell 1-bit font backed by a packed glyph atlas (PSF1/PSF2/BDF file or a built-in table).
+
+    rows is (N, cell_h, row_bytes) uint8, MSB-first, memory-mapped for PSF files. index maps
+    characters to atlas slots; widths holds per-glyph advances (cell_w, or 2 * cell_w for wide
+    BDF glyphs) and is None when every glyph is cell_w wide.
+    """
+
+    def __init__(self, name, rows, cell_w, cell_h, index, widths=None):
+        self.name = str(name)
+        # A plain ndarray view keeps the file mapping but skips np.memmap's per-index overhead.
+        self.mapped = isinstance(rows, np.memmap)
+        self.rows = rows.view(np.ndarray) if self.mapped else rows
+        self.cell_w = int(cell_w)
+        self.cell_h = int(cell_h)
+        self.index = index
+        self.widths = widths
+
+    @property
+    def size(self):
+        return self.cell_h
+
+    def __len__(self):
+        return int(self.rows.shape[0])
+
+    def glyph(self, ch):
+        """(cell_h, advance) 0/1 bitmap of ch, or None when the font has no glyph for it."""
+        idx = self.index.get(ch)
+        if idx is None:
+            return None
+        width = self.cell_w if self.widths is None else int(self.widths[idx])
+        return np.unpackbits(self.rows[idx], axis=1, count=width)
+
+    def bitmap(self, ch, cell_h, span_w):
+        """Glyph fitted to a (cell_h, span_w) cell like a rasterized one (None when missing or blank)."""
+        bmp = self.glyph(ch)
+        if bmp is None or not bmp.any():
+            return None
+        return bmp if bmp.shape == (cell_h, span_w) else _fit_glyph(bmp, cell_h, span_w)
+
+    @property
+    def nbytes(self):
+        return int(self.rows.nbytes)
+
+def _is_bitmap_font_file(path):
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(16)
+    except OSError:
+        return False
+    return head.startswith(_PSF2_MAGIC) or head.startswith(_PSF1_MAGIC) or head.lstrip().startswith(b"STARTFONT")
+
+def load_bitmap_font(path):
+    """Load a PSF1/PSF2 console font or a BDF font as a BitmapFont (PSF glyph data is memory-mapped)."""
+    path = os.fspath(path)
+    with open(path, "rb") as fh:
+        head = fh.read(_PSF2_HEADER.size)
+    if head.startswith(_PSF2_MAGIC):
+        return _load_psf2(path, head)
+    if head.startswith(_PSF1_MAGIC):
+        return _load_psf1(path, head)
+    if head.lstrip().startswith(b"STARTFONT"):
+        return _load_bdf(path)
+    raise ValueError(f"not a PSF or BDF font: {path}")
+
+def _psf_table_index(table, count, *, ucs2):
+    """Character -> glyph slot from a PSF unicode table (sequences after the separator are skipped)."""
+    if ucs2:
+        # PSF1 tables are UCS-2: U+FFFF ends a glyph's entry and U+FFFE starts its sequences.
+        text = table[: len(table) & ~1].decode("utf-16-le", errors="ignore")
+        entries = [entry.split("\ufffe", 1)[0] for entry in text.split("\uffff")]
+    else:
+        entries = [entry.split(b"\xfe", 1)[0].decode("utf-8", errors="ignore") for entry in table.split(b"\xff")]
+    index = {}
+    for slot, chars in enumerate(entries[:count]):
+        for ch in chars:
+            index.setdefault(ch, slot)
+    return index
+
+def _load_psf2(path, head):
+    _, _, header_size, flags, count, char_size, height, width = _PSF2_HEADER.unpack(head)
+    row_bytes = (width + 7) // 8
+    if char_size != height * row_bytes:
+        raise ValueError(f"unsupported PSF2 glyph layout: {path}")
+    rows = np.memmap(path, dtype=np.uint8, mode="r", offset=header_size, shape=(count, height, row_bytes))
+    if flags & 1:
+        with open(path, "rb") as fh:
+            fh.seek(header_size + count * char_size)
+            index = _psf_table_index(fh.read(), count, ucs2=False)
+    else:
+        index = {chr(i): i for i in range(count)}
+    return BitmapFont(os.path.basename(path), rows, width, height, index)
+
+def _load_psf1(path, head):
+    mode, height = head[2], head[3]
+    count = 512 if mode & 0x01 else 256
+    rows = np.memmap(path, dtype=np.uint8, mode="r", offset=4, shape=(count, height, 1))
+    if mode & 0x06:
+        with open(path, "rb") as fh:
+            fh.seek(4 + count * height)
+            index = _psf_table_index(fh.read(), count, ucs2=True)
+    else:
+        index = {chr(i): i for i in range(count)}
+    return BitmapFont(os.path.basename(path), rows, 8, height, index)
+
+def _load_bdf(path):
+    """Parse a BDF font into a packed atlas; the cell is the most common advance by the bounding-box height."""
+    box = None
+    chars = []
+    with open(path, "r", encoding="latin-1") as fh:
+        lines = iter(fh.read().splitlines())
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "FONTBOUNDINGBOX":
+            box = tuple(int(v) for v in parts[1:5])
+        elif parts[0] == "STARTCHAR":
+            glyph = {"encoding": -1, "dwidth": None, "bbx": None, "bitmap": []}
+            for line in lines:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == "ENDCHAR":
+                    break
+                if parts[0] == "ENCODING":
+                    glyph["encoding"] = int(parts[1])
+                elif parts[0] == "DWIDTH":
+                    glyph["dwidth"] = int(parts[1])
+                elif parts[0] == "BBX":
+                    glyph["bbx"] = tuple(int(v) for v in parts[1:5])
+                elif parts[0] == "BITMAP":
+                    glyph["bitmap"] = []
+                else:
+                    glyph["bitmap"].append(parts[0])
+            if glyph["encoding"] >= 0 and glyph["bbx"] is not None:
+                chars.append(glyph)
+    if box is None or not chars:
+        raise ValueError(f"BDF font without glyphs or FONTBOUNDINGBOX: {path}")
+    box_w, cell_h, box_x, box_y = box
+    advances = [g["dwidth"] if g["dwidth"] is not None else g["bbx"][0] for g in chars]
+    cell_w = max(1, max(set(advances), key=advances.count))
+    widths = np.array([cell_w * 2 if adv > cell_w else cell_w for adv in advances], dtype=np.int64)
+    atlas = np.zeros((len(chars), cell_h, int(widths.max())), dtype=np.uint8)
+    ascent = cell_h + box_y
+    index = {}
+    for slot, glyph in enumerate(chars):
+        w, h, x_off, y_off = glyph["bbx"]
+        top = ascent - (h + y_off)
+        left = x_off - min(0, box_x)
+        for r, hexrow in enumerate(glyph["bitmap"][:h]):
+            y = top + r
+            if not 0 <= y < cell_h:
+                continue
+            bits = np.unpackbits(np.frombuffer(bytes.fromhex(hexrow), dtype=np.uint8))[:w]
+            x0, x1 = max(0, left), min(int(widths[slot]), left + w)
+            if x0 < x1:
+                atlas[slot, y, x0:x1] = bits[x0 - left : x1 - left]
+        index.setdefault(chr(glyph["encoding"]), slot)
+    uniform = bool((widths == cell_w).all())
+    return BitmapFont(os.path.basename(path), np.packbits(atlas, axis=2), cell_w, cell_h, index, None if uniform else widths)
+
+# Built-in 5x7 font for super-text mode="5x7": printable ASCII, five column bytes per glyph, bit 0 at the top.
+_FONT_5X7_COLUMNS = bytes.fromhex(
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12" "2313086462" "3649552250" "0005030000"
+    "001c224100" "0041221c00" "082a1c2a08" "08083e0808" "0050300000" "0808080808" "0060600000" "2010080402"
+    "3e5149453e" "00427f4000" "4261514946" "2141454b31" "1814127f10" "2745454539" "3c4a494930" "0171090503"
+    "3649494936" "064949291e" "0036360000" "0056360000" "0814224100" "1414141414" "0041221408" "0201510906"
+    "324979413e" "7e1111117e" "7f49494936" "3e41414122" "7f4141221c" "7f49494941" "7f09090101" "3e41415132"
+    "7f0808087f" "00417f4100" "2040413f01" "7f08142241" "7f40404040" "7f0204027f" "7f0408107f" "3e4141413e"
+    "7f09090906" "3e4151215e" "7f09192946" "4649494931" "01017f0101" "3f4040403f" "1f2040201f" "7f2018207f"
+    "6314081463" "0304780403" "6151494543" "007f414100" "0204081020" "0041417f00" "0402010204" "4040404040"
+    "0001020400" "2054545478" "7f48444438" "3844444420" "384444487f" "3854545418" "087e090102" "0c5252523e"
+    "7f08040478" "00447d4000" "2040443d00" "007f102844" "00417f4000" "7c04180478" "7c08040478" "3844444438"
+    "7c14141408" "081414187c" "7c08040408" "4854545420" "043f444020" "3c4040207c" "1c2040201c" "3c4030403c"
+    "4428102844" "0c5050503c" "4464544c44" "0008364100" "00007f0000" "0041360800" "0804081008"
+)
+BUILTIN_BITMAP_FONTS = ("5x7",)
+_builtin_bitmap_fonts = {}
+
+def get_builtin_bitmap_font(name="5x7"):
+    """Built-in BitmapFont by name (see BUILTIN_BITMAP_FONTS); the atlas is built once on first use."""
+    key = str(name).strip().lower()
+    font = _builtin_bitmap_fonts.get(key)
+    if font is None:
+        if key != "5x7":
+            raise ValueError(f"unknown built-in bitmap font: {name!r}")
+        cols = np.frombuffer(_FONT_5X7_COLUMNS, dtype=np.uint8).reshape(-1, 5)
+        bits = (cols[:, None, :] >> np.arange(7, dtype=np.uint8)[None, :, None]) & 1
+        index = {chr(0x20 + i): i for i in range(len(cols))}
+        font = _builtin_bitmap_fonts[key] = BitmapFont("5x7", np.packbits(bits, axis=2), 5, 7, index)
+    return font
+
+class _GlyphDiskStore:
+    """On-disk glyph cache for one (font file, size_px, cell size): an append-only <name>.v3.glyphs log.
+
+    The file is a versioned header followed by self-contained records (magic, key, blank flag, CRC32,
+    (cell_h, 2 * cell_w) bitmap; narrow glyphs use the left half). It is never rewritten: flush()
+    appends the records added since the last flush in one write, so several processes can share a
+    cache dir without locking. Loading maps the file read-only and checks each record's CRC in
+    place; bitmaps stay views into the map until get() copies one out. A torn record (crashed
+    writer) fails its CRC and the reader resumes at the next record magic.
+    """
+
+    FLUSH_INTERVAL_S = 1.0
+    MAGIC = b"GLYC"
+    RECORD_MAGIC = b"GR"
+    VERSION = 3
+    # The format version is part of the file name, so other versions never share a file.
+    SUFFIX = f".v{VERSION}.glyphs"
+    _HEADER = struct.Struct("<4sHHH")  # magic, version, cell_h, cell_w
+    _RECORD = struct.Struct("<2sHBI")  # record magic, key bytes, 1 = bitmap follows (0 = blank glyph), crc32
+
+    def __init__(self, base_path, cell_h, cell_w):
+        self.path = base_path + self.SUFFIX
+        self.cell_h = int(cell_h)
+        self.cell_w = int(cell_w)
+        self.slot_bytes = self.cell_h * self.cell_w * 2
+        # key -> (cell_h, 2 * cell_w) bitmap (a view into the map, or an added slot), None = blank.
+        self.index = {}
+        self.pending = []
+        self.dirty = False
+        self.exists = False
+        # False for a file with a foreign or damaged header: it is neither read nor appended to.
+        self.writable = True
+        self.last_flush = time.perf_counter()
+        self._map = None
+        try:
+            with open(self.path, "rb") as fh:
+                self.exists = True
+                self._load(fh)
+        except OSError:
+            pass
+
+    def _load(self, fh):
+        size = os.fstat(fh.fileno()).st_size
+        header = fh.read(self._HEADER.size)
+        if len(header) < self._HEADER.size or self._HEADER.unpack(header) != (
+            self.MAGIC,
+            self.VERSION,
+            self.cell_h,
+            self.cell_w,
+        ):
+            self.writable = False
+            return
+        if size == self._HEADER.size:
+            return
+        self._map = mm = mmap.mmap(fh.fileno(), size, access=mmap.ACCESS_READ)
+        pos = self._HEADER.size
+        while pos < size:
+            end = self._load_record(mm, pos, size)
+            if end is None:
+                # Torn or damaged record: resume at the next record magic.
+                end = mm.find(self.RECORD_MAGIC, pos + 1)
+                if end < 0:
+                    break
+            pos = end
+
+    def _load_record(self, mm, pos, size):
+        """Index the record at pos; its end offset, or None when it is torn or damaged."""
+        if pos + self._RECORD.size > size:
+            return None
+        magic, key_len, has_bitmap, crc = self._RECORD.unpack_from(mm, pos)
+        body = pos + self._RECORD.size
+        end = body + key_len + (self.slot_bytes if has_bitmap else 0)
+        if magic != self.RECORD_MAGIC or has_bitmap > 1 or end > size or zlib.crc32(mm[body:end]) != crc:
+            return None
+        try:
+            key = mm[body : body + key_len].decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+        if has_bitmap:
+            slot = np.frombuffer(mm, dtype=np.uint8, count=self.slot_bytes, offset=body + key_len)
+            self.index[key] = slot.reshape(self.cell_h, self.cell_w * 2)
+        else:
+            self.index[key] = None
+        return end
+
+    def _record(self, key, slot):
+        key_bytes = key.encode("utf-8")
+        payload = key_bytes + (b"" if slot is None else slot.tobytes())
+        return self._RECORD.pack(self.RECORD_MAGIC, len(key_bytes), slot is not None, zlib.crc32(payload)) + payload
+
+    @staticmethod
+    def _key(ch, wide):
+        return ("W" if wide else "N") + ch
+
+    def get(self, ch, wide):
+        """Cached bitmap, None for a known-blank glyph, or _MISSING."""
+        slot = self.index.get(self._key(ch, wide), _MISSING)
+        if slot is _MISSING or slot is None:
+            return slot
+        return np.array(slot[:, : self.cell_w * (2 if wide else 1)], dtype=np.uint8)
+
+    def put(self, ch, wide, bmp):
+        key = self._key(ch, wide)
+        self.dirty = True
+        if bmp is None:
+            self.index[key] = None
+            self.pending.append(self._record(key, None))
+            return
+        slot = np.zeros((self.cell_h, self.cell_w * 2), dtype=np.uint8)
+        slot[:, : bmp.shape[1]] = bmp
+        self.index[key] = slot
+        self.pending.append(self._record(key, slot))
+
+    def maybe_flush(self):
+        if self.dirty and time.perf_counter() - self.last_flush >= self.FLUSH_INTERVAL_S:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.perf_counter()
+        if not self.dirty:
+            return
+        if self.writable:
+            data = b"".join(self.pending)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if not self.exists:
+                    try:
+                        # Exclusive create with the header in the same write: no reader sees a partial header.
+                        with open(self.path, "xb") as fh:
+                            fh.write(self._HEADER.pack(self.MAGIC, self.VERSION, self.cell_h, self.cell_w) + data)
+                        data = None
+                    except FileExistsError:
+                        pass
+                    self.exists = True
+                if data is not None:
+                    # One append-mode write per flush: concurrent writers never interleave inside a record.
+                    with open(self.path, "ab") as fh:
+                        fh.write(data)
+            except OSError:
+                return
+        self.pending = []
+        self.dirty = False
+
+_glyph_disk_stores = {}
+_font_file_hashes = {}
+
+def _font_file_hash(font_path):
+    digest = _font_file_hashes.get(font_path)
+    if digest is None:
+        sha = hashlib.sha1()
+        with open(font_path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = _font_file_hashes[font_path] = sha.hexdigest()
+    return digest
+
+def _glyph_disk_store(font, font_path, cell_h, cell_w):
+    if glyph_disk_cache_dir is None or font_path is None or isinstance(font, BitmapFont):
+        return None
+    key = (font_path, int(font.size), int(cell_h), int(cell_w))
+    store = _glyph_disk_stores.get(key, _MISSING)
+    if store is _MISSING:
+        try:
+            name = f"{_font_file_hash(font_path)[:16]}_{int(font.size)}px_{int(cell_h)}x{int(cell_w)}"
+        except OSError:
+            store = None
+        else:
+            store = _GlyphDiskStore(os.path.join(glyph_disk_cache_dir, name), cell_h, cell_w)
+        _glyph_disk_stores[key] = store
+    return store
+
+def _load_glyph(font, font_path, ch, wide, cell_h, cell_w):
+    """Glyph bitmap from the disk cache, rasterizing (and recording) it on a miss."""
+    if isinstance(font, BitmapFont):
+        return font.bitmap(ch, cell_h, cell_w * (2 if wide else 1))
+    store = _glyph_disk_store(font, font_path, cell_h, cell_w)
+    if store is not None:
+        bmp = store.get(ch, wide)
+        if bmp is not _MISSING:
+            return bmp
+    bmp = _rasterize_glyph(font, ch, cell_h, cell_w * (2 if wide else 1))
+    if store is not None:
+        store.put(ch, wide, bmp)
+    return bmp
+
+def flush_glyph_disk_cache():
+    """Write glyphs rasterized since the last flush to glyph_disk_cache_dir."""
+    for store in _glyph_disk_stores.values():
+        if store is not None:
+            store.flush()
+
+def _close_glyph_disk_stores():
+    flush_glyph_disk_cache()
+    _glyph_disk_stores.clear()
+
+atexit.register(flush_glyph_disk_cache)
+
+# Background prewarm: workers rasterize with their own Font objects (serialized with the main
+# thread's freetype calls by _raster_lock) and publish batches under _prewarm_lock; the main
+# thread merges them into the glyph caches (begin_frame / cache miss).
+_PREWARM_BATCH = 64
+_prewarm_lock = threading.Lock()
+# Held while a FrameSnapshot is rasterized (possibly off the main thread), by every main-thread
+# mutator of the glyph caches, glyph atlas, palette caches and screen_raw, and around every
+# pygame.freetype Font load and render on any thread.
+_raster_lock = threading.RLock()
+_prewarm_results = []
+_prewarm_threads = []
+_font_generation = 0
+
+def _bump_font_generation():
+    """Invalidate in-flight prewarm results (fonts or cell size changed)."""
+    global _font_generation
+    _font_generation += 1
+
+def _glyph_font(wide):
+    if wide and _font_cjk is not None:
+        return _font_cjk, _font_cjk_path
+    return _font_ascii, _font_ascii_path
+
+def _prewarm_worker(jobs, cell_h, cell_w, generation):
+    fonts = {}
+    batch = []
+    for ch, wide, font_path, size_px in jobs:
+        if generation != _font_generation:
+            return
+        font = fonts.get((font_path, size_px))
+        if font is None:
+            with _raster_lock:
+                font = fonts[(font_path, size_px)] = pygame.freetype.Font(font_path, size_px)
+        batch.append((generation, ch, wide, font_path, _rasterize_glyph(font, ch, cell_h, cell_w * (2 if wide else 1))))
+        if len(batch) >= _PREWARM_BATCH:
+            with _prewarm_lock:
+                _prewarm_results.extend(batch)
+            batch = []
+    with _prewarm_lock:
+        _prewarm_results.extend(batch)
+
+def _merge_prewarmed_glyphs():
+    """Move finished prewarm batches into the glyph caches (main thread)."""
+    if not _prewarm_results:
+        return 0
+    # A pipelined raster worker owns the glyph caches while it draws; merge on a later frame.
+    if not _raster_lock.acquire(blocking=False):
+        return 0
+    try:
+        return _merge_prewarmed_batch()
+    finally:
+        _raster_lock.release()
+
+def _merge_prewarmed_batch():
+    with _prewarm_lock:
+        batch = list(_prewarm_results)
+        _prewarm_results.clear()
+    cell_h, cell_w = char_resolution
+    merged = 0
+    for generation, ch, wide, font_path, bmp in batch:
+        if generation != _font_generation:
+            continue
+        span_w = cell_w * (2 if wide else 1)
+        key = (ch, wide, cell_h, cell_w, font_path)
+        if key not in _glyph_cache:
+            _glyph_cache_put(_glyph_cache, key, bmp)
+            merged += 1
+        # Unscaled super text at the grid cell size reads the same bitmap from the custom cache.
+        custom_key = (ch, wide, cell_h, span_w, font_path)
+        if custom_key not in _glyph_cache_custom:
+            _glyph_cache_put(_glyph_cache_custom, custom_key, bmp)
+        font, _ = _glyph_font(wide)
+        store = _glyph_disk_store(font, font_path, cell_h, cell_w)
+        if store is not None and store.get(ch, wide) is _MISSING:
+            store.put(ch, wide, bmp)
+    return merged
+
+def prewarm_glyphs(chars, *, background=True):
+    """Rasterize a declared character set ahead of first use.
+
+    chars is a string or an iterable of strings. With background=True the glyphs are rasterized
+    on a worker thread and merged into the caches at the next begin_frame() (or cache miss), so
+    drawing never waits on freetype; otherwise they are rasterized now. Returns the number of
+    glyphs that were not cached yet.
+    """
+    text = chars if isinstance(chars, str) else "".join(str(c) for c in chars)
+    cell_h, cell_w = char_resolution
+    jobs = []
+    warmed = 0
+    for ch in dict.fromkeys(text):
+        if ch in (" ", WIDE_CONT) or not ch.isprintable():
+            continue
+        wide = _is_wide_char(ch)
+        font, font_path = _glyph_font(wide)
+        if font is None or (ch, wide, cell_h, cell_w, font_path) in _glyph_cache:
+            continue
+        store = _glyph_disk_store(font, font_path, cell_h, cell_w)
+        if (
+            not background
+            or font_path is None
+            or isinstance(font, BitmapFont)
+            or (store is not None and store.get(ch, wide) is not _MISSING)
+        ):
+            with _raster_lock:
+                _get_glyph_bitmap(ch, wide)
+            warmed += 1
+            continue
+        jobs.append((ch, wide, font_path, int(font.size)))
+    if jobs:
+        worker = threading.Thread(
+            target=_prewarm_worker,
+            args=(jobs, cell_h, cell_w, _font_generation),
+            name="gui-glyph-prewarm",
+            daemon=True,
+        )
+        _prewarm_threads[:] = [t for t in _prewarm_threads if t.is_alive()]
+        _prewarm_threads.append(worker)
+        worker.start()
+    return warmed + len(jobs)
+
+def wait_glyph_prewarm(timeout=None):
+    """Block until background prewarm workers finish, then merge their glyphs. True when idle."""
+    deadline = None if timeout is None else time.perf_counter() + float(timeout)
+    for worker in list(_prewarm_threads):
+        worker.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+    _prewarm_threads[:] = [t for t in _prewarm_threads if t.is_alive()]
+    _merge_prewarmed_glyphs()
+    return not _prewarm_threads
+
+def _get_glyph_bitmap(ch, wide):
+    font = _font_cjk if wide and _font_cjk is not None else _font_ascii
+    font_path = _font_cjk_path if wide and _font_cjk_path is not None else _font_ascii_path
+    if font is None:
+        return None
+    key = (ch, wide, char_resolution[0], char_resolution[1], font_path)
+    cached = _glyph_cache_get(_glyph_cache, key)
+    if cached is not _MISSING:
+        return cached
+    if _prewarm_results and _merge_prewarmed_glyphs() and key in _glyph_cache:
+        return _glyph_cache_get(_glyph_cache, key)
+    bmp = _load_glyph(font, font_path, ch, wide, char_resolution[0], char_resolution[1])
+    return _glyph_cache_put(_glyph_cache, key, bmp)
 # endregion
 
 # region coordinate system
@@ -1095,6 +2056,27 @@ def gy(grid_y: float) -> float:
     pad = border_padding_px * PIXEL_SCALE
     return pad + float(grid_y) * eff_h - 0.5 * line_block_spacing_px * PIXEL_SCALE
 
+def gx_array(grid_x):
+    """Vectorized gx(): grid X values (array-like) to absolute pixels as a float array."""
+    _, ch_w = char_resolution
+    eff_w = (ch_w + char_block_spacing_px) * PIXEL_SCALE
+    pad = border_padding_px * PIXEL_SCALE
+    return pad + np.asarray(grid_x, dtype=np.float64) * eff_w - 0.5 * char_block_spacing_px * PIXEL_SCALE
+
+def gy_array(grid_y):
+    """Vectorized gy(): grid Y values (array-like) to absolute pixels as a float array."""
+    ch_h, _ = char_resolution
+    eff_h = (ch_h + line_block_spacing_px) * PIXEL_SCALE
+    pad = border_padding_px * PIXEL_SCALE
+    return pad + np.asarray(grid_y, dtype=np.float64) * eff_h - 0.5 * line_block_spacing_px * PIXEL_SCALE
+
+def grid_to_px_array(gx, gy, ox=0, oy=0):
+    """Vectorized grid_to_px(): returns (px, py) float arrays; arguments broadcast together."""
+    ox = np.asarray(ox, dtype=np.float64) * PIXEL_SCALE
+    oy = np.asarray(oy, dtype=np.float64) * PIXEL_SCALE
+    px, py = np.broadcast_arrays(gx_array(gx) + ox, gy_array(gy) + oy)
+    return px.copy(), py.copy()
+
 def px(pixel_x: float) -> float:
     """Pixel X to grid-space X (inverse mapping of gx)."""
     _, ch_w = char_resolution
@@ -1112,89 +2094,1292 @@ def py(pixel_y: float) -> float:
 # endregion
 
 # region rendering core
+_BLANK_CODEPOINTS = (0, ord(' '), ord(WIDE_CONT))
+
+def _screen_codepoints(grid):
+    """Zero-copy uint32 codepoint view of a '<U1' cell grid."""
+    grid = np.asarray(grid)
+    if grid.dtype != np.dtype('<U1'):
+        grid = grid.astype('<U1')
+    return grid.view(np.uint32)
+
+def _glyph_atlas_id(ch, wide):
+    global _glyph_atlas, _glyph_atlas_count
+    key = (ch, wide)
+    gid = _glyph_atlas_ids.get(key)
+    if gid is not None:
+        return gid
+    bmp = _get_glyph_bitmap(ch, wide)
+    if bmp is None or not bmp.any():
+        _glyph_atlas_ids[key] = 0
+        return 0
+    if _glyph_atlas_count >= _glyph_atlas.shape[0]:
+        grown = np.zeros((_glyph_atlas.shape[0] * 2,) + _glyph_atlas.shape[1:], dtype=np.uint8)
+        grown[: _glyph_atlas.shape[0]] = _glyph_atlas
+        _glyph_atlas = grown
+    gid = _glyph_atlas_count
+    h, w = bmp.shape
+    _glyph_atlas[gid, :h, :w] = bmp != 0
+    _glyph_atlas_count += 1
+    _glyph_atlas_ids[key] = gid
+    return gid
+
+def _glyph_id_grid(codes):
+    """Resolve a codepoint grid to (glyph ids, wide-cell mask) with one lookup per distinct char."""
+    cont = np.zeros(codes.shape, dtype=bool)
+    cont[:, :-1] = codes[:, 1:] == ord(WIDE_CONT)
+    uniq, inverse = np.unique(codes, return_inverse=True)
+    inverse = inverse.reshape(codes.shape)
+    wide_cp = np.array([cp not in _BLANK_CODEPOINTS and _is_wide_char(chr(cp)) for cp in uniq.tolist()], dtype=bool)
+    wide_cell = wide_cp[inverse] & cont
+    narrow_ids = np.zeros(len(uniq), dtype=np.int32)
+    wide_ids = np.zeros(len(uniq), dtype=np.int32)
+    for i in np.unique(inverse[~wide_cell]).tolist():
+        cp = int(uniq[i])
+        if cp not in _BLANK_CODEPOINTS:
+            narrow_ids[i] = _glyph_atlas_id(chr(cp), False)
+    for i in np.unique(inverse[wide_cell]).tolist():
+        wide_ids[i] = _glyph_atlas_id(chr(int(uniq[i])), True)
+    gid = np.where(wide_cell, wide_ids[inverse], narrow_ids[inverse])
+    return gid, wide_cell
+
+# (glyph ids, right-half glyph ids) of the last render(); screen_raw lags them while _screen_raw_pending.
+_band_glyph_ids = None
+_screen_raw_pending = False
+# Copy of the cell grid the last render() resolved, so atlas-based paths can detect a stale render.
+_rendered_screen = None
+
 def render(screen, screen_color=None):
+    """Rasterize the cell grid into screen_raw with one gather from the glyph atlas.
+
+    With rasterizer="bands" only the glyph ids are resolved; band workers gather from the shared
+    atlas themselves and screen_raw is filled on demand by _ensure_screen_raw().
+    """
+    global _glyph_atlas_resets, _band_glyph_ids, _screen_raw_pending, _rendered_screen
+    if glyph_cache_max_entries and _glyph_atlas_count > glyph_cache_max_entries:
+        # Ids are only stable within one call, so the bounded atlas is rebuilt between frames.
+        _reset_glyph_atlas()
+        _glyph_atlas_resets += 1
+    gid, wide_cell = _glyph_id_grid(_screen_codepoints(screen))
+    # The continuation cell of a wide glyph shows the right half of its lead's atlas slot.
+    gid_right = np.zeros_like(gid)
+    gid_right[:, 1:] = np.where(wide_cell[:, :-1], gid[:, :-1], 0)
+    _band_glyph_ids = (gid, gid_right)
+    _screen_raw_pending = True
+    if _rendered_screen is None or _rendered_screen.shape != screen.shape or _rendered_screen.dtype != screen.dtype:
+        _rendered_screen = np.empty_like(screen)
+    np.copyto(_rendered_screen, screen)
+    if rasterizer != "bands":
+        _ensure_screen_raw()
+
+def _ensure_rendered(screen):
+    """Re-run render() when the last one resolved a different grid (text drawn without render())."""
+    if _band_glyph_ids is None or _rendered_screen is None or not np.array_equal(_rendered_screen, screen):
+        render(screen)
+
+def _ensure_screen_raw():
+    """Run the screen_raw gather deferred by render()."""
+    global _screen_raw_pending
+    if not _screen_raw_pending:
+        return
+    _screen_raw_pending = False
+    gid, gid_right = _band_glyph_ids
     cols, rows = row_column_resolution
     ch_h, ch_w = char_resolution
-    screen_raw.fill(0)
-    for row in range(rows):
-        col = 0
-        while col < cols:
-            ch = screen[row][col]
-            if ch == WIDE_CONT:
-                col += 1
-                continue
-            if ch == ' ' or ch == '':
-                col += 1
-                continue
-            wide = _is_wide_char(ch) and col + 1 < cols and screen[row][col + 1] == WIDE_CONT
-            bmp = _get_glyph_bitmap(ch, wide)
-            if bmp is not None:
-                y_start, x_start = row * ch_h, col * ch_w
-                h, w = bmp.shape
-                screen_raw[y_start : y_start + h, x_start : x_start + w] = bmp
-            col += 2 if wide else 1
+    atlas = _glyph_atlas[:_glyph_atlas_count]
+    blocks = atlas[gid, :, :ch_w] | atlas[gid_right, :, ch_w:]
+    screen_raw[:, :] = blocks.transpose(0, 2, 1, 3).reshape(rows * ch_h, cols * ch_w)
+
+class _LineBuffer:
+    """Reusable segment command buffer with rows of (x1, y1, x2, y2, color index, thickness).
+
+    List-compatible (append/extend/clear/len/iter/indexing) for existing callers. Storage grows by
+    doubling and is kept across frames, so steady-state frames do not allocate. Each row also
+    carries a clip id (0 = unclipped, see push_clip_rect()).
+    """
+
+    _ROW = struct.Struct("6d")
+
+    def __init__(self, capacity=256):
+        self._data = np.zeros((int(capacity), 6), dtype=np.float64)
+        self._bytes = memoryview(self._data).cast("B")
+        self._clips = np.zeros(int(capacity), dtype=np.int32)
+        self._clipped = False
+        self._count = 0
+        self.peak = 0
+
+    def _reserve(self, extra):
+        need = self._count + extra
+        if need > self._data.shape[0]:
+            size = max(need, self._data.shape[0] * 2)
+            grown = np.zeros((size, 6), dtype=np.float64)
+            grown[: self._count] = self._data[: self._count]
+            self._data = grown
+            self._bytes = memoryview(grown).cast("B")
+            clips = np.zeros(size, dtype=np.int32)
+            clips[: self._count] = self._clips[: self._count]
+            self._clips = clips
+
+    def _set_clips(self, start, end, clip):
+        if clip.any() if isinstance(clip, np.ndarray) else clip:
+            self._clips[start:end] = clip
+            self._clipped = True
+
+    def append(self, item, clip=0):
+        if self._count >= self._data.shape[0]:
+            self._reserve(1)
+        # struct.pack_into on a byte view is several times cheaper than ndarray row assignment.
+        self._ROW.pack_into(self._bytes, self._count * 48, *item)
+        if clip:
+            self._clips[self._count] = clip
+            self._clipped = True
+        self._count += 1
+
+    def extend(self, items, clip=0):
+        """Append rows; clip is one clip id for all rows or one per row."""
+        rows = np.asarray(items, dtype=np.float64).reshape(-1, 6)
+        self._reserve(len(rows))
+        self._data[self._count : self._count + len(rows)] = rows
+        self._set_clips(self._count, self._count + len(rows), clip)
+        self._count += len(rows)
+
+    def extend_edges(self, edges, dx, dy, c, t, clip=0):
+        """Append (N, 4) segment coordinates translated by (dx, dy), all with one color and thickness."""
+        n = len(edges)
+        self._reserve(n)
+        block = self._data[self._count : self._count + n]
+        np.add(edges, (dx, dy, dx, dy), out=block[:, :4])
+        block[:, 4] = c
+        block[:, 5] = t
+        self._set_clips(self._count, self._count + n, clip)
+        self._count += n
+
+    def clear(self):
+        self.peak = max(self.peak, self._count)
+        if self._clipped:
+            self._clips[: self._count] = 0
+            self._clipped = False
+        self._count = 0
+
+    def copy_from(self, other):
+        """Replace the contents with other's segments and clip ids, reusing this buffer's storage."""
+        self.clear()
+        clips = other.clip_ids
+        self.extend(other.array, 0 if clips is None else clips)
+
+    def digest(self):
+        """Bulk hash of the queued segments and clip ids (equal digests mean equal contents)."""
+        h = hashlib.blake2b(self._data[: self._count].tobytes(), digest_size=16)
+        if self._clipped:
+            h.update(self._clips[: self._count].tobytes())
+        return h.digest()
+
+    @property
+    def clip_ids(self):
+        """Per-row clip ids, or None when nothing queued is clipped."""
+        return self._clips[: self._count] if self._clipped else None
+
+    @property
+    def array(self):
+        """(N, 6) float64 view of the queued segments (valid until the next append)."""
+        return self._data[: self._count]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for x1, y1, x2, y2, c, t in self._data[: self._count].tolist():
+            yield (x1, y1, x2, y2, int(c), t)
+
+    def __getitem__(self, index):
+        x1, y1, x2, y2, c, t = self.array[index].tolist()
+        return (x1, y1, x2, y2, int(c), t)
+
+    def stats(self):
+        return {"count": self._count, "capacity": int(self._data.shape[0]), "peak": max(self.peak, self._count)}
+
+class _PolyBuffer:
+    """Reusable filled-polygon command buffer: packed vertices, per-polygon offsets and colors.
+
+    Iterates as (vertices, color index) like the list it replaces.
+    """
 
-line_queue = []
-fillpoly_queue = []
+    def __init__(self, capacity=64, vertex_capacity=512):
+        self._vertices = np.zeros((int(vertex_capacity), 2), dtype=np.float64)
+        self._offsets = np.zeros(int(capacity) + 1, dtype=np.int64)
+        self._colors = np.zeros(int(capacity), dtype=np.int64)
+        self._clips = np.zeros(int(capacity), dtype=np.int32)
+        self._clipped = False
+        self._count = 0
+        self.peak = 0
+
+    def _grow(self, n):
+        if self._count + n >= self._offsets.shape[0]:
+            size = max(self._count + n, self._colors.shape[0] * 2)
+            offsets = np.zeros(size + 1, dtype=np.int64)
+            offsets[: self._count + 1] = self._offsets[: self._count + 1]
+            colors = np.zeros(size, dtype=np.int64)
+            colors[: self._count] = self._colors[: self._count]
+            clips = np.zeros(size, dtype=np.int32)
+            clips[: self._count] = self._clips[: self._count]
+            self._offsets, self._colors, self._clips = offsets, colors, clips
+
+    def append(self, item, offset=None, clip=0):
+        """Queue (vertices, color index); offset=(dx, dy) translates the vertices while copying them in."""
+        verts, c = item
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 2)
+        start = int(self._offsets[self._count])
+        end = start + len(verts)
+        if end > self._vertices.shape[0]:
+            grown = np.zeros((max(end, self._vertices.shape[0] * 2), 2), dtype=np.float64)
+            grown[:start] = self._vertices[:start]
+            self._vertices = grown
+        if self._count + 1 >= self._offsets.shape[0]:
+            self._grow(1)
+        if offset is None:
+            self._vertices[start:end] = verts
+        else:
+            np.add(verts, offset, out=self._vertices[start:end])
+        self._colors[self._count] = int(c)
+        if clip:
+            self._clips[self._count] = clip
+            self._clipped = True
+        self._count += 1
+        self._offsets[self._count] = end
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def copy_from(self, other):
+        """Replace the contents with other's polygons and clip ids, reusing this buffer's storage."""
+        self.clear()
+        n = other._count
+        nv = int(other._offsets[n])
+        if nv > self._vertices.shape[0]:
+            self._vertices = np.zeros((max(nv, self._vertices.shape[0] * 2), 2), dtype=np.float64)
+        self._grow(n)
+        self._vertices[:nv] = other._vertices[:nv]
+        self._offsets[: n + 1] = other._offsets[: n + 1]
+        self._colors[:n] = other._colors[:n]
+        if other._clipped:
+            self._clips[:n] = other._clips[:n]
+            self._clipped = True
+        self._count = n
+
+    def extend_uniform(self, verts, colors, clip=0):
+        """Append N polygons with the same vertex count from an (N, V, 2) array and N color indices."""
+        verts = np.asarray(verts, dtype=np.float64)
+        n, v = verts.shape[0], verts.shape[1]
+        if n == 0:
+            return
+        start = int(self._offsets[self._count])
+        end = start + n * v
+        if end > self._vertices.shape[0]:
+            grown = np.zeros((max(end, self._vertices.shape[0] * 2), 2), dtype=np.float64)
+            grown[:start] = self._vertices[:start]
+            self._vertices = grown
+        self._grow(n)
+        self._vertices[start:end] = verts.reshape(-1, 2)
+        self._colors[self._count : self._count + n] = colors
+        if clip.any() if isinstance(clip, np.ndarray) else clip:
+            self._clips[self._count : self._count + n] = clip
+            self._clipped = True
+        self._offsets[self._count + 1 : self._count + n + 1] = start + v * np.arange(1, n + 1)
+        self._count += n
+
+    def clear(self):
+        self.peak = max(self.peak, self._count)
+        if self._clipped:
+            self._clips[: self._count] = 0
+            self._clipped = False
+        self._count = 0
+
+    def digest(self):
+        """Bulk hash of the queued vertices, offsets, colors and clip ids."""
+        n = self._count
+        h = hashlib.blake2b(self._vertices[: int(self._offsets[n])].tobytes(), digest_size=16)
+        h.update(self._offsets[: n + 1].tobytes())
+        h.update(self._colors[:n].tobytes())
+        if self._clipped:
+            h.update(self._clips[:n].tobytes())
+        return h.digest()
+
+    @property
+    def clip_ids(self):
+        """Per-polygon clip ids, or None when nothing queued is clipped."""
+        return self._clips[: self._count] if self._clipped else None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        offsets = self._offsets[: self._count + 1].tolist()
+        verts = self._vertices[: offsets[-1]].tolist()
+        for i, c in enumerate(self._colors[: self._count].tolist()):
+            yield ([tuple(v) for v in verts[offsets[i] : offsets[i + 1]]], c)
+
+    def __getitem__(self, index):
+        index = range(self._count)[index]
+        start, end = self._offsets[index : index + 2].tolist()
+        return ([tuple(v) for v in self._vertices[start:end].tolist()], int(self._colors[index]))
+
+    def stats(self):
+        return {
+            "count": self._count,
+            "capacity": int(self._colors.shape[0]),
+            "vertices": int(self._offsets[self._count]),
+            "vertex_capacity": int(self._vertices.shape[0]),
+            "peak": max(self.peak, self._count),
+        }
+
+class _ItemQueue(list):
+    """Overlay item list with a clip id per item (0 = unclipped), tracked only once one is clipped."""
+
+    def __init__(self):
+        super().__init__()
+        self._clips = []
+
+    def append(self, item, clip=0):
+        super().append(item)
+        if clip or self._clips:
+            self._clips.extend([0] * (len(self) - 1 - len(self._clips)))
+            self._clips.append(clip)
+
+    def clear(self):
+        super().clear()
+        self._clips.clear()
+
+    def copy_from(self, other):
+        """Replace the contents with other's items and clip ids."""
+        self[:] = other
+        self._clips[:] = other._clips
+
+    def digest(self):
+        """Bulk hash of the queued item tuples and clip ids (equal digests mean equal contents).
+
+        Items are plain tuples of numbers and strings, so their pickle is an exact serialization;
+        hash() is not (hash(-1) == hash(-2)).
+        """
+        data = pickle.dumps((tuple(self), self._clips), pickle.HIGHEST_PROTOCOL)
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    @property
+    def clip_ids(self):
+        """Per-item clip ids, or None when nothing queued is clipped."""
+        if not self._clips:
+            return None
+        return self._clips + [0] * (len(self) - len(self._clips))
+
+line_queue = _LineBuffer()
+fillpoly_queue = _PolyBuffer()
+# Raster-mode hatch fills: (vertices, spacing_px, angle_deg, thickness, offset_px, color index).
+pattern_queue = _ItemQueue()
+
+# Clip stack: present-space (x0, y0, x1, y1) rects; queued items refer to them by id until reset_overlays().
+_clip_table = [None]
+_clip_stack = []
+_window_clip = None  # present-surface bounds, recomputed after geometry changes
+_cull_stats = {"culled": 0, "clipped": 0}
+
+def push_clip_rect(x_px, y_px, w_px, h_px):
+    """Restrict subsequent overlay draws to a pixel rect (intersected with the active clip).
+
+    Items fully outside are dropped when queued; partially visible ones are drawn through
+    Surface.set_clip. The stack is per frame: reset_overlays() empties it.
+    Returns the effective rect as (x, y, w, h).
+    """
+    x0, y0 = int(np.floor(float(x_px))), int(np.floor(float(y_px)))
+    x1, y1 = int(np.ceil(float(x_px) + float(w_px))), int(np.ceil(float(y_px) + float(h_px)))
+    px0, py0, px1, py1 = _active_clip_bounds()
+    x0, y0 = max(x0, px0), max(y0, py0)
+    x1, y1 = max(x0, min(x1, px1)), max(y0, min(y1, py1))
+    _clip_table.append((x0, y0, x1, y1))
+    _clip_stack.append(len(_clip_table) - 1)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def pop_clip_rect():
+    """Drop the innermost clip rect; returns it as (x, y, w, h), or None when the stack is empty."""
+    if not _clip_stack:
+        return None
+    x0, y0, x1, y1 = _clip_table[_clip_stack.pop()]
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def get_clip_rect():
+    """Active clip as (x, y, w, h); the whole present surface when no clip is pushed."""
+    x0, y0, x1, y1 = _active_clip_bounds()
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def _active_clip_bounds():
+    global _window_clip
+    if _clip_stack:
+        return _clip_table[_clip_stack[-1]]
+    if _window_clip is None:
+        w, h = get_present_size_px()
+        _window_clip = (0, 0, w, h)
+    return _window_clip
+
+def _clip_for(x0, y0, x1, y1):
+    """Clip id for an item with these present-space bounds; None when it is fully clipped away."""
+    cid = _clip_stack[-1] if _clip_stack else 0
+    cx0, cy0, cx1, cy1 = _active_clip_bounds()
+    if x1 < cx0 or y1 < cy0 or x0 >= cx1 or y0 >= cy1:
+        _cull_stats["culled"] += 1
+        return None
+    if cid and (x0 < cx0 or y0 < cy0 or x1 > cx1 or y1 > cy1):
+        _cull_stats["clipped"] += 1
+        return cid
+    # Fully inside (or only past the window edge, which the target surface clips anyway).
+    return 0
+
+def _clip_for_array(x0, y0, x1, y1):
+    """Vectorized _clip_for(): (keep mask, clip ids of the kept items)."""
+    cid = _clip_stack[-1] if _clip_stack else 0
+    cx0, cy0, cx1, cy1 = _active_clip_bounds()
+    keep = ~((x1 < cx0) | (y1 < cy0) | (x0 >= cx1) | (y0 >= cy1))
+    _cull_stats["culled"] += int(len(keep) - np.count_nonzero(keep))
+    if not cid:
+        return keep, 0
+    partial = ((x0 < cx0) | (y0 < cy0) | (x1 > cx1) | (y1 > cy1))[keep]
+    _cull_stats["clipped"] += int(np.count_nonzero(partial))
+    return keep, np.where(partial, cid, 0).astype(np.int32)
+
+def _line_pad(thickness):
+    return float(thickness) * PIXEL_SCALE + 1.0
+
+def _clip_raster_rect(cid, base, table=None):
+    """Queued clip id as a raster-space rect, intersected with the surface's base clip."""
+    x0, y0, x1, y1 = (_clip_table if table is None else table)[cid]
+    div = _raster_div()
+    return base.clip(pygame.Rect(x0 // div, y0 // div, -(-x1 // div) - x0 // div, -(-y1 // div) - y0 // div))
+
+def _item_clips(items, clips):
+    if clips is None:
+        clips = getattr(items, "clip_ids", None)
+    return clips.tolist() if isinstance(clips, np.ndarray) else clips
+
+def get_overlay_queue_stats():
+    """Current size, capacity and peak of the overlay command queues (for profiling)."""
+    return {
+        "lines": line_queue.stats(),
+        "fillpolys": fillpoly_queue.stats(),
+        "super_text": {"count": len(super_text_queue)},
+        "patterns": {"count": len(pattern_queue)},
+        "culling": {**_cull_stats, "clip_depth": len(_clip_stack)},
+        "hatch_cache": _hatch_cache.stats(),
+        "pattern_tiles": _pattern_tile_cache.stats(),
+        "pattern_surfaces": _pattern_surface_cache.stats(),
+    }
 
 def reset_overlays():
     line_queue.clear()
     fillpoly_queue.clear()
     super_text_queue.clear()
-
-def draw_to_surface(surface):
-    surface.fill(_LAYOUT_MODE_BG_RGB if _LAYOUT_MODE_ENABLED else window_bg_color_rgb)
-    for item in fillpoly_queue:
-        v, c = item
-        pygame.draw.polygon(surface, get_color_rgb(c), v)
+    pattern_queue.clear()
+    del _clip_table[1:]
+    _clip_stack.clear()
+    _cull_stats.update(culled=0, clipped=0)
+
+def _grid_arrays(grid):
+    """(screen, screen_color) to draw: the live grid, or a snapshot's copies."""
+    return (screen, screen_color) if grid is None else grid
+
+def _get_glyph_sprite(ch, wide, c_idx):
+    """Return a pre-colored, raster-scale glyph surface (None for blank glyphs)."""
+    key = (ch, wide, c_idx, _raster_scale)
+    cached = _glyph_sprite_cache.lookup(key)
+    if cached is not _MISSING:
+        return cached
+    bmp = _get_glyph_bitmap(ch, wide)
+    if bmp is None or not bmp.any():
+        _glyph_sprite_cache[key] = None
+        return None
+    mask = bmp != 0
+    if _raster_scale > 1:
+        mask = np.repeat(np.repeat(mask, _raster_scale, axis=0), _raster_scale, axis=1)
+    h, w = mask.shape
+    rgb = get_color_rgb(c_idx)
+    key_rgb = (0, 0, 0) if rgb != (0, 0, 0) else (255, 255, 255)
+    sprite = pygame.Surface((w, h))
+    sprite.fill(key_rgb)
+    pixels = pygame.surfarray.pixels3d(sprite)
+    pixels[mask.T] = rgb
+    del pixels
+    sprite.set_colorkey(key_rgb, pygame.RLEACCEL)
+    _glyph_sprite_cache[key] = sprite
+    return sprite
+
+def _draw_text_layer(surface, cells=None, grid=None):
+    """Blit glyph sprites for all cells, or for the (row0, row1, col0, col1) window in cells."""
+    screen, screen_color = _grid_arrays(grid)
+    cols, rows = row_column_resolution
+    eff_w = (char_resolution[1] + char_block_spacing_px) * _raster_scale
+    eff_h = (char_resolution[0] + line_block_spacing_px) * _raster_scale
+    pad = border_padding_px * _raster_scale
+    r0, r1, c0, c1 = (0, rows, 0, cols) if cells is None else cells
+    window = screen[r0:r1, c0:c1]
+    lit = (window != ' ') & (window != WIDE_CONT) & (window != '')
+    batch = []
+    for r, c in zip(*np.nonzero(lit)):
+        r = int(r) + r0
+        c = int(c) + c0
+        ch = screen[r][c]
+        wide = _is_wide_char(ch) and c + 1 < cols and screen[r][c + 1] == WIDE_CONT
+        sprite = _get_glyph_sprite(ch, wide, int(screen_color[r][c]))
+        if sprite is not None:
+            batch.append((sprite, (pad + c * eff_w, pad + r * eff_h)))
+    if batch:
+        surface.blits(batch, doreturn=False)
+
+_text_layer_maps = {}
+
+def _text_layer_target_maps():
+    """Map screen_raw rows/cols to native text-layer pixels (spacing gaps inserted)."""
     cols, rows = row_column_resolution
     ch_h, ch_w = char_resolution
-    eff_w = (ch_w + char_block_spacing_px) * PIXEL_SCALE
-    eff_h = (ch_h + line_block_spacing_px) * PIXEL_SCALE
-    pad = border_padding_px * PIXEL_SCALE
-    for r in range(rows):
-        y_pos = pad + r * eff_h
-        for c in range(cols):
-            ch = screen[r][c]
-            if ch == WIDE_CONT:
-                continue
-            span = 2 if (_is_wide_char(ch) and c + 1 < cols and screen[r][c + 1] == WIDE_CONT) else 1
-            x_pos = pad + c * eff_w
-            raw_y, raw_x = r * ch_h, c * ch_w
-            span_w = ch_w * span
-            glyph_block = screen_raw[raw_y : raw_y + ch_h, raw_x : raw_x + span_w]
-            if not glyph_block.any():
-                continue
-            rgb = get_color_rgb(int(screen_color[r][c]))
-            for py in range(ch_h):
-                lit_px = np.flatnonzero(glyph_block[py])
-                if lit_px.size == 0:
-                    continue
-                for px in lit_px:
-                    surface.fill(rgb, (x_pos + px * PIXEL_SCALE, y_pos + py * PIXEL_SCALE, PIXEL_SCALE, PIXEL_SCALE))
-    for item in line_queue:
-        x1, y1, x2, y2, c, t = item
-        thickness = max(1, int(round(float(t) * PIXEL_SCALE)))
-        pygame.draw.line(surface, get_color_rgb(c), (x1, y1), (x2, y2), thickness)
-    for item in super_text_queue:
-        x_px, y_px, bmp, c_idx, scale = item
+    key = (rows, cols, ch_h, ch_w, char_block_spacing_px, line_block_spacing_px)
+    if _text_layer_maps.get("key") != key:
+        raw_x = np.arange(cols * ch_w)
+        raw_y = np.arange(rows * ch_h)
+        _text_layer_maps["key"] = key
+        _text_layer_maps["tx"] = (raw_x // ch_w) * (ch_w + char_block_spacing_px) + raw_x % ch_w
+        _text_layer_maps["ty"] = (raw_y // ch_h) * (ch_h + line_block_spacing_px) + raw_y % ch_h
+        _text_layer_maps["shape"] = (rows * (ch_h + line_block_spacing_px), cols * (ch_w + char_block_spacing_px))
+    return _text_layer_maps["tx"], _text_layer_maps["ty"], _text_layer_maps["shape"]
+
+def _compose_text_layer(grid=None):
+    """Compose the text grid as (lit mask, palette index) arrays at native cell resolution.
+
+    Both arrays are (height, width) including spacing gaps. Wide glyphs stay contiguous, so the
+    continuation half is pulled left over the inter-cell gap exactly like the sprite path.
+    """
+    screen, screen_color = _grid_arrays(grid)
+    _ensure_rendered(screen)
+    _ensure_screen_raw()
+    ch_h, ch_w = char_resolution
+    tx, ty, shape = _text_layer_target_maps()
+    cont = screen == WIDE_CONT
+    cell_color = screen_color.copy()
+    cell_color[:, 1:][cont[:, 1:]] = screen_color[:, :-1][cont[:, 1:]]
+    tx_rows = tx[None, :] - np.repeat(cont, ch_w, axis=1) * char_block_spacing_px
+    tx_full = np.repeat(tx_rows, ch_h, axis=0)
+    ty_full = ty[:, None]
+    mask = np.zeros(shape, dtype=bool)
+    colors = np.zeros(shape, dtype=np.uint8)
+    mask[ty_full, tx_full] = screen_raw != 0
+    colors[ty_full, tx_full] = np.repeat(np.repeat(cell_color, ch_h, axis=0), ch_w, axis=1)
+    return mask, colors
+
+def _palette_rgb_table():
+    if _LAYOUT_MODE_ENABLED:
+        return np.tile(np.array(_LAYOUT_MODE_FG_RGB, dtype=np.uint8), (len(_palette_rgb_cache), 1))
+    return _palette_rgb_cache
+
+def get_surface_palette():
+    """256 RGB entries uploaded to indexed surfaces (INDEXED_BG_INDEX holds the background)."""
+    table = [tuple(int(v) for v in rgb) for rgb in _palette_rgb_table()[:256]]
+    table += [(0, 0, 0)] * (256 - len(table))
+    table[INDEXED_BG_INDEX] = tuple(_LAYOUT_MODE_BG_RGB if _LAYOUT_MODE_ENABLED else window_bg_color_rgb)
+    return table
+
+def create_render_surface(size=None):
+    """Offscreen target for draw_to_surface(): 8-bit paletted when color_mode == "indexed".
+
+    With rasterizer="bands" the RGB surface wraps a shared-memory framebuffer the band workers
+    write into directly.
+    """
+    size = tuple(size) if size is not None else get_render_size_px()
+    if color_mode != "indexed" and rasterizer == "bands":
+        return _create_band_target(size)
+    if color_mode != "indexed":
+        return pygame.Surface(size)
+    surface = pygame.Surface(size, depth=8)
+    surface.set_palette(get_surface_palette())
+    return surface
+
+def _is_indexed_target(surface):
+    return color_mode == "indexed" and surface.get_bitsize() == 8
+
+def _draw_text_layer_indexed(surface, rect=None, layer=None, grid=None):
+    """Write palette indices of the text layer through pixels2d, optionally limited to rect."""
+    mask, colors = _compose_text_layer(grid) if layer is None else layer
+    scale = _raster_scale
+    pad = border_padding_px * scale
+    area = pygame.Rect(pad, pad, mask.shape[1] * scale, mask.shape[0] * scale).clip(surface.get_rect())
+    if rect is not None:
+        area = area.clip(rect)
+    if area.width <= 0 or area.height <= 0:
+        return
+    lx0 = (area.left - pad) // scale
+    lx1 = (area.right - pad - 1) // scale + 1
+    ly0 = (area.top - pad) // scale
+    ly1 = (area.bottom - pad - 1) // scale + 1
+    lit = mask[ly0:ly1, lx0:lx1]
+    if not lit.any():
+        return
+    idx = colors[ly0:ly1, lx0:lx1]
+    if scale > 1:
+        lit = np.repeat(np.repeat(lit, scale, axis=0), scale, axis=1)
+        idx = np.repeat(np.repeat(idx, scale, axis=0), scale, axis=1)
+    ox = area.left - (pad + lx0 * scale)
+    oy = area.top - (pad + ly0 * scale)
+    lit = lit[oy : oy + area.height, ox : ox + area.width].T
+    idx = idx[oy : oy + area.height, ox : ox + area.width].T
+    pixels = pygame.surfarray.pixels2d(surface)
+    pixels[area.left : area.right, area.top : area.bottom][lit] = _indexed_color_lut[idx[lit]]
+    del pixels
+
+def _draw_text_layer_numpy(surface, grid=None):
+    mask, colors = _compose_text_layer(grid)
+    if _raster_scale > 1:
+        mask = np.repeat(np.repeat(mask, _raster_scale, axis=0), _raster_scale, axis=1)
+        colors = np.repeat(np.repeat(colors, _raster_scale, axis=0), _raster_scale, axis=1)
+    pad = border_padding_px * _raster_scale
+    surf_w, surf_h = surface.get_size()
+    h = max(0, min(mask.shape[0], surf_h - pad))
+    w = max(0, min(mask.shape[1], surf_w - pad))
+    if h == 0 or w == 0:
+        return
+    lit = mask[:h, :w].T
+    if not lit.any():
+        return
+    pixels = pygame.surfarray.pixels3d(surface)
+    pixels[pad : pad + w, pad : pad + h][lit] = _palette_rgb_table()[colors[:h, :w].T[lit]]
+    del pixels
+
+# Band worker pool (created on first use) and the shared framebuffer behind each band target surface.
+_band_rasterizer = None
+_band_targets = weakref.WeakKeyDictionary()
+
+def _get_band_rasterizer():
+    global _band_rasterizer
+    from core.GUIBands import BandRasterizer
+
+    workers = raster_workers or os.cpu_count() or 1
+    if _band_rasterizer is not None and _band_rasterizer.workers != workers:
+        close_band_rasterizer()
+    if _band_rasterizer is None:
+        _band_rasterizer = BandRasterizer(workers)
+    return _band_rasterizer
+
+def close_band_rasterizer():
+    """Stop the band worker processes and free their shared memory (surfaces from them fall back to numpy)."""
+    global _band_rasterizer
+    pool, _band_rasterizer = _band_rasterizer, None
+    if pool is not None:
+        pool.close()
+
+atexit.register(close_band_rasterizer)
+
+def _create_band_target(size):
+    pool = _get_band_rasterizer()
+    block = pool.create_target(size)
+    surface = pygame.image.frombuffer(block.shm.buf, size, "RGB")
+    _band_targets[surface] = block
+    weakref.finalize(surface, pool.release_target, block)
+    return surface
+
+def _draw_text_layer_bands(surface, grid=None):
+    """Text layer via the band workers; False when surface is not a live band target or the pool failed."""
+    block = _band_targets.get(surface)
+    pool = _band_rasterizer
+    if block is None or pool is None or not pool.owns(block):
+        return False
+    screen, screen_color = _grid_arrays(grid)
+    _ensure_rendered(screen)
+    cont = screen == WIDE_CONT
+    cell_color = screen_color.copy()
+    cell_color[:, 1:][cont[:, 1:]] = screen_color[:, :-1][cont[:, 1:]]
+    gid, gid_right = _band_glyph_ids
+    ch_h, ch_w = char_resolution
+    params = (ch_h, ch_w, char_block_spacing_px, line_block_spacing_px, border_padding_px * _raster_scale, _raster_scale)
+    try:
+        pool.rasterize(
+            block,
+            _glyph_atlas,
+            _glyph_atlas_count,
+            _glyph_atlas_generation,
+            gid,
+            gid_right,
+            cell_color,
+            cont,
+            _palette_rgb_table(),
+            params,
+        )
+    except RuntimeError:
+        # A worker died or hung: drop the pool; this frame and its targets fall back to numpy.
+        close_band_rasterizer()
+        return False
+    return True
+
+def _surface_color(c, indexed):
+    """Draw color for a target: palette index on indexed surfaces, RGB otherwise."""
+    return int(_indexed_color_lut[_resolve_color(c)]) if indexed else get_color_rgb(c)
+
+def _surface_bg(indexed):
+    if indexed:
+        return INDEXED_BG_INDEX
+    return _LAYOUT_MODE_BG_RGB if _LAYOUT_MODE_ENABLED else window_bg_color_rgb
+
+def _raster_div():
+    """Divisor from present-space pixel coordinates (queues) to the raster surface."""
+    return PIXEL_SCALE // _raster_scale
+
+def _draw_fillpolys(surface, items, indexed=False, clips=None, clip_table=None):
+    div = _raster_div()
+    colors = {}
+    clips = _item_clips(items, clips)
+    base, cur = surface.get_clip() if clips is not None else None, 0
+    for i, item in enumerate(items):
+        if clips is not None and clips[i] != cur:
+            cur = clips[i]
+            surface.set_clip(_clip_raster_rect(cur, base, clip_table) if cur else base)
+        v, c = item
+        if div > 1:
+            v = [(x / div, y / div) for x, y in v]
+        color = colors.get(c)
+        if color is None:
+            color = colors[c] = _surface_color(c, indexed)
+        pygame.draw.polygon(surface, color, v)
+    if cur:
+        surface.set_clip(base)
+
+def _draw_lines(surface, items, indexed=False, clips=None, clip_table=None):
+    """Draw queued segments in submission order; connected same-style runs go through draw.lines."""
+    segs = items.array if isinstance(items, _LineBuffer) else np.asarray(items, dtype=np.float64).reshape(-1, 6)
+    n = len(segs)
+    if n == 0:
+        return
+    if clips is None:
+        clips = getattr(items, "clip_ids", None)
+    pts = segs[:, :4] / _raster_div()
+    colors = segs[:, 4].astype(np.int64)
+    thick = np.maximum(1, np.round(segs[:, 5] * _raster_scale)).astype(np.int64)
+    joined = (
+        (colors[1:] == colors[:-1])
+        & (thick[1:] == thick[:-1])
+        & (pts[1:, 0] == pts[:-1, 2])
+        & (pts[1:, 1] == pts[:-1, 3])
+    )
+    if clips is not None:
+        clips = np.asarray(clips)
+        joined &= clips[1:] == clips[:-1]
+        clips = clips.tolist()
+    starts = np.flatnonzero(np.concatenate(([True], ~joined))).tolist()
+    ends = starts[1:] + [n]
+    plist = pts.tolist()
+    clist = colors.tolist()
+    tlist = thick.tolist()
+    palette = {}
+    base, cur = surface.get_clip() if clips is not None else None, 0
+    for start, end in zip(starts, ends):
+        if clips is not None and clips[start] != cur:
+            cur = clips[start]
+            surface.set_clip(_clip_raster_rect(cur, base, clip_table) if cur else base)
+        c = clist[start]
+        color = palette.get(c)
+        if color is None:
+            color = palette[c] = _surface_color(c, indexed)
+        x1, y1, x2, y2 = plist[start]
+        if end - start == 1:
+            pygame.draw.line(surface, color, (x1, y1), (x2, y2), tlist[start])
+            continue
+        path = [(x1, y1)] + [(row[2], row[3]) for row in plist[start:end]]
+        closed = path[-1] == path[0]
+        if closed:
+            path.pop()
+        pygame.draw.lines(surface, color, closed, path, tlist[start])
+    if cur:
+        surface.set_clip(base)
+
+def _text_run_bitmap(run):
+    """Compose the glyph bitmaps of one super-text line into a single (h, w) bitmap.
+
+    run[5] names a built-in bitmap font (mode="5x7"); characters it lacks fall back to the grid font.
+    """
+    line, cell_w, cell_h, w, h, font_name = run
+    font = None if font_name is None else get_builtin_bitmap_font(font_name)
+    bmp = np.zeros((h, w), dtype=np.uint8)
+    x = 0
+    for raw_char in line:
+        char = _normalize_cell_char(raw_char)
+        if char == WIDE_CONT:
+            char = " "
+        wide = _is_wide_char(char)
+        glyph = None
+        if font is not None and char in font.index:
+            glyph = font.bitmap(char, cell_h, cell_w * (2 if wide else 1))
+        else:
+            glyph = _get_glyph_bitmap_custom(char, wide, cell_w, cell_h)
+        if glyph is not None:
+            gh, gw = glyph.shape
+            gw = min(gw, w - x)
+            bmp[: min(gh, h), x : x + gw] = glyph[:h, :gw]
+        x += cell_w * (2 if wide else 1)
+    return bmp
+
+def _mask_surface(mask, c_idx, indexed):
+    """Colorkeyed surface painting c_idx where the (h, w) bool mask is set."""
+    h, w = mask.shape
+    if indexed:
+        color = int(_indexed_color_lut[_resolve_color(c_idx)])
+        key_idx = 0 if color != 0 else 1
+        surf = pygame.Surface((w, h), 0, 8)
+        surf.set_palette(get_surface_palette())
+        pixels = pygame.surfarray.pixels2d(surf)
+        pixels[...] = np.where(mask.T, color, key_idx)
+        del pixels
+        surf.set_colorkey(key_idx, pygame.RLEACCEL)
+    else:
         rgb = get_color_rgb(c_idx)
-        h, w = bmp.shape
-        px_scale = max(1, int(round(float(scale) * PIXEL_SCALE)))
-        for py in range(h):
-            lit_px = np.flatnonzero(bmp[py])
-            if lit_px.size == 0:
-                continue
-            for px in lit_px:
-                surface.fill(
-                    rgb,
-                    (
-                        x_px + px * px_scale,
-                        y_px + py * px_scale,
-                        px_scale,
-                        px_scale,
-                    ),
-                )
+        key_rgb = (0, 0, 0) if rgb != (0, 0, 0) else (255, 255, 255)
+        surf = pygame.Surface((w, h))
+        surf.fill(key_rgb)
+        pixels = pygame.surfarray.pixels3d(surf)
+        pixels[mask.T] = rgb
+        del pixels
+        surf.set_colorkey(key_rgb, pygame.RLEACCEL)
+    return surf
+
+def _get_text_run_surface(run, c_idx, px_scale, indexed):
+    """Return a transparent surface with the whole line pre-rendered (None when nothing is lit)."""
+    key = (run, c_idx, px_scale, indexed)
+    cached = _text_run_cache.lookup(key)
+    if cached is not _MISSING:
+        return cached
+    mask = _text_run_bitmap(run) != 0
+    if not mask.any():
+        _text_run_cache[key] = None
+        return None
+    if px_scale > 1:
+        mask = np.repeat(np.repeat(mask, px_scale, axis=0), px_scale, axis=1)
+    surf = _mask_surface(mask, c_idx, indexed)
+    _text_run_cache[key] = surf
+    return surf
+
+def _draw_super_text(surface, items, indexed=False, clips=None, clip_table=None):
+    div = _raster_div()
+    clips = _item_clips(items, clips)
+    base, cur = surface.get_clip() if clips is not None else None, 0
+    for i, (x_px, y_px, run, c_idx, scale) in enumerate(items):
+        if clips is not None and clips[i] != cur:
+            cur = clips[i]
+            surface.set_clip(_clip_raster_rect(cur, base, clip_table) if cur else base)
+        px_scale = max(1, int(round(float(scale) * _raster_scale)))
+        surf = _get_text_run_surface(run, c_idx, px_scale, indexed)
+        if surf is not None:
+            surface.blit(surf, (int(x_px / div), int(y_px / div)))
+    if cur:
+        surface.set_clip(base)
+
+# Raster hatch fills: one stripe tile per (spacing, angle, thickness) and one clipped surface per placement.
+_PATTERN_TILE_MAX_ENTRIES = 32
+_PATTERN_SURFACE_MAX_ENTRIES = 256
+_pattern_tile_cache = _LruCache(max_entries=_PATTERN_TILE_MAX_ENTRIES, sizeof=lambda tile: tile.nbytes)
+_pattern_surface_cache = _LruCache(max_entries=_PATTERN_SURFACE_MAX_ENTRIES, sizeof=_sprite_bytes)
+
+def _pattern_axis(angle_deg):
+    """Scroll axis of a hatch tile (0 = x, 1 = y) and the tile period along it."""
+    theta = np.deg2rad(float(angle_deg))
+    sin_t, cos_t = float(np.sin(theta)), float(np.cos(theta))
+    return (0, sin_t) if abs(sin_t) >= abs(cos_t) else (1, cos_t)
+
+def _pattern_tile(spacing, angle_deg, thickness, w, h):
+    """Bool (h, w) stripe mask with hatch lines through the tile origin, grown on demand."""
+    key = (spacing, angle_deg, thickness)
+    tile = _pattern_tile_cache.lookup(key)
+    if tile is not _MISSING and tile.shape[0] >= h and tile.shape[1] >= w:
+        return tile
+    if tile is not _MISSING:
+        h, w = max(h, tile.shape[0]), max(w, tile.shape[1])
+    theta = np.deg2rad(angle_deg)
+    ys, xs = np.mgrid[0:h, 0:w]
+    k = (xs + 0.5) * -np.sin(theta) + (ys + 0.5) * np.cos(theta)
+    # Like a Bresenham line: `thickness` pixels across the minor axis, ties resolved to one side.
+    resid = k - np.round(k / spacing) * spacing + 1e-7
+    half = 0.5 * thickness * max(abs(np.sin(theta)), abs(np.cos(theta)))
+    tile = (resid > -half) & (resid <= half)
+    tile.flags.writeable = False
+    _pattern_tile_cache[key] = tile
+    return tile
+
+def _pattern_bounds(item):
+    verts = item[0]
+    div = _raster_div()
+    xs = [p[0] / div for p in verts]
+    ys = [p[1] / div for p in verts]
+    x0, y0 = int(np.floor(min(xs))), int(np.floor(min(ys)))
+    return pygame.Rect(x0, y0, int(np.ceil(max(xs))) - x0 + 1, int(np.ceil(max(ys))) - y0 + 1)
+
+def _get_pattern_surface(item, indexed):
+    """Clipped, colored hatch surface for one raster pattern item (None when fully transparent)."""
+    verts, spacing_px, angle_deg, thickness, offset_px, c_idx = item
+    div = _raster_div()
+    rect = _pattern_bounds(item)
+    spacing = spacing_px / div
+    thickness_px = max(1, int(round(float(thickness) * _raster_scale)))
+    # Phase of the hatch relative to the bounding box origin, expressed as an integer tile scroll.
+    axis, factor = _pattern_axis(angle_deg)
+    period = spacing / abs(factor)
+    theta = np.deg2rad(angle_deg)
+    if axis == 0:
+        scroll = (rect.x + (offset_px / div - rect.y * np.cos(theta)) / factor) % period
+    else:
+        scroll = (rect.y - (offset_px / div + rect.x * np.sin(theta)) / factor) % period
+    scroll = int(round(scroll)) % max(1, int(np.ceil(period)))
+    local = tuple((round(x / div - rect.x, 3), round(y / div - rect.y, 3)) for x, y in verts)
+    key = (local, rect.size, spacing, angle_deg, thickness_px, scroll, c_idx, indexed)
+    cached = _pattern_surface_cache.lookup(key)
+    if cached is not _MISSING:
+        return cached
+    extra = int(np.ceil(period)) + 1
+    tile = _pattern_tile(spacing, angle_deg, thickness_px, rect.w + (extra if axis == 0 else 0), rect.h + (extra if axis else 0))
+    if axis == 0:
+        stripes = tile[: rect.h, scroll : scroll + rect.w]
+    else:
+        stripes = tile[scroll : scroll + rect.h, : rect.w]
+    clip = pygame.Surface(rect.size, 0, 8)
+    pygame.draw.polygon(clip, 1, local)
+    mask = stripes & (pygame.surfarray.pixels2d(clip).T != 0)
+    surf = _mask_surface(mask, c_idx, indexed) if mask.any() else None
+    _pattern_surface_cache[key] = surf
+    return surf
+
+def _draw_patterns(surface, items, indexed=False, clips=None, clip_table=None):
+    clips = _item_clips(items, clips)
+    base, cur = surface.get_clip() if clips is not None else None, 0
+    for i, item in enumerate(items):
+        if clips is not None and clips[i] != cur:
+            cur = clips[i]
+            surface.set_clip(_clip_raster_rect(cur, base, clip_table) if cur else base)
+        surf = _get_pattern_surface(item, indexed)
+        if surf is not None:
+            surface.blit(surf, _pattern_bounds(item))
+    if cur:
+        surface.set_clip(base)
+
+# Dirty tracking: previous frame inputs, compared cell-by-cell and item-by-item.
+_DIRTY_MAX_RECTS = 32
+_DIRTY_FULL_AREA_RATIO = 0.6
+_present_state = {}
+_dirty_rects = []
+
+def _fillpoly_bounds(item):
+    v = item[0]
+    div = _raster_div()
+    xs = [p[0] / div for p in v]
+    ys = [p[1] / div for p in v]
+    return pygame.Rect(int(min(xs)) - 1, int(min(ys)) - 1, int(max(xs) - min(xs)) + 3, int(max(ys) - min(ys)) + 3)
+
+def _line_bounds(item):
+    x1, y1, x2, y2, _, t = item
+    div = _raster_div()
+    x1, y1, x2, y2 = x1 / div, y1 / div, x2 / div, y2 / div
+    pad = max(1, int(round(float(t) * _raster_scale))) + 1
+    x = int(min(x1, x2)) - pad
+    y = int(min(y1, y2)) - pad
+    return pygame.Rect(x, y, int(abs(x2 - x1)) + pad * 2 + 1, int(abs(y2 - y1)) + pad * 2 + 1)
+
+def _super_text_bounds(item):
+    x_px, y_px, run, _, scale = item
+    div = _raster_div()
+    px_scale = max(1, int(round(float(scale) * _raster_scale)))
+    w, h = run[3], run[4]
+    return pygame.Rect(int(x_px / div), int(y_px / div), w * px_scale, h * px_scale)
+
+def _with_clip_keys(keys, queue, clip_table):
+    """Fold each clipped item's clip rect into its key, so a moved clip counts as a change."""
+    clips = _item_clips(queue, None)
+    if clips is None:
+        return keys
+    return [(key, clip_table[cid]) if cid else key for key, cid in zip(keys, clips)]
+
+def _overlay_queues():
+    return (fillpoly_queue, line_queue, super_text_queue, pattern_queue)
+
+# Copies of the overlay queues as last presented under dirty tracking (storage reused across frames).
+_present_overlays = (_PolyBuffer(), _LineBuffer(), _ItemQueue(), _ItemQueue())
+
+def _overlay_digests(queues, clip_table):
+    """Per-queue bulk digests; clipped queues also cover the clip rects they refer to."""
+    return tuple((q.digest(), None if q.clip_ids is None else tuple(clip_table)) for q in queues)
+
+def _overlay_item_keys(kind, queue, clip_table):
+    """Per-item diff keys for one queue; only built when its bulk digest changed."""
+    if kind == 0:
+        keys = [(tuple(map(tuple, v)), c) for v, c in queue]
+    else:
+        keys = list(queue)
+    return _with_clip_keys(keys, queue, clip_table)
+
+def _select_items(queue, bounds, rect):
+    """Queued items whose bounds touch rect, with their clip ids (None when nothing is clipped)."""
+    clips = _item_clips(queue, None)
+    if clips is None:
+        return [it for it in queue if rect.colliderect(bounds(it))], None
+    picked = [(it, cid) for it, cid in zip(queue, clips) if rect.colliderect(bounds(it))]
+    return [it for it, _ in picked], [cid for _, cid in picked]
+
+def _cell_rect(r0, r1, c0, c1):
+    eff_w = (char_resolution[1] + char_block_spacing_px) * _raster_scale
+    eff_h = (char_resolution[0] + line_block_spacing_px) * _raster_scale
+    pad = border_padding_px * _raster_scale
+    return pygame.Rect(pad + c0 * eff_w, pad + r0 * eff_h, (c1 - c0) * eff_w, (r1 - r0) * eff_h)
+
+def _changed_cell_rects(changed):
+    """Row runs of changed cells, merged downward when consecutive rows share a span."""
+    rects = []
+    open_runs = {}
+    for r in range(changed.shape[0]):
+        row = changed[r]
+        if not row.any():
+            open_runs = {}
+            continue
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], row.astype(np.int8), [0]))))
+        runs = {}
+        for c0, c1 in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+            prev = open_runs.get((c0, c1))
+            if prev is not None:
+                prev[1] = r + 1
+                runs[(c0, c1)] = prev
+            else:
+                run = [r, r + 1, c0, c1]
+                rects.append(run)
+                runs[(c0, c1)] = run
+        open_runs = runs
+    return [_cell_rect(*run) for run in rects]
+
+def _collect_dirty_rects(surface, indexed=False):
+    """Return dirty rects since the last tracked frame, or None when a full redraw is needed."""
+    prev = _present_state
+    if (
+        prev.get("surface") is not surface
+        or prev.get("size") != surface.get_size()
+        or prev.get("epoch") != _raster_epoch
+        or (not indexed and prev.get("palette_epoch") != _palette_epoch)
+        or prev.get("screen") is None
+        or prev["screen"].shape != screen.shape
+    ):
+        return None
+    # Wide glyphs span two cells; redraw both halves when either changes.
+    changed = (screen != prev["screen"]) | (screen_color != prev["screen_color"])
+    changed[:, :-1] |= changed[:, 1:] & (screen[:, 1:] == WIDE_CONT)
+    changed[:, 1:] |= changed[:, :-1] & (screen[:, 1:] == WIDE_CONT)
+    rects = _changed_cell_rects(changed)
+
+    cur_digests = _overlay_digests(_overlay_queues(), _clip_table)
+    bounds = (_fillpoly_bounds, _line_bounds, _super_text_bounds, _pattern_bounds)
+    for kind, queue in enumerate(_overlay_queues()):
+        if prev["overlay_digests"][kind] == cur_digests[kind]:
+            continue
+        prev_queue = _present_overlays[kind]
+        prev_keys = _overlay_item_keys(kind, prev_queue, prev["clip_table"])
+        cur_keys = _overlay_item_keys(kind, queue, _clip_table)
+        if prev_keys == cur_keys:
+            continue
+        prev_set = set(prev_keys)
+        cur_set = set(cur_keys)
+        if prev_set == cur_set:
+            # Same items, new stacking order.
+            return None
+        for key, item in zip(prev_keys, prev_queue):
+            if key not in cur_set:
+                rects.append(bounds[kind](item))
+        for key, item in zip(cur_keys, queue):
+            if key not in prev_set:
+                rects.append(bounds[kind](item))
+
+    surf_rect = surface.get_rect()
+    rects = [r.clip(surf_rect) for r in rects]
+    rects = [r for r in rects if r.width > 0 and r.height > 0]
+    if len(rects) > _DIRTY_MAX_RECTS:
+        rects = [rects[0].unionall(rects[1:])]
+    area = sum(r.width * r.height for r in rects)
+    if area > _DIRTY_FULL_AREA_RATIO * surf_rect.width * surf_rect.height:
+        return None
+    return rects
+
+def _remember_present_state(surface):
+    _present_state.update(
+        surface=surface,
+        size=surface.get_size(),
+        epoch=_raster_epoch,
+        palette_epoch=_palette_epoch,
+        screen=screen.copy(),
+        screen_color=screen_color.copy(),
+        overlay_digests=_overlay_digests(_overlay_queues(), _clip_table),
+        clip_table=tuple(_clip_table),
+    )
+    for dst, src in zip(_present_overlays, _overlay_queues()):
+        dst.copy_from(src)
+
+def _redraw_region(surface, rect, indexed=False, text_layer=None):
+    cols, rows = row_column_resolution
+    eff_w = (char_resolution[1] + char_block_spacing_px) * _raster_scale
+    eff_h = (char_resolution[0] + line_block_spacing_px) * _raster_scale
+    pad = border_padding_px * _raster_scale
+    old_clip = surface.get_clip()
+    surface.set_clip(rect)
+    surface.fill(_surface_bg(indexed), rect)
+    items, clips = _select_items(fillpoly_queue, _fillpoly_bounds, rect)
+    _draw_fillpolys(surface, items, indexed, clips)
+    if indexed:
+        _draw_text_layer_indexed(surface, rect, text_layer)
+    else:
+        # One extra column on the left catches wide glyphs whose lead sits outside the rect.
+        c0 = max(0, (rect.left - pad) // eff_w - 1)
+        c1 = min(cols, (rect.right - pad) // eff_w + 1)
+        r0 = max(0, (rect.top - pad) // eff_h)
+        r1 = min(rows, (rect.bottom - pad) // eff_h + 1)
+        if r0 < r1 and c0 < c1:
+            _draw_text_layer(surface, (r0, r1, c0, c1))
+    items, clips = _select_items(pattern_queue, _pattern_bounds, rect)
+    _draw_patterns(surface, items, indexed, clips)
+    items, clips = _select_items(line_queue, _line_bounds, rect)
+    _draw_lines(surface, items, indexed, clips)
+    items, clips = _select_items(super_text_queue, _super_text_bounds, rect)
+    _draw_super_text(surface, items, indexed, clips)
+    surface.set_clip(old_clip)
+
+def frame_fingerprint():
+    """Digest of everything the next draw_to_surface() would paint.
+
+    Covers the text grid, all overlay queues with their clip rects, and the raster/palette epochs.
+    Equal fingerprints on consecutive frames mean the presented image would not change.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(screen.tobytes())
+    h.update(screen_color.tobytes())
+    for queue in (line_queue, fillpoly_queue, super_text_queue, pattern_queue):
+        h.update(queue.digest())
+    rest = (tuple(_clip_table), _raster_epoch, _palette_epoch, _LAYOUT_MODE_ENABLED, screen.shape)
+    h.update(pickle.dumps(rest, pickle.HIGHEST_PROTOCOL))
+    return h.hexdigest()
+
+def mark_full_redraw():
+    """Force the next draw_to_surface() to repaint the whole surface."""
+    _present_state.clear()
+
+def get_dirty_rects():
+    """Rects repainted by the last draw_to_surface() (whole surface when not tracking)."""
+    return [pygame.Rect(r) for r in _dirty_rects]
+
+def draw_to_surface(surface):
+    indexed = _is_indexed_target(surface)
+    if indexed:
+        surface.set_palette(get_surface_palette())
+    if dirty_tracking:
+        palette_changed = indexed and _present_state.get("palette_epoch") != _palette_epoch
+        rects = _collect_dirty_rects(surface, indexed)
+        _remember_present_state(surface)
+        if rects is not None:
+            text_layer = _compose_text_layer() if indexed and rects else None
+            for rect in rects:
+                _redraw_region(surface, rect, indexed, text_layer)
+            # A palette upload recolors every presented pixel, even where nothing was repainted.
+            _dirty_rects[:] = [surface.get_rect()] if palette_changed else rects
+            return
+    else:
+        _present_state.clear()
+    surface.fill(_surface_bg(indexed))
+    _draw_fillpolys(surface, fillpoly_queue, indexed)
+    if indexed:
+        _draw_text_layer_indexed(surface)
+    elif rasterizer == "bands":
+        if not _draw_text_layer_bands(surface):
+            _draw_text_layer_numpy(surface)
+    elif rasterizer == "numpy":
+        _draw_text_layer_numpy(surface)
+    else:
+        _draw_text_layer(surface)
+    _draw_patterns(surface, pattern_queue, indexed)
+    _draw_lines(surface, line_queue, indexed)
+    _draw_super_text(surface, super_text_queue, indexed)
+    _dirty_rects[:] = [pygame.Rect((0, 0), get_render_size_px())]
+
+class FrameSnapshot:
+    """One frame's grid and overlay queues, copied into storage reused across frames.
+
+    capture() runs on the main thread at frame end; draw_snapshot_to_surface() can then rasterize the
+    copy on another thread while the main thread builds the next frame in the live arrays.
+    """
+
+    def __init__(self):
+        self.screen = None
+        self.screen_color = None
+        self.lines = _LineBuffer()
+        self.fillpolys = _PolyBuffer()
+        self.super_text = _ItemQueue()
+        self.patterns = _ItemQueue()
+        self.clip_table = [None]
+        self.frame = 0
+
+    def capture(self):
+        if self.screen is None or self.screen.shape != screen.shape:
+            self.screen = np.empty_like(screen)
+            self.screen_color = np.empty_like(screen_color)
+        np.copyto(self.screen, screen)
+        np.copyto(self.screen_color, screen_color)
+        self.lines.copy_from(line_queue)
+        self.fillpolys.copy_from(fillpoly_queue)
+        self.super_text.copy_from(super_text_queue)
+        self.patterns.copy_from(pattern_queue)
+        self.clip_table[:] = _clip_table
+        self.frame = frame
+        return self
+
+def draw_snapshot_to_surface(snapshot, surface):
+    """Rasterize a FrameSnapshot onto surface (full repaint; dirty tracking applies to live frames only)."""
+    with _raster_lock:
+        render(snapshot.screen, snapshot.screen_color)
+        indexed = _is_indexed_target(surface)
+        if indexed:
+            surface.set_palette(get_surface_palette())
+        grid = (snapshot.screen, snapshot.screen_color)
+        table = snapshot.clip_table
+        surface.fill(_surface_bg(indexed))
+        _draw_fillpolys(surface, snapshot.fillpolys, indexed, clip_table=table)
+        if indexed:
+            _draw_text_layer_indexed(surface, grid=grid)
+        elif rasterizer == "bands":
+            if not _draw_text_layer_bands(surface, grid=grid):
+                _draw_text_layer_numpy(surface, grid=grid)
+        elif rasterizer == "numpy":
+            _draw_text_layer_numpy(surface, grid=grid)
+        else:
+            _draw_text_layer(surface, grid=grid)
+        _draw_patterns(surface, snapshot.patterns, indexed, clip_table=table)
+        _draw_lines(surface, snapshot.lines, indexed, clip_table=table)
+        _draw_super_text(surface, snapshot.super_text, indexed, clip_table=table)
+        for store in _glyph_disk_stores.values():
+            if store is not None:
+                store.maybe_flush()
+    return snapshot.frame
+
+def present_scaled(src, dst, rects=None):
+    """Copy a render surface onto dst, upscaling by PIXEL_SCALE (nearest) when scale_at_present is on.
+
+    rects limits the copy to regions of src (e.g. get_dirty_rects()); returns the touched dst rects.
+    """
+    div = _raster_div()
+    bounds = src.get_rect()
+    if rects is None:
+        if div > 1 and dst.get_bitsize() == src.get_bitsize() and dst.get_size() == (bounds.w * div, bounds.h * div):
+            pygame.transform.scale(src, dst.get_size(), dst)
+            return [dst.get_rect()]
+        rects = [bounds]
+    touched = []
+    for rect in rects:
+        rect = pygame.Rect(rect).clip(bounds)
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        target = pygame.Rect(rect.x * div, rect.y * div, rect.width * div, rect.height * div)
+        if div > 1:
+            dst.blit(pygame.transform.scale(src.subsurface(rect), target.size), target)
+        else:
+            dst.blit(src, target, rect)
+        touched.append(target)
+    return touched
 # endregion
 
 # region Polygon Library (unified)
@@ -1203,6 +3388,21 @@ class PolyShape:
     # vertices in "design pixels" at base_font_height_px. Scaling uses current font height.
     vertices_px: tuple[tuple[float, float], ...]
     base_font_height_px: float
+    # Read-only (N, 2) float array of vertices_px and a precomputed hash, so shapes key caches cheaply.
+    _vertices: np.ndarray = field(init=False, repr=False, compare=False)
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        verts = _vertex_array(self.vertices_px).copy()
+        verts.flags.writeable = False
+        object.__setattr__(self, "_vertices", verts)
+        object.__setattr__(self, "_hash", hash((self.vertices_px, self.base_font_height_px)))
+
+    def __hash__(self):
+        return self._hash
+
+def _vertex_array(vertices):
+    return np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
 
 poly_shapes: dict[str, PolyShape] = {}
 
@@ -1215,7 +3415,7 @@ def add_poly(name: str, vertices_px, base_font_height_px: float | None = None):
     if base_font_height_px is None:
         base_font_height_px = float(char_resolution[0] or 1)
     poly_shapes[name] = PolyShape(
-        vertices_px=tuple((float(x), float(y)) for x, y in vertices_px),
+        vertices_px=tuple((float(x), float(y)) for x, y in _vertex_array(vertices_px).tolist()),
         base_font_height_px=float(base_font_height_px or 1),
     )
 
@@ -1224,9 +3424,8 @@ def _resolve_poly_vertices(shape_or_vertices):
         shape = poly_shapes.get(shape_or_vertices)
         if shape is None:
             return None, None
-        return tuple(shape.vertices_px), float(shape.base_font_height_px or 1)
-    verts = tuple((float(x), float(y)) for x, y in shape_or_vertices)
-    return verts, float(char_resolution[0] or 1)
+        return shape._vertices, float(shape.base_font_height_px or 1)
+    return _vertex_array(shape_or_vertices), float(char_resolution[0] or 1)
 
 def transform_poly_vertices(shape_or_vertices, *, scale=1.0, scale_x=None, scale_y=None, angle_deg=0.0):
     """Apply scale + rotation to poly vertices around fixed origin (0, 0)."""
@@ -1237,18 +3436,14 @@ def transform_poly_vertices(shape_or_vertices, *, scale=1.0, scale_x=None, scale
     base_scale = float(scale)
     sx = base_scale if scale_x is None else float(scale_x)
     sy = base_scale if scale_y is None else float(scale_y)
-    theta = np.deg2rad(float(angle_deg))
-    cos_t = float(np.cos(theta))
-    sin_t = float(np.sin(theta))
+    return tuple(map(tuple, _transform_vertices(vertices, sx, sy, angle_deg).tolist()))
 
-    out = []
-    for x, y in vertices:
-        xs = float(x) * sx
-        ys = float(y) * sy
-        xr = xs * cos_t - ys * sin_t
-        yr = xs * sin_t + ys * cos_t
-        out.append((xr, yr))
-    return tuple(out)
+def _transform_vertices(vertices, sx, sy, angle_deg):
+    """Scale then rotate an (N, 2) vertex array about (0, 0) with one matrix product."""
+    theta = np.deg2rad(float(angle_deg))
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    matrix = np.array([[sx * cos_t, sx * sin_t], [-sy * sin_t, sy * cos_t]])
+    return _vertex_array(vertices) @ matrix
 
 def rescale_poly_vertices(shape_or_vertices, scale=1.0, *, scale_x=None, scale_y=None):
     """Scale vertices around fixed origin (0, 0)."""
@@ -1291,11 +3486,47 @@ def add_poly_transformed(
     add_poly(name, transformed, base_font_height_px=base_font_height_px)
     return True
 
-def _poly_local_vertices_scaled(vertices_px, base_font_height_px: float):
+def _poly_scaled(vertices_px, base_font_height_px: float):
+    """(local vertices (N, 2), closed outline edges (N, 4), (x0, y0, x1, y1) bounds) in render pixels.
+
+    Cached for library shapes.
+    """
     cur_h = float(char_resolution[0] or 1)
     base_h = float(base_font_height_px or 1)
+    shape = vertices_px if isinstance(vertices_px, PolyShape) else None
+    if shape is not None:
+        key = (shape, base_h, cur_h, PIXEL_SCALE)
+        cached = _poly_scaled_cache.lookup(key)
+        if cached is not _MISSING:
+            return cached
+        vertices_px = shape._vertices
     scale = cur_h / base_h if base_h != 0 else 1.0
-    return [(x * scale * PIXEL_SCALE, y * scale * PIXEL_SCALE) for x, y in vertices_px]
+    local = _vertex_array(vertices_px) * (scale * PIXEL_SCALE)
+    edges = np.concatenate([local, np.roll(local, -1, axis=0)], axis=1)
+    if len(local):
+        bounds = (*local.min(axis=0).tolist(), *local.max(axis=0).tolist())
+    else:
+        bounds = (0.0, 0.0, 0.0, 0.0)
+    if shape is not None:
+        local.flags.writeable = False
+        edges.flags.writeable = False
+        _poly_scaled_cache[key] = (local, edges, bounds)
+    return local, edges, bounds
+
+def _poly_local_vertices_scaled(vertices_px, base_font_height_px: float):
+    """Design-pixel vertices scaled to render pixels, as an (N, 2) array (cached for library shapes)."""
+    return _poly_scaled(vertices_px, base_font_height_px)[0]
+
+def _resolve_poly_source(shape_or_vertices, base_font_height_px):
+    """(vertex source for _poly_local_vertices_scaled, base height) or (None, None) for unknown names."""
+    if isinstance(shape_or_vertices, str):
+        shape = poly_shapes.get(shape_or_vertices)
+        if shape is None:
+            return None, None
+        base_h = shape.base_font_height_px if base_font_height_px is None else float(base_font_height_px)
+        return shape, base_h
+    base_h = float(base_font_height_px if base_font_height_px is not None else (char_resolution[0] or 1))
+    return shape_or_vertices, base_h
 
 def draw_poly(shape_or_vertices, color, x_px, y_px, *, filled=None, thickness=None, base_font_height_px: float | None = None):
     """Draw a polygon using the unified system.
@@ -1305,27 +3536,42 @@ def draw_poly(shape_or_vertices, color, x_px, y_px, *, filled=None, thickness=No
     - Vertex units are design pixels. They scale with current font height.
     """
     opts = _resolve_opts("poly", {"filled": filled, "thickness": thickness, "base_font_height_px": base_font_height_px})
-    if isinstance(shape_or_vertices, str):
-        shape = poly_shapes.get(shape_or_vertices)
-        if shape is None:
-            return False
-        vertices_px = shape.vertices_px
-        base_h = shape.base_font_height_px if opts["base_font_height_px"] is None else float(opts["base_font_height_px"])
-    else:
-        vertices_px = tuple((float(x), float(y)) for x, y in shape_or_vertices)
-        base_h = float(opts["base_font_height_px"] if opts["base_font_height_px"] is not None else (char_resolution[0] or 1))
-
-    base_px, base_py = float(x_px), float(y_px)
-    local = _poly_local_vertices_scaled(vertices_px, base_h)
-    abs_v = [(base_px + x, base_py + y) for x, y in local]
+    source, base_h = _resolve_poly_source(shape_or_vertices, opts["base_font_height_px"])
+    if source is None:
+        return False
 
+    dx, dy = float(x_px), float(y_px)
     c_idx = _resolve_color(color)
+    if isinstance(source, (PolyShape, np.ndarray)):
+        # Library shapes: cached scaled arrays, so each instance only costs a translation.
+        local, edges, (x0, y0, x1, y1) = _poly_scaled(source, base_h)
+        pad = 1.0 if opts["filled"] else _line_pad(opts["thickness"])
+        clip = _clip_for(dx + x0 - pad, dy + y0 - pad, dx + x1 + pad, dy + y1 + pad)
+        if clip is None:
+            return True
+        if opts["filled"]:
+            fillpoly_queue.append((local, c_idx), offset=(dx, dy), clip=clip)
+        else:
+            line_queue.extend_edges(edges, dx, dy, c_idx, opts["thickness"], clip=clip)
+        return True
+
+    # Ad-hoc vertex lists (rects, one-off shapes) are small; plain Python beats NumPy call overhead here.
+    cur_h = float(char_resolution[0] or 1)
+    k = cur_h / float(base_h or 1) * PIXEL_SCALE
+    abs_v = [(dx + float(x) * k, dy + float(y) * k) for x, y in source]
+    if not abs_v:
+        return True
+    xs, ys = zip(*abs_v)
+    pad = 1.0 if opts["filled"] else _line_pad(opts["thickness"])
+    clip = _clip_for(min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad)
+    if clip is None:
+        return True
     if opts["filled"]:
-        fillpoly_queue.append((abs_v, c_idx))
+        fillpoly_queue.append((abs_v, c_idx), clip=clip)
     else:
         for i in range(len(abs_v)):
             p1, p2 = abs_v[i], abs_v[(i + 1) % len(abs_v)]
-            line_queue.append((p1[0], p1[1], p2[0], p2[1], c_idx, opts["thickness"]))
+            line_queue.append((p1[0], p1[1], p2[0], p2[1], c_idx, opts["thickness"]), clip)
     return True
 
 def draw_rect(color, x_px, y_px, w_px, h_px, *, filled=None, thickness=None, base_font_height_px: float | None = None):
@@ -1336,6 +3582,114 @@ def draw_rect(color, x_px, y_px, w_px, h_px, *, filled=None, thickness=None, bas
     outline = [(0, 0), (w_px, 0), (w_px, h_px), (0, h_px)]
     return draw_poly(outline, color, x_px, y_px, filled=False, thickness=opts["thickness"], base_font_height_px=opts["base_font_height_px"])
 
+def _resolve_colors(color, n):
+    """Palette indices for a batch plus a keep mask: one shared color, or one per item (None skips the item)."""
+    if color is None or isinstance(color, (str, int, float, np.integer)):
+        keep = np.full(n, color is not None)
+        return np.full(n, 0 if color is None else _resolve_color(color), dtype=np.int64), keep
+    colors = list(color)
+    if len(colors) != n:
+        raise ValueError(f"expected {n} colors, got {len(colors)}")
+    keep = np.array([c is not None for c in colors], dtype=bool)
+    return np.array([0 if c is None else _resolve_color(c) for c in colors], dtype=np.int64), keep
+
+def _batch_scale(base_font_height_px):
+    cur_h = float(char_resolution[0] or 1)
+    base_h = float(base_font_height_px if base_font_height_px is not None else cur_h)
+    return cur_h / float(base_h or 1) * PIXEL_SCALE
+
+def _cull_polys(polys, colors, pad):
+    """Drop (N, V, 2) polygons outside the active clip; returns (polys, colors, clip ids)."""
+    lo, hi = polys.min(axis=1) - pad, polys.max(axis=1) + pad
+    keep, clips = _clip_for_array(lo[:, 0], lo[:, 1], hi[:, 0], hi[:, 1])
+    return polys[keep], colors[keep], clips
+
+def _enqueue_polys(polys, colors, filled, thickness):
+    """Queue an (N, V, 2) polygon array as fills or closed outlines, culled against the active clip."""
+    polys, colors, clips = _cull_polys(polys, colors, 1.0 if filled else _line_pad(thickness))
+    if filled:
+        fillpoly_queue.extend_uniform(polys, colors, clips)
+        return int(len(polys))
+    n, v = polys.shape[0], polys.shape[1]
+    rows = np.empty((n, v, 6), dtype=np.float64)
+    rows[:, :, 0:2] = polys
+    rows[:, :, 2:4] = np.roll(polys, -1, axis=1)
+    rows[:, :, 4] = colors[:, None]
+    rows[:, :, 5] = thickness
+    line_queue.extend(rows.reshape(-1, 6), np.repeat(clips, v) if np.ndim(clips) else clips)
+    return int(n)
+
+def draw_rects(color, rects, *, filled=None, thickness=None, base_font_height_px: float | None = None):
+    """Queue many rects in one call; same placement and sizing rules as draw_rect().
+
+    - rects: (N, 4) array-like of x_px, y_px, w_px, h_px.
+    - color: one color for all rects, or a sequence of N colors (None entries are skipped).
+    Returns the number of rects queued.
+    """
+    opts = _resolve_opts("rect", {"filled": filled, "thickness": thickness, "base_font_height_px": base_font_height_px})
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    colors, keep = _resolve_colors(color, len(rects))
+    rects, colors = rects[keep], colors[keep]
+    k = _batch_scale(opts["base_font_height_px"])
+    x0, y0 = rects[:, 0], rects[:, 1]
+    x1, y1 = x0 + rects[:, 2] * k, y0 + rects[:, 3] * k
+    polys = np.stack([np.stack([x0, y0], 1), np.stack([x1, y0], 1), np.stack([x1, y1], 1), np.stack([x0, y1], 1)], 1)
+    return _enqueue_polys(polys, colors, opts["filled"], opts["thickness"])
+
+def draw_lines(color, segments, *, thickness=None):
+    """Queue many line segments in one call.
+
+    - segments: (N, 4) array-like of x1, y1, x2, y2 in absolute pixels.
+    - color: one color for all segments, or a sequence of N colors (None entries are skipped).
+    Returns the number of segments queued.
+    """
+    opts = _resolve_opts("poly", {"thickness": thickness})
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    colors, keep = _resolve_colors(color, len(segments))
+    segments, colors = segments[keep], colors[keep]
+    pad = _line_pad(opts["thickness"])
+    lo = np.minimum(segments[:, 0:2], segments[:, 2:4]) - pad
+    hi = np.maximum(segments[:, 0:2], segments[:, 2:4]) + pad
+    keep, clips = _clip_for_array(lo[:, 0], lo[:, 1], hi[:, 0], hi[:, 1])
+    rows = np.empty((int(keep.sum()), 6), dtype=np.float64)
+    rows[:, :4] = segments[keep]
+    rows[:, 4] = colors[keep]
+    rows[:, 5] = opts["thickness"]
+    line_queue.extend(rows, clips)
+    return int(len(rows))
+
+def draw_polys(shape_or_vertices, color, positions, *, filled=None, thickness=None, base_font_height_px: float | None = None):
+    """Queue many polygons in one call; same placement and sizing rules as draw_poly().
+
+    - shape_or_vertices: a library shape name or a (V, 2) vertex list shared by every item,
+      or an (N, V, 2) array with per-item vertices.
+    - positions: (N, 2) array-like of x_px, y_px placements.
+    - color: one color for all items, or a sequence of N colors (None entries are skipped).
+    Returns the number of polygons queued.
+    """
+    opts = _resolve_opts("poly", {"filled": filled, "thickness": thickness, "base_font_height_px": base_font_height_px})
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    n = len(positions)
+    per_item = not isinstance(shape_or_vertices, str) and np.ndim(shape_or_vertices) == 3
+    if per_item:
+        verts = np.asarray(shape_or_vertices, dtype=np.float64)
+        if len(verts) != n:
+            raise ValueError(f"expected {n} vertex sets, got {len(verts)}")
+        verts = verts * _batch_scale(opts["base_font_height_px"])
+    else:
+        source, base_h = _resolve_poly_source(shape_or_vertices, opts["base_font_height_px"])
+        if source is None:
+            return 0
+        if not isinstance(source, PolyShape):
+            source = _vertex_array(source)
+        verts = _poly_scaled(source, base_h)[0][None, :, :]
+    colors, keep = _resolve_colors(color, n)
+    polys = verts + positions[:, None, :]
+    polys, colors = polys[keep], colors[keep]
+    if polys.shape[1] == 0:
+        return 0
+    return _enqueue_polys(polys, colors, opts["filled"], opts["thickness"])
+
 def _design_px_to_render_px(value, base_font_height_px: float):
     cur_h = float(char_resolution[0] or 1)
     base_h = float(base_font_height_px or 1)
@@ -1348,78 +3702,87 @@ def _design_px_to_thickness_units(value, base_font_height_px: float):
     scale = cur_h / base_h if base_h != 0 else 1.0
     return float(value) * scale
 
-def _dot2(a, b):
-    return a[0] * b[0] + a[1] * b[1]
-
-def _dedupe_points(points, precision=6):
-    seen = set()
-    out = []
-    for p in points:
-        key = (round(float(p[0]), precision), round(float(p[1]), precision))
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append((float(p[0]), float(p[1])))
-    return out
-
-def _line_polygon_intersections(vertices, normal, k, eps=1e-9):
-    points = []
-    n = len(vertices)
-    for i in range(n):
-        a = vertices[i]
-        b = vertices[(i + 1) % n]
-        da = _dot2(a, normal) - k
-        db = _dot2(b, normal) - k
-
-        if abs(da) <= eps and abs(db) <= eps:
-            points.append(a)
-            points.append(b)
-            continue
-        if abs(da) <= eps:
-            points.append(a)
-            continue
-        if abs(db) <= eps:
-            points.append(b)
-            continue
-        if da * db < 0.0:
-            t = da / (da - db)
-            points.append((a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])))
-
-    return _dedupe_points(points)
+# Hatch segments in pattern-local coordinates, keyed by (local vertices, spacing, angle, phase).
+_HATCH_CACHE_MAX_ENTRIES = 256
+_hatch_cache = _LruCache(max_entries=_HATCH_CACHE_MAX_ENTRIES, sizeof=lambda segs: segs.nbytes)
 
 def _build_hatch_segments(vertices, spacing_px, angle_deg, offset_px):
-    if len(vertices) < 3:
-        return []
+    """Clip parallel hatch lines against a polygon; returns an (S, 4) array of x1, y1, x2, y2.
 
-    theta = np.deg2rad(float(angle_deg))
-    direction = (float(np.cos(theta)), float(np.sin(theta)))
-    normal = (-direction[1], direction[0])
+    All scanlines are intersected with all edges at once. Lines through a vertex count that
+    vertex once; coincident points are merged before pairing along the hatch direction.
+    """
+    verts = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    if len(verts) < 3:
+        return np.zeros((0, 4), dtype=np.float64)
 
-    proj = [_dot2(v, normal) for v in vertices]
-    k_min = min(proj)
-    k_max = max(proj)
+    theta = np.deg2rad(float(angle_deg))
+    direction = np.array([np.cos(theta), np.sin(theta)])
+    normal = np.array([-direction[1], direction[0]])
 
+    proj = verts @ normal
     spacing = max(1e-6, float(spacing_px))
-    start = np.floor((k_min - float(offset_px)) / spacing) * spacing + float(offset_px)
-
-    segments = []
-    k = start
-    eps = spacing * 1e-6 + 1e-9
-    while k <= k_max + eps:
-        pts = _line_polygon_intersections(vertices, normal, k)
-        if len(pts) >= 2:
-            pts = sorted(pts, key=lambda p: _dot2(p, direction))
-            pair_count = len(pts) // 2
-            for i in range(pair_count):
-                p1 = pts[2 * i]
-                p2 = pts[2 * i + 1]
-                if abs(p1[0] - p2[0]) <= 1e-6 and abs(p1[1] - p2[1]) <= 1e-6:
-                    continue
-                segments.append((p1, p2))
-        k += spacing
-    return segments
-
-def draw_pattern_poly(shape_or_vertices, color, x_px, y_px, *, spacing=None, angle_deg=None, thickness=None, offset=None, base_font_height_px: float | None = None):
+    start = np.floor((proj.min() - float(offset_px)) / spacing) * spacing + float(offset_px)
+    count = int(np.floor((proj.max() + spacing * 1e-6 + 1e-9 - start) / spacing)) + 1
+    if count <= 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    ks = start + np.arange(count) * spacing
+
+    # Signed distance of every vertex to every scanline: (lines, vertices).
+    d = proj[None, :] - ks[:, None]
+    on_line = np.abs(d) <= 1e-9
+    d_next = np.roll(d, -1, axis=1)
+    crosses = (d * d_next < 0.0) & ~on_line & ~np.roll(on_line, -1, axis=1)
+    t = np.divide(d, d - d_next, out=np.zeros_like(d), where=crosses)
+    edge = np.roll(verts, -1, axis=0) - verts
+    cross_pts = verts[None, :, :] + t[:, :, None] * edge[None, :, :]
+
+    # Candidates per line: vertices on the line, then edge crossings.
+    pts = np.concatenate([np.broadcast_to(verts, cross_pts.shape), cross_pts], axis=1)
+    valid = np.concatenate([on_line, crosses], axis=1)
+    along = np.where(valid, pts @ direction, np.inf)
+    order = np.argsort(along, axis=1, kind="stable")
+    pts = np.take_along_axis(pts, order[:, :, None], axis=1)
+    valid = np.take_along_axis(valid, order, axis=1)
+
+    rounded = np.round(pts, 6)
+    dup = np.zeros_like(valid)
+    dup[:, 1:] = valid[:, 1:] & valid[:, :-1] & np.all(rounded[:, 1:] == rounded[:, :-1], axis=2)
+    valid &= ~dup
+    order = np.argsort(~valid, axis=1, kind="stable")
+    pts = np.take_along_axis(pts, order[:, :, None], axis=1)
+    n_valid = valid.sum(axis=1)
+
+    pairs = pts.shape[1] // 2
+    p1 = pts[:, 0 : pairs * 2 : 2]
+    p2 = pts[:, 1 : pairs * 2 : 2]
+    keep = (np.arange(pairs)[None, :] < (n_valid // 2)[:, None]) & np.any(np.abs(p1 - p2) > 1e-6, axis=2)
+    return np.concatenate([p1[keep], p2[keep]], axis=1)
+
+def _hatch_segments_cached(local, x_px, y_px, spacing_px, angle_deg, offset_px):
+    """Hatch segments for local vertices placed at (x_px, y_px), reusing geometry across moves and phases."""
+    theta = np.deg2rad(float(angle_deg))
+    shift = float(x_px) * -np.sin(theta) + float(y_px) * np.cos(theta)
+    phase = round((float(offset_px) - shift) % spacing_px, 6)
+    if phase >= spacing_px:
+        phase = 0.0
+    key = (local.shape, local.tobytes(), float(spacing_px), float(angle_deg), phase)
+    segments = _hatch_cache.lookup(key)
+    if segments is _MISSING:
+        segments = _build_hatch_segments(local, spacing_px, angle_deg, phase)
+        segments.flags.writeable = False
+        _hatch_cache[key] = segments
+    return segments + (float(x_px), float(y_px), float(x_px), float(y_px))
+
+PATTERN_MODES = ("lines", "raster")
+
+def draw_pattern_poly(shape_or_vertices, color, x_px, y_px, *, spacing=None, angle_deg=None, thickness=None, offset=None, mode=None, base_font_height_px: float | None = None):
+    """Hatch-fill a polygon.
+
+    - mode="lines" (default) queues clipped line segments.
+    - mode="raster" blits a cached stripe tile clipped by the polygon mask; cost does not grow with
+      pattern density, and animated offsets only scroll the tile origin (pixel-snapped).
+    """
     opts = _resolve_opts(
         "pattern",
         {
@@ -1427,34 +3790,43 @@ def draw_pattern_poly(shape_or_vertices, color, x_px, y_px, *, spacing=None, ang
             "angle_deg": angle_deg,
             "thickness": thickness,
             "offset": offset,
+            "mode": mode,
             "base_font_height_px": base_font_height_px,
         },
     )
 
-    if isinstance(shape_or_vertices, str):
-        shape = poly_shapes.get(shape_or_vertices)
-        if shape is None:
-            return False
-        vertices_px = shape.vertices_px
-        base_h = shape.base_font_height_px if opts["base_font_height_px"] is None else float(opts["base_font_height_px"])
-    else:
-        vertices_px = tuple((float(x), float(y)) for x, y in shape_or_vertices)
-        base_h = float(opts["base_font_height_px"] if opts["base_font_height_px"] is not None else (char_resolution[0] or 1))
+    source, base_h = _resolve_poly_source(shape_or_vertices, opts["base_font_height_px"])
+    if source is None:
+        return False
 
-    local = _poly_local_vertices_scaled(vertices_px, base_h)
-    abs_v = [(float(x_px) + x, float(y_px) + y) for x, y in local]
+    local, _, (x0, y0, x1, y1) = _poly_scaled(source, base_h)
 
     spacing_px = max(1.0, _design_px_to_render_px(opts["spacing"], base_h))
     thickness_units = max(0.1, _design_px_to_thickness_units(opts["thickness"], base_h))
     offset_px = _design_px_to_render_px(opts["offset"], base_h)
-    segments = _build_hatch_segments(abs_v, spacing_px, float(opts["angle_deg"]), offset_px)
-
-    c_idx = _resolve_color(color)
-    for p1, p2 in segments:
-        line_queue.append((p1[0], p1[1], p2[0], p2[1], c_idx, thickness_units))
+    if len(local) < 3:
+        return True
+    pad = _line_pad(thickness_units)
+    clip = _clip_for(x_px + x0 - pad, y_px + y0 - pad, x_px + x1 + pad, y_px + y1 + pad)
+    if clip is None:
+        return True
+    if str(opts["mode"]).strip().lower() == "raster":
+        abs_v = tuple(map(tuple, (local + (float(x_px), float(y_px))).tolist()))
+        angle = float(opts["angle_deg"])
+        pattern_queue.append((abs_v, spacing_px, angle, thickness_units, offset_px, _resolve_color(color)), clip)
+        return True
+    segments = _hatch_segments_cached(local, x_px, y_px, spacing_px, float(opts["angle_deg"]), offset_px)
+
+    if len(segments):
+        c_idx = _resolve_color(color)
+        rows = np.empty((len(segments), 6), dtype=np.float64)
+        rows[:, :4] = segments
+        rows[:, 4] = c_idx
+        rows[:, 5] = thickness_units
+        line_queue.extend(rows, clip)
     return True
 
-def draw_pattern_rect(color, x_px, y_px, w_px, h_px, *, spacing=None, angle_deg=None, thickness=None, offset=None, base_font_height_px: float | None = None):
+def draw_pattern_rect(color, x_px, y_px, w_px, h_px, *, spacing=None, angle_deg=None, thickness=None, offset=None, mode=None, base_font_height_px: float | None = None):
     verts = [(0, 0), (w_px, 0), (w_px, h_px), (0, h_px)]
     return draw_pattern_poly(
         verts,
@@ -1465,6 +3837,7 @@ def draw_pattern_rect(color, x_px, y_px, w_px, h_px, *, spacing=None, angle_deg=
         angle_deg=angle_deg,
         thickness=thickness,
         offset=offset,
+        mode=mode,
         base_font_height_px=base_font_height_px,
     )
 # endregion
@@ -1487,31 +3860,41 @@ def _clear_wide_neighbors(y, x):
         screen[y][x + 1] = ' '
         screen_color[y][x + 1] = 0
 
+def _cell_layout(text):
+    """Row of cells for `text`: each wide char followed by WIDE_CONT, stray WIDE_CONT blanked."""
+    if text.isascii():
+        return text
+    key = ("cells", text)
+    cells = _text_layout_cache.lookup(key)
+    if cells is _MISSING:
+        cells = "".join(
+            ch + WIDE_CONT if _cell_width(ch) == 2 else (" " if ch == WIDE_CONT else ch) for ch in text
+        )
+        _text_layout_cache[key] = cells
+    return cells
+
+def _cells_array(cells):
+    return np.frombuffer(cells.encode("utf-32-le"), dtype="<U1")
+
+# Vertical runs shorter than this write cell by cell; fancy indexing only pays off on longer columns.
+_HSTATIC_VECTOR_MIN = 8
+
 def static(x, y, color, content):
     if not (0 <= y < row_column_resolution[1]): return False
     c_idx = _resolve_color(color)
     cols = row_column_resolution[0]
     col = int(x)
+    y = int(y)
     text = content if isinstance(content, str) else str(content)
-    for raw_char in text:
-        if not (0 <= col < row_column_resolution[0]):
-            break
-        char = _normalize_cell_char(raw_char)
-        if char == WIDE_CONT:
-            char = ' '
-
-        _clear_wide_neighbors(y, col)
-        if _is_wide_char(char) and col + 1 < cols:
-            _clear_wide_neighbors(y, col + 1)
-            screen[y][col] = char
-            screen_color[y][col] = c_idx
-            screen[y][col + 1] = WIDE_CONT
-            screen_color[y][col + 1] = c_idx
-            col += 2
-        else:
-            screen[y][col] = char
-            screen_color[y][col] = c_idx
-            col += 1
+    if not (0 <= col < cols) or not text:
+        return True
+    cells = _cell_layout(text)[:cols - col]
+    end = col + len(cells)
+    # Only the run's edges can split a wide pair outside the written span.
+    _clear_wide_neighbors(y, col)
+    _clear_wide_neighbors(y, end - 1)
+    screen[y, col:end] = _cells_array(cells)
+    screen_color[y, col:end] = c_idx
     return True
 
 def hstatic(x, y, color, content, line_step=1):
@@ -1524,25 +3907,40 @@ def hstatic(x, y, color, content, line_step=1):
     cols = row_column_resolution[0]
     rows = row_column_resolution[1]
     text = content if isinstance(content, str) else str(content)
+    if not (0 <= row < rows) or not text:
+        return True
+    text = text[:(rows - 1 - row) // step + 1]
+    if WIDE_CONT in text:
+        text = text.replace(WIDE_CONT, " ")
+    if len(text) < _HSTATIC_VECTOR_MIN:
+        for char in text:
+            _clear_wide_neighbors(row, col)
+            if col + 1 < cols and _cell_width(char) == 2:
+                _clear_wide_neighbors(row, col + 1)
+                screen[row, col + 1] = WIDE_CONT
+                screen_color[row, col + 1] = c_idx
+            screen[row, col] = char
+            screen_color[row, col] = c_idx
+            row += step
+        return True
 
-    for raw_char in text:
-        if not (0 <= row < rows):
-            break
-        char = _normalize_cell_char(raw_char)
-        if char == WIDE_CONT:
-            char = ' '
-
-        _clear_wide_neighbors(row, col)
-        if _is_wide_char(char) and col + 1 < cols:
-            _clear_wide_neighbors(row, col + 1)
-            screen[row][col] = char
-            screen_color[row][col] = c_idx
-            screen[row][col + 1] = WIDE_CONT
-            screen_color[row][col + 1] = c_idx
-        else:
-            screen[row][col] = char
-            screen_color[row][col] = c_idx
-        row += step
+    # One fancy-index pass per column; pairs needing _clear_wide_neighbors are rare, so handle those per row.
+    ys = np.arange(row, row + len(text) * step, step)
+    touched = screen[ys, col] == WIDE_CONT
+    if col + 1 < cols:
+        touched |= screen[ys, col + 1] == WIDE_CONT
+    for r in ys[touched]:
+        _clear_wide_neighbors(int(r), col)
+    if col + 1 < cols and not text.isascii():
+        wide = np.fromiter((_cell_width(ch) == 2 for ch in text), dtype=bool, count=len(text))
+        if wide.any():
+            yw = ys[wide]
+            for r in yw[screen[yw, col + 1] != " "]:
+                _clear_wide_neighbors(int(r), col + 1)
+            screen[yw, col + 1] = WIDE_CONT
+            screen_color[yw, col + 1] = c_idx
+    screen[ys, col] = _cells_array(text)
+    screen_color[ys, col] = c_idx
     return True
 
 def _split_text_lines(text):
@@ -1554,17 +3952,25 @@ def _split_text_lines(text):
     return text.split("\n")
 
 def _measure_line_cells(text):
-    width = 0
-    for raw_char in text:
-        char = _normalize_cell_char(raw_char)
-        if char == WIDE_CONT:
-            char = " "
-        width += 2 if _is_wide_char(char) else 1
-    return width
+    # WIDE_CONT is narrow in the table, matching its blank-cell rendering.
+    return sum(_BMP_CELL_WIDTHS[cp] if cp < 0x10000 else _cell_width(chr(cp)) for cp in map(ord, text))
+
+def _line_has_wide(line):
+    return any(_cell_width(ch) == 2 for ch in line)
 
 def measure_text_cells(text, *, orientation="horizontal", line_step=1):
     orient = str(orientation).strip().lower()
     step = max(1, int(line_step))
+    if text is not None and not isinstance(text, str):
+        text = str(text)
+    key = ("measure", text, orient == "vertical", step)
+    cached = _text_layout_cache.lookup(key)
+    if cached is not _MISSING:
+        return cached
+    _text_layout_cache[key] = size = _measure_text_cells(text, orient, step)
+    return size
+
+def _measure_text_cells(text, orient, step):
     lines = _split_text_lines(text)
     if not lines:
         return (0, 0)
@@ -1572,7 +3978,7 @@ def measure_text_cells(text, *, orientation="horizontal", line_step=1):
         widths = []
         heights = []
         for line in lines:
-            widths.append(2 if any(_is_wide_char(_normalize_cell_char(ch)) for ch in line) else 1)
+            widths.append(2 if _line_has_wide(line) else 1)
             height = 1 + (len(line) - 1) * step if line else 0
             heights.append(height)
         total_w = sum(widths)
@@ -1585,13 +3991,23 @@ def measure_text_cells(text, *, orientation="horizontal", line_step=1):
 def _truncate_line_to_cells(text, max_cells):
     if max_cells <= 0:
         return ""
+    key = ("truncate", text, int(max_cells))
+    cached = _text_layout_cache.lookup(key)
+    if cached is not _MISSING:
+        return cached
+    _text_layout_cache[key] = out = _truncate_line(text, max_cells)
+    return out
+
+def _truncate_line(text, max_cells):
+    if _measure_line_cells(text) <= max_cells:
+        return text.replace(WIDE_CONT, " ") if WIDE_CONT in text else text
     out = []
     used = 0
     for raw_char in text:
         char = _normalize_cell_char(raw_char)
         if char == WIDE_CONT:
             char = " "
-        wide = _is_wide_char(char)
+        wide = _cell_width(char) == 2
         if wide:
             if used + 2 <= max_cells:
                 out.append(char)
@@ -1641,30 +4057,44 @@ def draw_text_box(
 ):
     """Draw text within a grid-aligned box using integer cell coordinates."""
     orient = str(orientation).strip().lower()
-    lines = _split_text_lines(text)
-    if not lines:
+    if text is not None and not isinstance(text, str):
+        text = str(text)
+    if not text:
         return False
-    gw = int(gw)
-    gh = int(gh)
-    text_w, text_h = measure_text_cells(text, orientation=orient, line_step=line_step)
-    start_x = _align_start(int(gx), gw, text_w, align_h)
-    start_y = _align_start(int(gy), gh, text_h, align_v)
+    gx = int(gx)
+    gy = int(gy)
     step = max(1, int(line_step))
+    key = ("box", text, int(gw), int(gh), align_h, align_v, orient == "vertical", step)
+    ops = _text_layout_cache.lookup(key)
+    if ops is _MISSING:
+        _text_layout_cache[key] = ops = _layout_text_box(text, int(gw), int(gh), align_h, align_v, orient, step)
+    if orient == "vertical":
+        for dx, dy, chunk in ops:
+            hstatic(gx + dx, gy + dy, color, chunk, line_step=step)
+    else:
+        for dx, dy, chunk in ops:
+            static(gx + dx, gy + dy, color, chunk)
+    return True
+
+def _layout_text_box(text, gw, gh, align_h, align_v, orient, step):
+    """Return box-relative (dx, dy, chunk) placements for draw_text_box."""
+    lines = _split_text_lines(text)
+    text_w, text_h = measure_text_cells(text, orientation=orient, line_step=step)
+    start_x = _align_start(0, gw, text_w, align_h)
+    start_y = _align_start(0, gh, text_h, align_v)
+    ops = []
     if orient == "vertical":
         x = start_x
         for line in lines:
-            col_width = 2 if any(_is_wide_char(_normalize_cell_char(ch)) for ch in line) else 1
-            truncated = _truncate_vertical(line, gh, step)
-            hstatic(x, start_y, color, truncated, line_step=step)
-            x += col_width
-        return True
+            ops.append((x, start_y, _truncate_vertical(line, gh, step)))
+            x += 2 if _line_has_wide(line) else 1
+        return tuple(ops)
     for idx, line in enumerate(lines):
         y = start_y + idx * step
-        if y >= int(gy) + gh:
+        if y >= gh:
             break
-        truncated = _truncate_line_to_cells(line, gw)
-        static(start_x, y, color, truncated)
-    return True
+        ops.append((start_x, y, _truncate_line_to_cells(line, gw)))
+    return tuple(ops)
 
 def _get_glyph_bitmap_custom(ch, wide, cell_w, cell_h):
     font = _font_cjk if wide and _font_cjk is not None else _font_ascii
@@ -1673,33 +4103,11 @@ def _get_glyph_bitmap_custom(ch, wide, cell_w, cell_h):
         return None
     span_w = cell_w * (2 if wide else 1)
     key = (ch, wide, cell_h, span_w, font_path)
-    if key in _glyph_cache_custom:
-        return _glyph_cache_custom[key]
-    surf, _ = font.render(ch, fgcolor=(255, 255, 255), bgcolor=None)
-    alpha = pygame.surfarray.array_alpha(surf)
-    surf_w, surf_h = surf.get_size()
-    if alpha.shape == (surf_w, surf_h):
-        alpha = alpha.T
-    h, w = alpha.shape
-    if h == 0 or w == 0:
-        _glyph_cache_custom[key] = None
-        return None
-    scale = min(span_w / w, cell_h / h, 1.0)
-    if scale < 1.0:
-        new_w = max(1, int(round(w * scale)))
-        new_h = max(1, int(round(h * scale)))
-        y_idx = (np.arange(new_h) * (h / new_h)).astype(int).clip(0, h - 1)
-        x_idx = (np.arange(new_w) * (w / new_w)).astype(int).clip(0, w - 1)
-        scaled = alpha[np.ix_(y_idx, x_idx)]
-    else:
-        scaled = alpha
-    h2, w2 = scaled.shape
-    out = np.zeros((cell_h, span_w), dtype=int)
-    y0 = max(0, (cell_h - h2) // 2)
-    x0 = max(0, (span_w - w2) // 2)
-    out[y0 : y0 + h2, x0 : x0 + w2] = (scaled > 0).astype(int)
-    _glyph_cache_custom[key] = out
-    return out
+    cached = _glyph_cache_get(_glyph_cache_custom, key)
+    if cached is not _MISSING:
+        return cached
+    bmp = _load_glyph(font, font_path, ch, wide, cell_h, cell_w)
+    return _glyph_cache_put(_glyph_cache_custom, key, bmp)
 
 def _measure_super_text_px(text, cell_w, cell_h, *, scale=1, line_step=1):
     lines = _split_text_lines(text)
@@ -1715,7 +4123,7 @@ def _measure_super_text_px(text, cell_w, cell_h, *, scale=1, line_step=1):
     height_px = cell_h_px + (len(lines) - 1) * step * cell_h_px
     return (max(widths) if widths else 0, height_px)
 
-super_text_queue = []
+super_text_queue = _ItemQueue()
 
 def draw_super_text_px(
     x_px,
@@ -1738,9 +4146,12 @@ def draw_super_text_px(
     if text == "":
         return False
     use_mode = None if mode is None else str(mode).strip().lower()
-    if use_mode == "5x7":
-        cell_w = 5
-        cell_h = 7
+    font_name = None
+    if use_mode in BUILTIN_BITMAP_FONTS:
+        font_name = use_mode
+        font = get_builtin_bitmap_font(font_name)
+        cell_w = font.cell_w
+        cell_h = font.cell_h
         scale = 1
     else:
         cell_h, cell_w = char_resolution
@@ -1764,26 +4175,15 @@ def draw_super_text_px(
         max_lines = max(0, 1 + (int(box_h_px) - cell_h_px) // (step * cell_h_px))
         lines = lines[:max_lines]
     for line_idx, line in enumerate(lines):
-        line_x = x_px
-        line_y = y_px + line_idx * step * cell_h_px
-        col_offset_px = 0
-        for raw_char in line:
-            char = _normalize_cell_char(raw_char)
-            if char == WIDE_CONT:
-                char = " "
-            wide = _is_wide_char(char)
-            bmp = _get_glyph_bitmap_custom(char, wide, cell_w, cell_h)
-            if bmp is not None:
-                super_text_queue.append(
-                    (
-                        int(line_x + col_offset_px),
-                        int(line_y),
-                        bmp,
-                        int(c_idx),
-                        int(scale),
-                    )
-                )
-            col_offset_px += cell_w_px * (2 if wide else 1)
+        if not line:
+            continue
+        # One queue item per line; the line is rendered once and reused while it stays in the run cache.
+        run = (line, cell_w, cell_h, _measure_line_cells(line) * cell_w, cell_h, font_name)
+        line_y = int(y_px + line_idx * step * cell_h_px)
+        k = PIXEL_SCALE * scale
+        clip = _clip_for(x_px, line_y, x_px + run[3] * k, line_y + run[4] * k)
+        if clip is not None:
+            super_text_queue.append((x_px, line_y, run, int(c_idx), int(scale)), clip)
     return True
 
 def ani_char(x, y, color, animation, local_offset=None, global_offset=None, slowdown=None):
@@ -1809,7 +4209,11 @@ def draw_box(gx, gy, gw, gh, color, padding=None, thickness=None):
     pad = opts["padding"]
     thick = opts["thickness"]
     p1, p2, p3, p4 = grid_to_px(gx,gy,-pad,-pad), grid_to_px(gx+gw,gy,pad,-pad), grid_to_px(gx,gy+gh,-pad,pad), grid_to_px(gx+gw,gy+gh,pad,pad)
-    line_queue.extend([(p1[0],p1[1],p2[0],p2[1],c,thick), (p3[0],p3[1],p4[0],p4[1],c,thick), (p1[0],p1[1],p3[0],p3[1],c,thick), (p2[0],p2[1],p4[0],p4[1],c,thick)])
+    pad = _line_pad(thick)
+    clip = _clip_for(min(p1[0], p3[0]) - pad, min(p1[1], p2[1]) - pad, max(p2[0], p4[0]) + pad, max(p3[1], p4[1]) + pad)
+    if clip is None:
+        return
+    line_queue.extend([(p1[0],p1[1],p2[0],p2[1],c,thick), (p3[0],p3[1],p4[0],p4[1],c,thick), (p1[0],p1[1],p3[0],p3[1],c,thick), (p2[0],p2[1],p4[0],p4[1],c,thick)], clip)
 
 # endregion
 
@@ -1824,6 +4228,8 @@ STABLE_API = (
     "get_layout_mode",
     "get_layout_mode_colors",
     "get_window_size_px",
+    "get_render_size_px",
+    "get_present_size_px",
     "get_window_flags",
     "set_fonts",
     "set_font",
@@ -1882,6 +4288,34 @@ STABLE_API = (
 EXPERIMENTAL_API = (
     "list_focus_scopes",
     "grid_rect_to_px",
+    "get_dirty_rects",
+    "mark_full_redraw",
+    "frame_fingerprint",
+    "FrameSnapshot",
+    "draw_snapshot_to_surface",
+    "create_render_surface",
+    "close_band_rasterizer",
+    "get_surface_palette",
+    "rotate_palette_range",
+    "present_scaled",
+    "get_memory_stats",
+    "get_glyph_cache_stats",
+    "get_overlay_queue_stats",
+    "reset_glyph_cache_stats",
+    "flush_glyph_disk_cache",
+    "load_bitmap_font",
+    "get_builtin_bitmap_font",
+    "prewarm_glyphs",
+    "wait_glyph_prewarm",
+    "draw_rects",
+    "draw_lines",
+    "draw_polys",
+    "gx_array",
+    "gy_array",
+    "grid_to_px_array",
+    "push_clip_rect",
+    "pop_clip_rect",
+    "get_clip_rect",
 )
 
 LEGACY_INTERNAL_API = (
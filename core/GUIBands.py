@@ -0,0 +1,256 @@
+"""
+Band rasterizer for GUI rasterizer="bands".
+
+The text layer is split into horizontal bands of cell rows; each band is drawn by a worker
+process straight into a shared-memory RGB framebuffer that the main process wraps as a pygame
+surface (no copy). Workers import only NumPy: the glyph atlas, per-frame glyph id / color grids
+and the framebuffers are all `multiprocessing.shared_memory` blocks, published by the main
+process and attached read-only (atlas, grids) or for band writes (framebuffer) by name.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def raster_band(atlas, grid, out, palette, params, r0, r1):
+    """Draw text-layer cell rows r0:r1 into out, matching GUI._draw_text_layer_numpy pixel for pixel.
+
+    atlas: (N, ch_h, 2 * ch_w) uint8; grid: (4, rows, cols) int32 planes of glyph id, right-half
+    glyph id, cell color and continuation flag; out: (H, W, 3) uint8 framebuffer.
+    """
+    ch_h, ch_w, sp_x, sp_y, pad, scale = params
+    n = r1 - r0
+    if n <= 0:
+        return
+    cols = grid.shape[2]
+    gid = grid[0, r0:r1]
+    gid_right = grid[1, r0:r1]
+    cell_color = grid[2, r0:r1].astype(np.uint8)
+    cont = grid[3, r0:r1].astype(bool)
+    blocks = atlas[gid, :, :ch_w] | atlas[gid_right, :, ch_w:]
+    raw = blocks.transpose(0, 2, 1, 3).reshape(n * ch_h, cols * ch_w)
+
+    raw_x = np.arange(cols * ch_w)
+    raw_y = np.arange(n * ch_h)
+    tx = (raw_x // ch_w) * (ch_w + sp_x) + raw_x % ch_w
+    ty = (raw_y // ch_h) * (ch_h + sp_y) + raw_y % ch_h
+    tx_full = np.repeat(tx[None, :] - np.repeat(cont, ch_w, axis=1) * sp_x, ch_h, axis=0)
+    band_h = n * (ch_h + sp_y)
+    band_w = cols * (ch_w + sp_x)
+    mask = np.zeros((band_h, band_w), dtype=bool)
+    colors = np.zeros((band_h, band_w), dtype=np.uint8)
+    mask[ty[:, None], tx_full] = raw != 0
+    colors[ty[:, None], tx_full] = np.repeat(np.repeat(cell_color, ch_h, axis=0), ch_w, axis=1)
+    if scale > 1:
+        mask = np.repeat(np.repeat(mask, scale, axis=0), scale, axis=1)
+        colors = np.repeat(np.repeat(colors, scale, axis=0), scale, axis=1)
+
+    y0 = pad + r0 * (ch_h + sp_y) * scale
+    h = max(0, min(mask.shape[0], out.shape[0] - y0))
+    w = max(0, min(mask.shape[1], out.shape[1] - pad))
+    if h == 0 or w == 0:
+        return
+    lit = mask[:h, :w]
+    if not lit.any():
+        return
+    region = out[y0 : y0 + h, pad : pad + w]
+    region[lit] = palette[colors[:h, :w][lit]]
+
+
+def _worker(jobs, done):
+    attached = {}
+
+    def view(name, shape, dtype):
+        shm = attached.get(name)
+        if shm is None:
+            # Spawned workers share the parent's resource tracker; the parent unlinks every block.
+            shm = attached[name] = shared_memory.SharedMemory(name=name)
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        if job[0] == "forget":
+            shm = attached.pop(job[1], None)
+            if shm is not None:
+                shm.close()
+            continue
+        _, atlas_ref, grid_ref, out_ref, palette, params, r0, r1 = job
+        try:
+            atlas = view(*atlas_ref)
+            grid = view(*grid_ref)
+            out = view(*out_ref)
+            raster_band(atlas, grid, out, palette, params, r0, r1)
+            done.put(None)
+        except BaseException as exc:
+            done.put(repr(exc))
+    for shm in attached.values():
+        shm.close()
+
+
+class _Block:
+    """Main-process owned shared-memory block with an ndarray view."""
+
+    def __init__(self, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def ref(self):
+        return (self.shm.name, self.shape, self.dtype.str)
+
+    def release(self):
+        self.array = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a surface still exports the buffer; the mapping goes away with it
+        self.unlink()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class BandRasterizer:
+    """Pool of band worker processes plus the shared atlas and grid blocks they read.
+
+    rasterize() raises RuntimeError when a worker fails, dies or does not answer within timeout
+    seconds; the pool is torn down first, so the caller only has to draw the frame another way.
+    """
+
+    POLL_S = 0.05
+
+    def __init__(self, workers=0, timeout=5.0):
+        self.workers = int(workers) if workers and int(workers) > 0 else (os.cpu_count() or 1)
+        self.timeout = float(timeout)
+        ctx = mp.get_context("spawn")
+        # One job queue per worker so "forget" notices reach every process exactly once.
+        self._queues = [ctx.Queue() for _ in range(self.workers)]
+        self._done = ctx.Queue()
+        self._procs = [
+            ctx.Process(target=_worker, args=(jobs, self._done), name=f"gui-band-{i}", daemon=True)
+            for i, jobs in enumerate(self._queues)
+        ]
+        for proc in self._procs:
+            proc.start()
+        self._atlas = None
+        self._atlas_key = None
+        self._atlas_count = 0
+        self._grid = None
+        self._targets = {}
+        self.frames = 0
+        self.closed = False
+
+    def create_target(self, size):
+        """Framebuffer block for a (w, h) surface; the caller wraps block.shm.buf with pygame."""
+        w, h = size
+        block = _Block((h, w, 3), np.uint8)
+        self._targets[block.shm.name] = block
+        return block
+
+    def owns(self, block):
+        return self._targets.get(block.shm.name) is block
+
+    def release_target(self, block):
+        if self._targets.pop(block.shm.name, None) is not None:
+            self._forget(block)
+
+    def _forget(self, block):
+        for jobs in self._queues:
+            jobs.put(("forget", block.shm.name))
+        block.release()
+
+    def _publish_atlas(self, atlas, count, key):
+        """Copy new atlas rows into the shared atlas, reallocating when it must grow or was rebuilt."""
+        cap = atlas.shape[0]
+        if self._atlas is None or self._atlas.shape != atlas.shape or self._atlas_key != key or count < self._atlas_count:
+            if self._atlas is not None:
+                self._forget(self._atlas)
+            self._atlas = _Block((cap,) + atlas.shape[1:], np.uint8)
+            self._atlas_count = 0
+            self._atlas_key = key
+        if count > self._atlas_count:
+            self._atlas.array[self._atlas_count : count] = atlas[self._atlas_count : count]
+            self._atlas_count = count
+
+    def rasterize(self, target, atlas, atlas_count, atlas_key, gid, gid_right, cell_color, cont, palette, params):
+        """Draw the text layer into target (a block from create_target) with one band per worker."""
+        self._publish_atlas(atlas, atlas_count, atlas_key)
+        rows, cols = gid.shape
+        if self._grid is None or self._grid.shape != (4, rows, cols):
+            if self._grid is not None:
+                self._forget(self._grid)
+            self._grid = _Block((4, rows, cols), np.int32)
+        planes = self._grid.array
+        planes[0] = gid
+        planes[1] = gid_right
+        planes[2] = cell_color
+        planes[3] = cont
+        palette = np.ascontiguousarray(palette, dtype=np.uint8)
+        bands = np.linspace(0, rows, min(self.workers, rows) + 1).astype(int).tolist()
+        jobs = 0
+        for jobs_queue, r0, r1 in zip(self._queues, bands[:-1], bands[1:]):
+            if r1 > r0:
+                jobs_queue.put(("band", self._atlas.ref, self._grid.ref, target.ref, palette, params, r0, r1))
+                jobs += 1
+        error = self._collect(jobs)
+        if error is not None:
+            self.close(timeout=0)
+            raise RuntimeError(f"band rasterizer {error}")
+        self.frames += 1
+
+    def _collect(self, jobs):
+        """Wait for jobs results; a description of the first failure, or None."""
+        deadline = time.monotonic() + self.timeout
+        error = None
+        while jobs:
+            try:
+                err = self._done.get(timeout=self.POLL_S)
+            except queue.Empty:
+                dead = [proc.name for proc in self._procs if not proc.is_alive()]
+                if dead:
+                    return f"worker {dead[0]} exited"
+                if time.monotonic() >= deadline:
+                    return f"timed out after {self.timeout:g} s"
+                continue
+            jobs -= 1
+            if err is not None and error is None:
+                error = f"worker failed: {err}"
+        return error
+
+    def close(self, timeout=5):
+        if self.closed:
+            return
+        self.closed = True
+        for jobs in self._queues:
+            jobs.put(None)
+            # Never block interpreter exit on a queue whose worker is gone.
+            jobs.cancel_join_thread()
+        for proc in self._procs:
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                proc.kill()
+                proc.join(timeout=1)
+        for block in (self._atlas, self._grid):
+            if block is not None:
+                block.release()
+        # Target surfaces may outlive the pool (they fall back to numpy); keep their mappings until
+        # the surface and its block are collected, only drop the names.
+        for block in self._targets.values():
+            block.unlink()
+        self._atlas = self._grid = None
+        self._targets.clear()
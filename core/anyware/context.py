@@ -43,6 +43,8 @@ TEXT_ORIENTATIONS = ("horizontal", "vertical")
 class FrameInfo:
     frame: int = 0
     dt: float = 0.0
+    # Fraction of a logic step elapsed since the last update, for interpolating motion at render time.
+    alpha: float = 0.0
 
 
 class AnywareContext:
@@ -65,9 +67,10 @@ class AnywareContext:
             missing_csv = ", ".join(missing)
             raise RuntimeError(f"GUI stable API contract missing required entries: {missing_csv}")
 
-    def set_frame_info(self, frame: int, dt: float) -> None:
+    def set_frame_info(self, frame: int, dt: float, alpha: float = 0.0) -> None:
         self.frame.frame = int(frame)
         self.frame.dt = float(dt)
+        self.frame.alpha = min(1.0, max(0.0, float(alpha)))
 
     # Lifecycle
     def begin_frame(self, *, clear_char: str = " ", clear_color=0, reset_overlay: bool = True, advance_frame: bool = True):
@@ -97,6 +100,15 @@ class AnywareContext:
     def grid_to_px(self, gx_value: float, gy_value: float, ox: float = 0, oy: float = 0):
         return GUI.grid_to_px(gx_value, gy_value, ox=ox, oy=oy)
 
+    def gx_array(self, values):
+        return GUI.gx_array(values)
+
+    def gy_array(self, values):
+        return GUI.gy_array(values)
+
+    def grid_to_px_array(self, gx_values, gy_values, ox=0, oy=0):
+        return GUI.grid_to_px_array(gx_values, gy_values, ox=ox, oy=oy)
+
     # Text and drawing wrappers
     def clear_screen(self, char: str = " ", color=0):
         return GUI.clear_screen(char=char, color=color)
@@ -155,6 +167,9 @@ class AnywareContext:
         orient = self._normalize_text_orientation(orientation)
         return GUI.measure_text_cells(text, orientation=orient, line_step=line_step)
 
+    def prewarm_glyphs(self, chars, *, background: bool = True) -> int:
+        return GUI.prewarm_glyphs(chars, background=background)
+
     def draw_text_box(
         self,
         gx: int,
@@ -249,7 +264,23 @@ class AnywareContext:
             base_font_height_px=base_font_height_px,
         )
 
-    def draw_pattern_rect(self, color, x_px: float, y_px: float, w_px: float, h_px: float, *, spacing=None, angle_deg=None, thickness=None, offset=None, base_font_height_px=None):
+    def draw_rects(self, color, rects, *, filled=None, thickness=None, base_font_height_px=None) -> int:
+        return GUI.draw_rects(color, rects, filled=filled, thickness=thickness, base_font_height_px=base_font_height_px)
+
+    def draw_lines(self, color, segments, *, thickness=None) -> int:
+        return GUI.draw_lines(color, segments, thickness=thickness)
+
+    def draw_polys(self, shape_or_vertices, color, positions, *, filled=None, thickness=None, base_font_height_px=None) -> int:
+        return GUI.draw_polys(
+            shape_or_vertices,
+            color,
+            positions,
+            filled=filled,
+            thickness=thickness,
+            base_font_height_px=base_font_height_px,
+        )
+
+    def draw_pattern_rect(self, color, x_px: float, y_px: float, w_px: float, h_px: float, *, spacing=None, angle_deg=None, thickness=None, offset=None, mode=None, base_font_height_px=None):
         return GUI.draw_pattern_rect(
             color,
             x_px,
@@ -260,10 +291,11 @@ class AnywareContext:
             angle_deg=angle_deg,
             thickness=thickness,
             offset=offset,
+            mode=mode,
             base_font_height_px=base_font_height_px,
         )
 
-    def draw_pattern_poly(self, shape_or_vertices, color, x_px: float, y_px: float, *, spacing=None, angle_deg=None, thickness=None, offset=None, base_font_height_px=None):
+    def draw_pattern_poly(self, shape_or_vertices, color, x_px: float, y_px: float, *, spacing=None, angle_deg=None, thickness=None, offset=None, mode=None, base_font_height_px=None):
         return GUI.draw_pattern_poly(
             shape_or_vertices,
             color,
@@ -273,9 +305,19 @@ class AnywareContext:
             angle_deg=angle_deg,
             thickness=thickness,
             offset=offset,
+            mode=mode,
             base_font_height_px=base_font_height_px,
         )
 
+    def push_clip_rect(self, x_px: float, y_px: float, w_px: float, h_px: float):
+        return GUI.push_clip_rect(x_px, y_px, w_px, h_px)
+
+    def pop_clip_rect(self):
+        return GUI.pop_clip_rect()
+
+    def get_clip_rect(self):
+        return GUI.get_clip_rect()
+
     # Focus wrappers
     def key_to_focus_direction(self, key):
         return GUI.key_to_focus_direction(key)
@@ -195,22 +195,14 @@ class MeterBar(Component):
         inner_h = max(0.0, h - self.padding_px * 2)
         if inner_w <= 0 or inner_h <= 0:
             return
+        colors = [self.color if i < filled else self.empty_color for i in range(count)]
         if self.orientation == "vertical":
             seg_h = (inner_h - self.gap_px * (count - 1)) / count
-            for i in range(count):
-                seg_y = inner_y + (count - 1 - i) * (seg_h + self.gap_px)
-                color = self.color if i < filled else self.empty_color
-                if color is None:
-                    continue
-                ctx.draw_rect(color, inner_x, seg_y, inner_w, seg_h, filled=True, thickness=1)
-            return
-        seg_w = (inner_w - self.gap_px * (count - 1)) / count
-        for i in range(count):
-            seg_x = inner_x + i * (seg_w + self.gap_px)
-            color = self.color if i < filled else self.empty_color
-            if color is None:
-                continue
-            ctx.draw_rect(color, seg_x, inner_y, seg_w, inner_h, filled=True, thickness=1)
+            rects = [(inner_x, inner_y + (count - 1 - i) * (seg_h + self.gap_px), inner_w, seg_h) for i in range(count)]
+        else:
+            seg_w = (inner_w - self.gap_px * (count - 1)) / count
+            rects = [(inner_x + i * (seg_w + self.gap_px), inner_y, seg_w, inner_h) for i in range(count)]
+        ctx.draw_rects(colors, rects, filled=True, thickness=1)
 
     def render(self, ctx) -> None:
         if not self.visible:
@@ -597,21 +589,29 @@ class SegmentDisplay(Component):
             polys[name] = [(float(x) * self.digit_w_px, float(y) * self.digit_h_px) for x, y in poly]
         return polys
 
-    def _draw_poly(self, ctx, x, y, poly, color):
-        if not poly:
-            return
-        shifted = [(x + px, y + py) for px, py in poly]
-        ctx.draw_poly(shifted, color, 0.0, 0.0, filled=True, thickness=1)
-
-    def _draw_digit(self, ctx, x, y, ch: str, dp: bool, polys):
+    def _digit_polys(self, x, y, ch: str, dp: bool, polys, out: list) -> None:
+        """Append (shifted polygon, color) for each drawn segment of one digit."""
         segments_on = self._segments_for_char(ch)
-        for name in ("A", "B", "C", "D", "E", "F", "G"):
-            color = self.on_color if name in segments_on else self.off_color
-            if color is None:
-                continue
-            self._draw_poly(ctx, x, y, polys.get(name, []), color)
+        names = ["A", "B", "C", "D", "E", "F", "G"]
+        colors = [self.on_color if name in segments_on else self.off_color for name in names]
         if dp:
-            self._draw_poly(ctx, x, y, polys.get("DP", []), self.on_color)
+            names.append("DP")
+            colors.append(self.on_color)
+        for name, color in zip(names, colors):
+            poly = polys.get(name, [])
+            if color is None or not poly:
+                continue
+            out.append(([(x + px, y + py) for px, py in poly], color))
+
+    def _draw_polys(self, ctx, items: list) -> None:
+        # One batched call per vertex count (custom segment_polys may mix shapes).
+        groups: dict[int, tuple[list, list]] = {}
+        for poly, color in items:
+            verts, colors = groups.setdefault(len(poly), ([], []))
+            verts.append(poly)
+            colors.append(color)
+        for verts, colors in groups.values():
+            ctx.draw_polys(verts, colors, [(0.0, 0.0)] * len(verts), filled=True, thickness=1)
 
     def render(self, ctx) -> None:
         if not self.visible:
@@ -621,6 +621,8 @@ class SegmentDisplay(Component):
         x0 = ctx.gx(self.gx)
         y0 = ctx.gy(self.gy)
         polys = self._resolve_segment_polys()
+        items: list = []
         for idx, info in enumerate(digits):
             x = x0 + idx * (self.digit_w_px + self.spacing_px)
-            self._draw_digit(ctx, x, y0, info["char"], info["dp"], polys)
+            self._digit_polys(x, y0, info["char"], info["dp"], polys, items)
+        self._draw_polys(ctx, items)
@@ -200,6 +200,7 @@ def _resolve_style(
             "pattern_angle_deg",
             "pattern_thickness",
             "pattern_offset",
+            "pattern_mode",
             "pattern_outline",
         }:
             resolved[key] = value
@@ -280,10 +281,27 @@ _STATE_STYLE_KEYS = {
     "pattern_angle_deg",
     "pattern_thickness",
     "pattern_offset",
+    "pattern_mode",
     "pattern_outline",
 }
 
 
+def _plan_text(plan: LayoutRenderPlan) -> str:
+    """Static text of a compiled plan (element text/labels and component labels) for glyph prewarm."""
+    parts: list[str] = []
+    for item in plan.drawables:
+        element = item.get("element") or {}
+        for key in ("text", "label"):
+            value = element.get(key)
+            if isinstance(value, str):
+                parts.append(value)
+    for component in plan.components:
+        label = getattr(component, "label", None)
+        if isinstance(label, str):
+            parts.append(label)
+    return "".join(parts)
+
+
 def _apply_state_style(base: dict[str, Any], overlay: dict[str, Any] | None) -> dict[str, Any]:
     if not isinstance(overlay, dict) or not overlay:
         return base
@@ -663,6 +681,7 @@ def render_layout(ctx, plan: LayoutRenderPlan, *, bindings: Any = None) -> None:
             angle_deg = pattern_opts.get("angle_deg", style.get("pattern_angle_deg"))
             pattern_thickness = pattern_opts.get("thickness", style.get("pattern_thickness"))
             offset = pattern_opts.get("offset", style.get("pattern_offset"))
+            pattern_mode = pattern_opts.get("mode", style.get("pattern_mode"))
             pattern_color = pattern_opts.get("color", style.get("pattern_color", line_color))
             pattern_outline = pattern_opts.get("outline", style.get("pattern_outline", True))
 
@@ -687,6 +706,7 @@ def render_layout(ctx, plan: LayoutRenderPlan, *, bindings: Any = None) -> None:
                     angle_deg=angle_deg,
                     thickness=pattern_thickness,
                     offset=offset,
+                    mode=pattern_mode,
                 )
                 if pattern_outline:
                     ctx.draw_rect(
@@ -737,6 +757,7 @@ def render_layout(ctx, plan: LayoutRenderPlan, *, bindings: Any = None) -> None:
             angle_deg = pattern_opts.get("angle_deg", style.get("pattern_angle_deg"))
             pattern_thickness = pattern_opts.get("thickness", style.get("pattern_thickness"))
             offset = pattern_opts.get("offset", style.get("pattern_offset"))
+            pattern_mode = pattern_opts.get("mode", style.get("pattern_mode"))
             pattern_color = pattern_opts.get("color", style.get("pattern_color", line_color))
             pattern_outline = pattern_opts.get("outline", style.get("pattern_outline", True))
 
@@ -759,6 +780,7 @@ def render_layout(ctx, plan: LayoutRenderPlan, *, bindings: Any = None) -> None:
                     angle_deg=angle_deg,
                     thickness=pattern_thickness,
                     offset=offset,
+                    mode=pattern_mode,
                 )
                 if pattern_outline:
                     ctx.draw_poly(
@@ -927,6 +949,9 @@ class LayoutPage(Page):
             return
         self._layout.error = None
         self._plan = plan
+        prewarm = getattr(ctx, "prewarm_glyphs", None)
+        if prewarm is not None:
+            prewarm(_plan_text(plan))
         self.set_components(ctx, self._plan.components)
 
     def set_components(self, ctx, components, *, ensure_focus: bool = True) -> None:
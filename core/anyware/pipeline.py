@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import queue
+import threading
+
+from core import GUI
+
+
+class RasterPipeline:
+    """
+    Double-buffered raster worker.
+
+    The main thread captures each finished frame into one of two preallocated
+    GUI.FrameSnapshot slots and keeps building the next frame; a worker thread
+    rasterizes the slot into that slot's offscreen surface. The main thread only
+    blits/presents completed surfaces, one frame behind.
+    """
+
+    SLOTS = 2
+
+    def __init__(self):
+        self._snapshots = [GUI.FrameSnapshot() for _ in range(self.SLOTS)]
+        self._surfaces = [None] * self.SLOTS
+        self._free = [threading.Event() for _ in range(self.SLOTS)]
+        for event in self._free:
+            event.set()
+        self._jobs: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._next = 0
+        self._submitted = 0
+        self._completed = None  # (sequence, slot) of the newest rasterized frame
+        self._taken = 0
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._work, name="anyware-raster", daemon=True)
+        self._thread.start()
+
+    def submit(self) -> None:
+        """Snapshot the live frame and queue it for rasterization (waits if both slots are busy)."""
+        self._raise_worker_error()
+        slot = self._next
+        self._free[slot].wait()
+        self._free[slot].clear()
+        with self._lock:
+            # An untaken frame in this slot is about to be overwritten; newer frames are already queued.
+            if self._completed is not None and self._completed[1] == slot:
+                self._taken = max(self._taken, self._completed[0])
+        self._snapshots[slot].capture()
+        size = GUI.get_render_size_px()
+        surface = self._surfaces[slot]
+        if surface is None or surface.get_size() != size:
+            self._surfaces[slot] = GUI.create_render_surface(size)
+        self._submitted += 1
+        self._jobs.put((self._submitted, slot))
+        self._next = (slot + 1) % self.SLOTS
+
+    def take_completed(self):
+        """(surface, frame) of the newest finished frame not taken yet, else None.
+
+        The surface stays valid until the next submit() reuses its slot.
+        """
+        self._raise_worker_error()
+        with self._lock:
+            done = self._completed
+        if done is None or done[0] <= self._taken:
+            return None
+        self._taken, slot = done
+        return self._surfaces[slot], self._snapshots[slot].frame
+
+    def flush(self) -> None:
+        """Block until every submitted frame is rasterized (e.g. before fonts or geometry change)."""
+        for event in self._free:
+            event.wait()
+        self._raise_worker_error()
+
+    def close(self) -> None:
+        self.flush()
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _work(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            seq, slot = job
+            try:
+                GUI.draw_snapshot_to_surface(self._snapshots[slot], self._surfaces[slot])
+                with self._lock:
+                    self._completed = (seq, slot)
+            except BaseException as exc:  # surfaced on the main thread by the next call
+                self._error = exc
+            finally:
+                self._free[slot].set()
+
+    def _raise_worker_error(self) -> None:
+        if self._error is not None:
+            exc, self._error = self._error, None
+            raise RuntimeError("raster worker failed") from exc
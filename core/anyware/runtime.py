@@ -2,15 +2,28 @@ from __future__ import annotations
 
 import time
 
+import numpy as np
 import pygame
+import pygame.freetype
 
 from core import GUI
 from .context import AnywareContext
 from .page import Page, PageStack
+from .pipeline import RasterPipeline
+
+# Slack when comparing accumulated time against the logic step (float sums of 1/fps drift below it).
+_TIME_EPSILON = 1e-9
 
 
 class AnywareApp:
-    """Anyware application runtime with page stack."""
+    """Anyware application runtime with page stack.
+
+    output_mode: "pygame" presents to a window; any other value renders offscreen. "headless" never
+    touches pygame.display: frames go to an offscreen surface (see frame_array()), input comes from
+    post_event(), and run() advances a virtual clock without sleeping.
+    """
+
+    HEADLESS = "headless"
 
     def __init__(
         self,
@@ -22,11 +35,23 @@ class AnywareApp:
         output_mode: str = "pygame",
         logic_fps: float | None = None,
         present_fps: float | None = None,
+        max_logic_steps: int = 5,
+        skip_identical_frames: bool = False,
+        idle_fps: float | None = None,
+        idle_after_frames: int = 30,
+        pipelined: bool = False,
+        virtual_fps: float | None = None,
         frame_exporter=None,
         min_gui_api_level: int = 1,
         quit_on_escape: bool = True,
     ):
-        pygame.init()
+        self.output_mode = str(output_mode)
+        self.headless = self.output_mode == self.HEADLESS
+        if self.headless:
+            # Fonts only; pygame.init() would also bring up the display and event subsystems.
+            pygame.freetype.init()
+        else:
+            pygame.init()
         if display_defaults:
             GUI.set_display_defaults(**display_defaults)
 
@@ -36,13 +61,34 @@ class AnywareApp:
         self.page_stack = PageStack()
         self.page_registry: dict[str, Page] = {}
 
-        # Pre-adaptation output config placeholders (no behavior change yet).
-        self.output_mode = str(output_mode)
+        # Fixed logic timestep (None follows GUI.fps); presentation is capped separately (None = every logic step).
         self.logic_fps = None if logic_fps is None else float(logic_fps)
         self.present_fps = None if present_fps is None else float(present_fps)
+        self.max_logic_steps = max(1, int(max_logic_steps))
+        # Opt-in: presents whose frame fingerprint matches the last one skip rasterization, export and flip.
+        # Off by default because output drawn outside the GUI queues (direct surface draws, exporters
+        # with their own state) is invisible to the fingerprint.
+        self.skip_identical_frames = bool(skip_identical_frames)
+        # After idle_after_frames identical presents, sleep in pygame.event.wait() at idle_fps until input arrives.
+        self.idle_fps = None if idle_fps is None else float(idle_fps)
+        self.idle_after_frames = max(1, int(idle_after_frames))
+        # Rasterize on a worker thread from double-buffered frame snapshots (presents one frame behind).
+        self.pipelined = bool(pipelined)
+        self._pipeline = RasterPipeline() if self.pipelined else None
+        # Headless run(): virtual seconds per loop iteration (None = one logic step, i.e. uncapped).
+        self.virtual_fps = None if virtual_fps is None else float(virtual_fps)
+        self._posted_events: list = []
+        self._last_frame_surface = None
+        self._export_surf = None
         self.frame_exporter = frame_exporter
         self._present_to_screen = self.output_mode == "pygame"
-        self._use_offscreen = (self.output_mode != "pygame") or (self.frame_exporter is not None)
+        self._use_offscreen = (
+            (self.output_mode != "pygame")
+            or (self.frame_exporter is not None)
+            or (GUI.color_mode == "indexed")
+            or GUI.scale_at_present
+            or (GUI.rasterizer == "bands")
+        )
         self._display_warning_emitted = False
 
         self._init_render_surfaces(title=title)
@@ -51,9 +97,24 @@ class AnywareApp:
         self.quit_on_escape = bool(quit_on_escape)
         self.clock = pygame.time.Clock()
         self.running = False
-        self._last_logic_time = time.time()
+        self._logic_accum = 0.0
+        self._last_tick_time = None
+        self._resumed_from_idle = False
+        self._next_present_time = None
+        self._frame_pending = False
+        self._last_fingerprint = None
+        self._identical_frames = 0
+        self.frames_presented = 0
+        self.frames_skipped = 0
 
     def _init_render_surfaces(self, *, title: str | None = None) -> None:
+        if self.headless:
+            self.screen_surf = None
+            self._display_surface_id = None
+            self._last_fingerprint = None
+            self.offscreen_surf = GUI.create_render_surface(self._offscreen_size())
+            self._render_surf = self.offscreen_surf
+            return
         self.screen_surf = pygame.display.set_mode(GUI.get_window_size_px(), GUI.get_window_flags())
         use_title = self._title if title is None else title
         if use_title is not None:
@@ -61,10 +122,19 @@ class AnywareApp:
         if GUI.window_always_on_top:
             GUI._set_window_always_on_top(True)
         self._display_surface_id = id(self.screen_surf)
-        self.offscreen_surf = pygame.Surface(GUI.get_window_size_px()) if self._use_offscreen else None
+        self._last_fingerprint = None
+        self.offscreen_surf = GUI.create_render_surface() if self._use_offscreen else None
         self._render_surf = self.offscreen_surf if self.offscreen_surf is not None else self.screen_surf
 
+    def _offscreen_size(self) -> tuple[int, int]:
+        return GUI.get_render_size_px() if GUI.scale_at_present else GUI.get_window_size_px()
+
     def _refresh_display_surface_if_needed(self) -> None:
+        if self.headless:
+            size = self._offscreen_size()
+            if self.offscreen_surf is None or self.offscreen_surf.get_size() != size:
+                self.offscreen_surf = self._render_surf = GUI.create_render_surface(size)
+            return
         if not self._present_to_screen:
             return
         current = pygame.display.get_surface()
@@ -74,13 +144,16 @@ class AnywareApp:
         if current is not self.screen_surf:
             self.screen_surf = current
         if self._use_offscreen:
-            if self.offscreen_surf is None or self.offscreen_surf.get_size() != current.get_size():
-                self.offscreen_surf = pygame.Surface(current.get_size())
+            size = GUI.get_render_size_px() if GUI.scale_at_present else current.get_size()
+            if self.offscreen_surf is None or self.offscreen_surf.get_size() != size:
+                self.offscreen_surf = GUI.create_render_surface(size)
             self._render_surf = self.offscreen_surf
         else:
             self._render_surf = self.screen_surf
 
     def set_fonts(self, *, ascii_path=None, cjk_path=None, cell_w=None, cell_h=None, size_px=None):
+        if self._pipeline is not None:
+            self._pipeline.flush()
         GUI.set_fonts(
             ascii_path=ascii_path,
             cjk_path=cjk_path,
@@ -116,7 +189,32 @@ class AnywareApp:
     def stop(self):
         self.running = False
 
+    def post_event(self, event) -> None:
+        """Queue an input event for the next loop tick (the only input source in headless mode)."""
+        self._posted_events.append(event)
+
+    def frame_array(self) -> np.ndarray | None:
+        """(height, width, 3) uint8 RGB copy of the last rasterized frame, or None before the first one."""
+        surface = self._last_frame_surface
+        if surface is None:
+            return None
+        surface = self._presented_image(surface)
+        return np.ascontiguousarray(pygame.surfarray.array3d(surface).swapaxes(0, 1))
+
+    def _presented_image(self, surface):
+        """surface at presented (window) size; scale_at_present frames are upscaled as on the display."""
+        size = GUI.get_window_size_px()
+        if surface.get_size() == size:
+            return surface
+        if self._export_surf is None or self._export_surf.get_size() != size:
+            self._export_surf = pygame.Surface(size)
+        GUI.present_scaled(surface, self._export_surf)
+        return self._export_surf
+
     def _handle_event(self, event):
+        # Input may expose or resize the window, so always repaint the next frame.
+        self._last_fingerprint = None
+        self._identical_frames = 0
         if event.type == pygame.QUIT:
             self.running = False
             return True
@@ -138,41 +236,176 @@ class AnywareApp:
             )
             self._display_warning_emitted = True
 
-    def run(self):
+    def _logic_interval(self) -> float:
+        return 1.0 / max(1e-6, self.logic_fps if self.logic_fps is not None else max(1, GUI.fps))
+
+    def _present_interval(self) -> float:
+        return 0.0 if self.present_fps is None else 1.0 / max(1e-6, self.present_fps)
+
+    def _step_logic(self, now: float) -> int:
+        """Run fixed logic steps for time elapsed since the last call; return how many ran."""
+        step = self._logic_interval()
+        if self._last_tick_time is not None:
+            self._logic_accum += max(0.0, now - self._last_tick_time)
+        self._last_tick_time = now
+        max_steps = self.max_logic_steps
+        if self._resumed_from_idle:
+            # Time slept in _wait_idle is bounded by one idle tick and is not lag: replay all of it
+            # so game time keeps pace with wall time while idle.
+            self._resumed_from_idle = False
+            max_steps = max(max_steps, int((self._logic_accum + _TIME_EPSILON) // step))
+        steps = 0
+        while self._logic_accum + _TIME_EPSILON >= step and steps < max_steps:
+            frame = GUI.next_frame(1)
+            self.ctx.set_frame_info(frame=frame, dt=step)
+            self.page_stack.update(self.ctx, step)
+            self._logic_accum = max(0.0, self._logic_accum - step)
+            steps += 1
+        if self._logic_accum + _TIME_EPSILON >= step:
+            # Too far behind to catch up: drop the backlog instead of spiralling.
+            self._logic_accum %= step
+        if steps:
+            self._frame_pending = True
+        return steps
+
+    def _present(self, now: float) -> bool:
+        """Rasterize and present the latest logic frame; skipped when nothing new is pending."""
+        if not self._frame_pending:
+            return False
+        if self._next_present_time is not None and now < self._next_present_time:
+            return False
+        self._refresh_display_surface_if_needed()
+        self._warn_if_display_replaced()
+        frame = self.runtime.begin_frame(clear_color=self.clear_color, advance_frame=False)
+        self.ctx.set_frame_info(frame=frame, dt=self._logic_interval(), alpha=self._logic_accum / self._logic_interval())
+        self.page_stack.render(self.ctx)
+        if self.skip_identical_frames or self.idle_fps is not None:
+            # idle_fps alone still counts identical frames, but keeps presenting them.
+            fingerprint = (GUI.frame_fingerprint(), id(self._render_surf), self._render_surf.get_size())
+            if fingerprint == self._last_fingerprint:
+                self._identical_frames += 1
+                if self.skip_identical_frames:
+                    self.frames_skipped += 1
+                    self._frame_pending = False
+                    self._schedule_present(now)
+                    return False
+            else:
+                self._last_fingerprint = fingerprint
+                self._identical_frames = 0
+        if self._pipeline is not None:
+            self._pipeline.submit()
+            self._present_completed()
+        elif not self._rasterize_and_present():
+            return False
+        self._frame_pending = False
+        self.frames_presented += 1
+        self._schedule_present(now)
+        return True
+
+    def _rasterize_and_present(self) -> bool:
+        try:
+            self.runtime.finish_frame(self._render_surf)
+        except pygame.error as exc:
+            if "Unsupported surface format" in str(exc):
+                self._init_render_surfaces()
+                return False
+            raise
+        self._last_frame_surface = self._render_surf
+        if self.frame_exporter is not None:
+            self.frame_exporter(self._presented_image(self._render_surf), self.ctx)
+        present_rects = GUI.get_dirty_rects() if GUI.dirty_tracking else None
+        if self._present_to_screen and self.offscreen_surf is not None:
+            presented = GUI.present_scaled(self.offscreen_surf, self.screen_surf, present_rects)
+            if present_rects is not None:
+                present_rects = presented
+        if self._present_to_screen:
+            if not GUI.dirty_tracking:
+                pygame.display.flip()
+            elif present_rects:
+                pygame.display.update(present_rects)
+        return True
+
+    def _present_completed(self) -> bool:
+        """Blit and flip the newest frame the raster worker finished (pipelined mode)."""
+        done = self._pipeline.take_completed()
+        if done is None:
+            return False
+        surface, _ = done
+        self._last_frame_surface = surface
+        if self.frame_exporter is not None:
+            self.frame_exporter(self._presented_image(surface), self.ctx)
+        if self._present_to_screen:
+            GUI.present_scaled(surface, self.screen_surf)
+            pygame.display.flip()
+        return True
+
+    def _schedule_present(self, now: float) -> None:
+        # Deadline schedule keeps the average rate when loop ticks jitter around the interval.
+        interval = self._present_interval()
+        if self._next_present_time is None or now - self._next_present_time >= interval:
+            self._next_present_time = now + interval
+        else:
+            self._next_present_time += interval
+
+    @property
+    def idle(self) -> bool:
+        return self.idle_fps is not None and self._identical_frames >= self.idle_after_frames
+
+    def _wait_idle(self) -> None:
+        """Block until an event arrives or one idle tick passes."""
+        event = pygame.event.wait(max(1, int(1000 / max(1e-6, self.idle_fps))))
+        self._resumed_from_idle = True
+        if event.type != pygame.NOEVENT:
+            self._handle_event(event)
+
+    def _poll_events(self) -> None:
+        events, self._posted_events = self._posted_events, []
+        if not self.headless:
+            events.extend(pygame.event.get())
+        for event in events:
+            self._handle_event(event)
+
+    def run(self, *, max_frames: int | None = None):
+        """Main loop; max_frames stops it after that many logic steps (useful headless)."""
         self.running = True
-        self._last_logic_time = time.time()
+        if self.pipelined and self._pipeline is None:
+            self._pipeline = RasterPipeline()
+        self._logic_accum = 0.0
+        self._next_present_time = None
+        # Headless runs on a virtual clock: each iteration advances it by a fixed amount and never sleeps.
+        virtual_step = None
+        if self.headless:
+            virtual_step = self._logic_interval() if self.virtual_fps is None else 1.0 / max(1e-6, self.virtual_fps)
+        now = 0.0 if self.headless else time.perf_counter()
+        self._last_tick_time = now
+        steps = 0
         while self.running:
-            for event in pygame.event.get():
-                self._handle_event(event)
-
-            now = time.time()
-            logic_interval = 1.0 / max(1, GUI.fps)
-            if now - self._last_logic_time >= logic_interval:
-                self._refresh_display_surface_if_needed()
-                self._warn_if_display_replaced()
-                dt = now - self._last_logic_time
-                frame = self.runtime.begin_frame(clear_color=self.clear_color)
-                self.ctx.set_frame_info(frame=frame, dt=dt)
-
-                self.page_stack.update(self.ctx, dt)
-                self.page_stack.render(self.ctx)
-
-                try:
-                    self.runtime.finish_frame(self._render_surf)
-                except pygame.error as exc:
-                    if "Unsupported surface format" in str(exc):
-                        self._init_render_surfaces()
-                        continue
-                    raise
-                if self.frame_exporter is not None:
-                    self.frame_exporter(self._render_surf, self.ctx)
-                if self._present_to_screen and self.offscreen_surf is not None:
-                    self.screen_surf.blit(self.offscreen_surf, (0, 0))
-                self._last_logic_time = now
-
-            if self._present_to_screen:
-                pygame.display.flip()
-            self.clock.tick(max(1, GUI.target_fps))
+            self._poll_events()
+            if virtual_step is not None:
+                now += virtual_step
+            else:
+                now = time.perf_counter()
+            steps += self._step_logic(now)
+            self._present(now)
+            if self._pipeline is not None:
+                if self.idle:
+                    self._pipeline.flush()
+                self._present_completed()
+            if max_frames is not None and steps >= max_frames:
+                self.running = False
+            elif self.headless:
+                continue
+            elif self.idle:
+                self._wait_idle()
+            else:
+                self.clock.tick(max(1, GUI.target_fps))
 
+        if self._pipeline is not None:
+            # Deliver the frame still in flight so the last logic step is always presented/exported.
+            self._pipeline.flush()
+            self._present_completed()
+            self._pipeline.close()
+            self._pipeline = None
         self.page_stack.clear(self.ctx)
-        pygame.quit()
+        if not self.headless:
+            pygame.quit()
@@ -0,0 +1,472 @@
+"""Render-path micro benchmarks (not collected by pytest).
+
+Run:
+    python3 integration_test/v0.4.0/bench_gui_render.py
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pygame
+
+from core import GUI
+
+
+def _init_fonts():
+    font_ascii = ROOT / "assets" / "fonts" / "Modern_DOS" / "ModernDOS8x16.ttf"
+    font_cjk = ROOT / "assets" / "fonts" / "长坂点宋16" / "长坂点宋16.ttf"
+    GUI.set_fonts(ascii_path=str(font_ascii), cjk_path=str(font_cjk), cell_w=8, cell_h=16, size_px=16)
+
+
+def _timeit(fn, repeat=20):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def _fill_grid(fraction):
+    GUI.clear_screen()
+    cols, rows = GUI.row_column_resolution
+    used_rows = int(round(rows * fraction))
+    sample = "Telemetry 0123456789 ABCDEF 测试 "
+    for row in range(used_rows):
+        line = (sample * (cols // len(sample) + 1))[: cols - 2]
+        GUI.static(0, row, row % 48, line)
+
+
+def _render_per_cell():
+    """Pre-atlas render loop, kept as the baseline."""
+    cols, rows = GUI.row_column_resolution
+    ch_h, ch_w = GUI.char_resolution
+    GUI.screen_raw.fill(0)
+    for row in range(rows):
+        col = 0
+        while col < cols:
+            ch = GUI.screen[row][col]
+            if ch in (GUI.WIDE_CONT, " ", ""):
+                col += 1
+                continue
+            wide = GUI._is_wide_char(ch) and col + 1 < cols and GUI.screen[row][col + 1] == GUI.WIDE_CONT
+            bmp = GUI._get_glyph_bitmap(ch, wide)
+            if bmp is not None:
+                h, w = bmp.shape
+                GUI.screen_raw[row * ch_h : row * ch_h + h, col * ch_w : col * ch_w + w] = bmp
+            col += 2 if wide else 1
+
+
+def bench_render():
+    print("render() cost by grid fill (ms/frame)")
+    print(f"{'fill':>6} {'per-cell':>10} {'atlas':>10}")
+    for fraction in (0.0, 0.25, 0.5, 1.0):
+        _fill_grid(fraction)
+        legacy = _timeit(_render_per_cell)
+        atlas = _timeit(lambda: GUI.render(GUI.screen, GUI.screen_color))
+        print(f"{fraction:>6.2f} {legacy:>10.2f} {atlas:>10.2f}")
+
+
+def bench_dirty_tracking():
+    print("draw_to_surface() with one changing cell (ms/frame)")
+    _fill_grid(1.0)
+    GUI.render(GUI.screen, GUI.screen_color)
+    surf = pygame.Surface(GUI.get_window_size_px())
+    full = _timeit(lambda: GUI.draw_to_surface(surf))
+    GUI.set_display_defaults(dirty_tracking=True)
+    _fill_grid(1.0)
+    tick = [0]
+
+    def _step():
+        tick[0] += 1
+        GUI.static(0, 0, tick[0] % 48, str(tick[0] % 10))
+        GUI.render(GUI.screen, GUI.screen_color)
+        GUI.draw_to_surface(surf)
+
+    dirty = _timeit(_step)
+    GUI.reset_display_defaults()
+    print(f"{'full':>10} {'dirty':>10}")
+    print(f"{full:>10.2f} {dirty:>10.2f}")
+
+
+def bench_color_mode():
+    print("draw_to_surface() + present blit by color_mode (ms/frame, full grid)")
+    display = pygame.Surface(GUI.get_window_size_px(), depth=32)
+    print(f"{'mode':>8} {'draw':>10} {'present':>10} {'bytes':>10}")
+    for mode in ("rgb", "indexed"):
+        GUI.set_display_defaults(color_mode=mode)
+        _fill_grid(1.0)
+        GUI.render(GUI.screen, GUI.screen_color)
+        surf = GUI.create_render_surface()
+        draw = _timeit(lambda: GUI.draw_to_surface(surf))
+        present = _timeit(lambda: display.blit(surf, (0, 0)))
+        size = surf.get_pitch() * surf.get_height()
+        print(f"{mode:>8} {draw:>10.2f} {present:>10.2f} {size:>10}")
+    GUI.reset_display_defaults()
+
+
+def bench_scale_at_present():
+    print("finish_frame() at pixel_scale=3 with super text (ms/frame)")
+    print(f"{'rasterizer':>10} {'raster':>10} {'present':>10}")
+    for name in GUI.RASTERIZERS:
+        row = []
+        for at_present in (False, True):
+            GUI.set_display_defaults(cols=64, rows=24, pixel_scale=3, rasterizer=name, scale_at_present=at_present)
+            _fill_grid(1.0)
+            GUI.reset_overlays()
+            for line in range(4):
+                GUI.draw_super_text_px(GUI.gx(2), GUI.gy(2 + line * 4), "White", "SCALE TEST 0123")
+            surf = pygame.Surface(GUI.get_present_size_px())
+            row.append(_timeit(lambda: GUI.finish_frame(surf), repeat=10))
+        print(f"{name:>10} {row[0]:>10.2f} {row[1]:>10.2f}")
+    GUI.reset_overlays()
+    GUI.reset_display_defaults()
+
+
+def bench_glyph_disk_cache():
+    chars = [chr(cp) for cp in range(0x4E00, 0x4E00 + 2000)]
+    print(f"first-use cost of {len(chars)} CJK glyphs (ms)")
+
+    def _first_use():
+        _init_fonts()
+        start = time.perf_counter()
+        for ch in chars:
+            GUI._get_glyph_bitmap(ch, True)
+        return (time.perf_counter() - start) * 1000.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        no_cache = _first_use()
+        GUI.set_display_defaults(glyph_disk_cache_dir=tmp)
+        cold = _first_use()
+        flush_start = time.perf_counter()
+        GUI.flush_glyph_disk_cache()
+        flush = (time.perf_counter() - flush_start) * 1000.0
+        warm = _first_use()
+        GUI.reset_display_defaults()
+    print(f"{'no cache':>10} {'cold':>10} {'flush':>10} {'warm':>10}")
+    print(f"{no_cache:>10.1f} {cold:>10.1f} {flush:>10.1f} {warm:>10.1f}")
+
+
+def _draw_lines_per_item(surface):
+    """Pre-buffer line drain: one get_color_rgb and draw.line per queued tuple."""
+    for x1, y1, x2, y2, c, t in GUI.line_queue:
+        pygame.draw.line(surface, GUI.get_color_rgb(c), (x1, y1), (x2, y2), max(1, int(round(float(t)))))
+
+
+def bench_overlay_queues():
+    print("overlay enqueue + line drain, 2000 outlined rects + 200 hatch fills (ms/frame)")
+    surf = pygame.Surface(GUI.get_window_size_px())
+    colors = ("CRT_Cyan", "White", "neon_pink", "CRT_Green")
+
+    def _enqueue():
+        GUI.reset_overlays()
+        for i in range(2000):
+            GUI.draw_rect(colors[i % 4], (i * 7) % 600, (i * 13) % 500, 30, 20, filled=False, thickness=1)
+        for i in range(200):
+            GUI.draw_pattern_rect(colors[i % 4], (i * 11) % 600, (i * 17) % 500, 40, 40)
+
+    enqueue = _timeit(_enqueue, repeat=5)
+    legacy = _timeit(lambda: _draw_lines_per_item(surf), repeat=5)
+    batched = _timeit(lambda: GUI._draw_lines(surf, GUI.line_queue), repeat=5)
+    stats = GUI.get_overlay_queue_stats()["lines"]
+    GUI.reset_overlays()
+    print(f"{'segments':>10} {'enqueue':>10} {'per-item':>10} {'batched':>10}")
+    print(f"{stats['count']:>10} {enqueue:>10.2f} {legacy:>10.2f} {batched:>10.2f}")
+
+
+def _draw_super_text_per_pixel(surface, labels):
+    """Pre text-run drain: one surface.fill per lit glyph pixel."""
+    cell_h, cell_w = GUI.char_resolution
+    for x_px, y_px, text in labels:
+        rgb = GUI.get_color_rgb("White")
+        for ch in text:
+            bmp = GUI._get_glyph_bitmap_custom(ch, False, cell_w, cell_h)
+            if bmp is not None:
+                for py, px in zip(*bmp.nonzero()):
+                    surface.fill(rgb, (x_px + px * GUI.PIXEL_SCALE, y_px + py * GUI.PIXEL_SCALE, GUI.PIXEL_SCALE, GUI.PIXEL_SCALE))
+            x_px += cell_w * GUI.PIXEL_SCALE
+
+
+def bench_super_text():
+    labels = [((i % 4) * 150, (i // 4) * 20, f"BUTTON {i:02d}") for i in range(40)]
+    print(f"draw_super_text_px(): {len(labels)} unchanged labels (ms/frame)")
+    surf = pygame.Surface(GUI.get_window_size_px())
+
+    def _cached():
+        GUI.reset_overlays()
+        for x, y, text in labels:
+            GUI.draw_super_text_px(x, y, "White", text)
+        GUI._draw_super_text(surf, GUI.super_text_queue)
+
+    legacy = _timeit(lambda: _draw_super_text_per_pixel(surf, labels), repeat=5)
+    cached = _timeit(_cached)
+    GUI.reset_overlays()
+    print(f"{'per-pixel':>10} {'run cache':>10}")
+    print(f"{legacy:>10.2f} {cached:>10.2f}")
+
+
+def bench_hatch_cache():
+    print("draw_pattern_rect() x 200, animated offset (ms/frame)")
+    tick = [0]
+
+    def _frame(clear_cache):
+        if clear_cache:
+            GUI._hatch_cache.clear()
+        GUI.reset_overlays()
+        tick[0] += 1
+        for i in range(200):
+            GUI.draw_pattern_rect("White", (i % 10) * 60, (i // 10) * 40, 48, 32, offset=tick[0] % 4)
+
+    uncached = _timeit(lambda: _frame(True), repeat=10)
+    cached = _timeit(lambda: _frame(False), repeat=10)
+    GUI.reset_overlays()
+    print(f"{'uncached':>10} {'cached':>10}")
+    print(f"{uncached:>10.2f} {cached:>10.2f}")
+
+
+def bench_pattern_modes():
+    print("hatched 600x400 px panel with animated offset, by spacing (ms/frame: enqueue + draw)")
+    surf = pygame.Surface((640, 480))
+    tick = [0]
+    print(f"{'spacing':>8} {'lines':>10} {'raster':>10}")
+    for spacing in (8, 4, 2):
+        row = []
+        for mode in GUI.PATTERN_MODES:
+
+            def _frame():
+                tick[0] += 1
+                GUI.reset_overlays()
+                GUI.draw_pattern_rect("CRT_Cyan", 10, 10, 600, 400, spacing=spacing, offset=tick[0] % 4, mode=mode)
+                GUI._draw_lines(surf, GUI.line_queue)
+                GUI._draw_patterns(surf, GUI.pattern_queue)
+
+            row.append(_timeit(_frame))
+        print(f"{spacing:>8} {row[0]:>10.2f} {row[1]:>10.2f}")
+    GUI.reset_overlays()
+
+
+def bench_poly_instances():
+    print("draw_poly() of one library shape x 2000 (ms/frame)")
+    GUI.add_poly("bench_chevron", [(0, 0), (6, 0), (10, 5), (6, 10), (0, 10), (4, 5)], base_font_height_px=16)
+
+    def _frame(filled):
+        GUI.reset_overlays()
+        for i in range(2000):
+            GUI.draw_poly("bench_chevron", "CRT_Cyan", (i % 50) * 12, (i // 50) * 12, filled=filled)
+
+    filled = _timeit(lambda: _frame(True), repeat=10)
+    outline = _timeit(lambda: _frame(False), repeat=10)
+    GUI.reset_overlays()
+    GUI.poly_shapes.pop("bench_chevron", None)
+    print(f"{'filled':>10} {'outline':>10}")
+    print(f"{filled:>10.2f} {outline:>10.2f}")
+
+
+def bench_batched_primitives():
+    print("2000 filled rects: draw_rect loop vs draw_rects (ms/frame)")
+    rects = [((i % 50) * 12, (i // 50) * 12, 10, 8) for i in range(2000)]
+    colors = ["CRT_Cyan" if i % 3 else "CRT_Green" for i in range(2000)]
+
+    def _loop():
+        GUI.reset_overlays()
+        for (x, y, w, h), c in zip(rects, colors):
+            GUI.draw_rect(c, x, y, w, h, filled=True)
+
+    def _batched():
+        GUI.reset_overlays()
+        GUI.draw_rects(colors, rects, filled=True)
+
+    loop = _timeit(_loop, repeat=10)
+    batched = _timeit(_batched, repeat=10)
+    GUI.reset_overlays()
+    print(f"{'loop':>10} {'batched':>10}")
+    print(f"{loop:>10.2f} {batched:>10.2f}")
+
+
+def bench_clip_culling():
+    print("scrolled list of 400 rows (outline + label), 12 rows inside a clip (ms/frame: enqueue + draw)")
+    surf = pygame.Surface(GUI.get_render_size_px())
+    rows = [(16, 20 + i * 18) for i in range(400)]
+
+    def _frame(clip):
+        GUI.reset_overlays()
+        if clip:
+            GUI.push_clip_rect(0, 20, 400, 12 * 18)
+        for x, y in rows:
+            GUI.draw_rect("CRT_Cyan", x, y, 300, 16, filled=False)
+            GUI.draw_super_text_px(x + 4, y, "White", f"row {y}")
+        if clip:
+            GUI.pop_clip_rect()
+        GUI.draw_to_surface(surf)
+
+    print(f"{'clip':>8} {'ms':>8} {'culled':>8} {'clipped':>8}")
+    for name, clip in (("window", False), ("12 rows", True)):
+        ms = _timeit(lambda: _frame(clip), repeat=5)
+        stats = GUI.get_overlay_queue_stats()["culling"]
+        print(f"{name:>8} {ms:>8.2f} {stats['culled']:>8} {stats['clipped']:>8}")
+    GUI.reset_overlays()
+
+
+def bench_bitmap_font():
+    chars = [chr(cp) for cp in range(0x4E00, 0x4E00 + 2000)]
+    print(f"first-use cost of {len(chars)} CJK glyphs: TTF vs the same glyphs as a PSF2 atlas (ms)")
+    _init_fonts()
+    glyphs = np.zeros((len(chars), 16, 16), dtype=np.uint8)
+    for i, ch in enumerate(chars):
+        bmp = GUI._get_glyph_bitmap(ch, True)
+        if bmp is not None:
+            glyphs[i] = bmp
+    rows = np.packbits(glyphs, axis=2)
+    header = struct.pack("<4sIIIIIII", b"\x72\xb5\x4a\x86", 0, 32, 1, len(chars), rows[0].size, 16, 16)
+    table = b"".join(ch.encode("utf-8") + b"\xff" for ch in chars)
+
+    def _first_use(cjk_path=None):
+        _init_fonts()
+        start = time.perf_counter()
+        if cjk_path is not None:
+            GUI.set_fonts(cjk_path=cjk_path)
+        for ch in chars:
+            GUI._get_glyph_bitmap(ch, True)
+        return (time.perf_counter() - start) * 1000.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cjk16.psfu")
+        with open(path, "wb") as fh:
+            fh.write(header + rows.tobytes() + table)
+        ttf = _first_use()
+        psf = _first_use(path)
+    _init_fonts()
+    print(f"{'freetype':>10} {'psf2':>10}")
+    print(f"{ttf:>10.1f} {psf:>10.1f}")
+
+
+def bench_text_layout():
+    lines = [f"{i:03d} item 項目 {'x' * (i % 40)} 終わり" for i in range(120)]
+    print(f"text-heavy page: {len(lines)} draw_text_box + measure_text_cells per frame (ms/frame)")
+
+    def _frame(cold):
+        if cold:
+            GUI._text_layout_cache.clear()
+        GUI.clear_screen()
+        for i, line in enumerate(lines):
+            GUI.measure_text_cells(line)
+            GUI.draw_text_box(i % 2 * 40, i // 2 % 30, 38, 1, "White", line, align_h="center")
+
+    print(f"{'cache':>8} {'ms':>8}")
+    for name, cold in (("cold", True), ("warm", False)):
+        print(f"{name:>8} {_timeit(lambda: _frame(cold)):>8.2f}")
+
+
+def bench_static_writes():
+    print("static() row writes per second (full-width rows)")
+    print(f"{'cols':>6} {'text':>8} {'writes/s':>12}")
+    for cols in (80, 200):
+        GUI.set_display_defaults(cols=cols, rows=30)
+        samples = (
+            ("ascii", "x" * cols),
+            ("mixed", ("ab世界" * cols)[: cols * 2 // 3]),
+        )
+        for name, text in samples:
+            repeat = 2000
+            start = time.perf_counter()
+            for i in range(repeat):
+                GUI.static(0, i % 30, "White", text)
+            rate = repeat / (time.perf_counter() - start)
+            print(f"{cols:>6} {name:>8} {rate:>12.0f}")
+    GUI.reset_display_defaults()
+
+
+def bench_pipelined_raster():
+    from core.anyware.pipeline import RasterPipeline
+
+    print("logic + raster per frame, serial vs worker-thread pipeline (120x50 grid, ms/frame)")
+    GUI.set_display_defaults(cols=120, rows=50)
+    _init_fonts()
+    surf = GUI.create_render_surface()
+    rows = np.arange(50)
+    values = np.random.default_rng(0).random((50, 400))
+
+    def _logic(i):
+        GUI.begin_frame()
+        # Stand-in for page update/render: some NumPy work plus grid and overlay writes.
+        smooth = np.convolve(values.ravel(), np.ones(64) / 64, mode="same").reshape(values.shape)
+        for r in rows.tolist():
+            GUI.static(0, r, "White", f"{i:05d} ch{r:02d} {smooth[r].mean():.4f} " + "#" * ((i + r) % 60))
+        GUI.draw_rects("CRT_Cyan", np.column_stack([rows * 8, rows * 4, np.full(50, 40), np.full(50, 6)]))
+
+    def _serial(n):
+        for i in range(n):
+            _logic(i)
+            GUI.finish_frame(surf)
+
+    def _pipelined(n):
+        pipe = RasterPipeline()
+        for i in range(n):
+            _logic(i)
+            pipe.submit()
+            pipe.take_completed()
+        pipe.close()
+
+    n = 40
+    print(f"{'mode':>10} {'ms':>8}")
+    for name, fn in (("serial", _serial), ("pipelined", _pipelined)):
+        fn(3)
+        start = time.perf_counter()
+        fn(n)
+        print(f"{name:>10} {(time.perf_counter() - start) / n * 1000.0:>8.2f}")
+    GUI.reset_display_defaults()
+    _init_fonts()
+
+
+def bench_band_raster():
+    print(f"text layer, 200x100 grid at pixel_scale=2: numpy vs worker bands (ms/frame, {os.cpu_count()} cpus)")
+    print(f"{'rasterizer':>10} {'workers':>8} {'ms':>8}")
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for name, workers in [("numpy", 0)] + [("bands", n) for n in counts]:
+        GUI.set_display_defaults(cols=200, rows=100, pixel_scale=2, rasterizer=name, raster_workers=workers)
+        _init_fonts()
+        _fill_grid(1.0)
+        GUI.render(GUI.screen, GUI.screen_color)
+        surf = GUI.create_render_surface()
+        ms = _timeit(lambda: (GUI.render(GUI.screen, GUI.screen_color), GUI.draw_to_surface(surf)), repeat=10)
+        print(f"{name:>10} {workers or '-':>8} {ms:>8.2f}")
+        del surf
+    GUI.close_band_rasterizer()
+    GUI.reset_display_defaults()
+    _init_fonts()
+
+
+def main():
+    pygame.init()
+    _init_fonts()
+    bench_render()
+    bench_dirty_tracking()
+    bench_color_mode()
+    bench_scale_at_present()
+    bench_glyph_disk_cache()
+    bench_overlay_queues()
+    bench_super_text()
+    bench_hatch_cache()
+    bench_pattern_modes()
+    bench_poly_instances()
+    bench_batched_primitives()
+    bench_clip_culling()
+    bench_bitmap_font()
+    bench_text_layout()
+    bench_static_writes()
+    bench_pipelined_raster()
+    bench_band_raster()
+
+
+if __name__ == "__main__":
+    main()
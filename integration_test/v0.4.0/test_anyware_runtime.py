@@ -0,0 +1,337 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pygame
+
+from core import GUI
+from core.anyware import AnywareApp
+from core.anyware.page import Page
+from core.anyware.pipeline import RasterPipeline
+
+
+class CountingPage(Page):
+    def __init__(self, *, animated: bool = True):
+        super().__init__("counting")
+        self.animated = animated
+        self.updates: list[float] = []
+        self.renders: list[float] = []
+        self.events: list = []
+
+    def handle_event(self, event, ctx) -> bool:
+        self.events.append((event.type, ctx.frame.frame))
+        return True
+
+    def update(self, ctx, dt: float) -> None:
+        self.updates.append(dt)
+
+    def render(self, ctx) -> None:
+        self.renders.append(ctx.frame.alpha)
+        ctx.label(1, 1, "White", f"frame {ctx.frame.frame}" if self.animated else "static")
+
+
+def _make_app(*, animated: bool = True, **kwargs):
+    kwargs.setdefault("display_defaults", {"cols": 20, "rows": 6})
+    app = AnywareApp(title="runtime test", **kwargs)
+    page = CountingPage(animated=animated)
+    app.set_root_page(page)
+    return app, page
+
+
+def test_fixed_logic_step_with_independent_present_rate():
+    app, page = _make_app(logic_fps=60, present_fps=20)
+    try:
+        app._step_logic(0.0)
+        presented = 0
+        # One simulated second polled at ~100 Hz with jitter.
+        for i in range(1, 101):
+            now = i * 0.01 + (0.002 if i % 3 else -0.002)
+            app._step_logic(now)
+            presented += app._present(now)
+        assert 58 <= len(page.updates) <= 61
+        assert all(dt == 1.0 / 60 for dt in page.updates)
+        assert 19 <= presented <= 21
+        assert len(page.renders) == presented
+        assert all(0.0 <= alpha < 1.0 for alpha in page.renders)
+        assert app.ctx.frame.frame == GUI.frame
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_present_skips_without_pending_logic_and_caps_catch_up():
+    app, page = _make_app(logic_fps=10, max_logic_steps=3)
+    try:
+        app._step_logic(0.0)
+        assert not app._present(0.0)
+        assert app._step_logic(0.1) == 1
+        assert app._present(0.1)
+        assert not app._present(0.15)
+        # A 2 s stall runs at most three steps and drops the rest of the backlog.
+        assert app._step_logic(2.1) == 3
+        assert app._logic_accum < 0.1
+        assert app._present(2.1)
+        assert len(page.renders) == 2
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_idle_wake_replays_time_spent_asleep():
+    app, page = _make_app(animated=False, logic_fps=60, max_logic_steps=2, idle_fps=10, idle_after_frames=1)
+    try:
+        app._step_logic(0.0)
+        app._wait_idle()
+        # 100 ms asleep is six logic steps even though max_logic_steps is 2.
+        assert app._step_logic(0.1) == 6
+        assert len(page.updates) == 6
+        # The cap applies again to ordinary stalls once awake.
+        assert app._step_logic(0.2) == 2
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_identical_frames_skip_raster_and_go_idle():
+    exported = []
+    app, page = _make_app(
+        animated=False,
+        logic_fps=10,
+        idle_fps=2,
+        idle_after_frames=3,
+        skip_identical_frames=True,
+        frame_exporter=lambda surf, ctx: exported.append(ctx.frame.frame),
+    )
+    try:
+        app._step_logic(0.0)
+        for i in range(1, 7):
+            app._step_logic(i * 0.1 + 0.05)
+            app._present(i * 0.1 + 0.05)
+        assert len(page.renders) == 6
+        assert app.frames_presented == 1 and app.frames_skipped == 5
+        assert len(exported) == 1
+        assert app.idle
+
+        fingerprint = GUI.frame_fingerprint()
+        GUI.draw_rect("White", 4, 4, 10, 10)
+        assert GUI.frame_fingerprint() != fingerprint
+
+        app._handle_event(pygame.event.Event(pygame.USEREVENT))
+        assert not app.idle
+        app._step_logic(0.75)
+        assert app._present(0.75)
+        assert len(exported) == 2
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_identical_frames_present_by_default():
+    exported = []
+    app, page = _make_app(
+        animated=False,
+        logic_fps=10,
+        idle_fps=2,
+        idle_after_frames=3,
+        frame_exporter=lambda surf, ctx: exported.append(ctx.frame.frame),
+    )
+    try:
+        assert not app.skip_identical_frames
+        app._step_logic(0.0)
+        for i in range(1, 7):
+            app._step_logic(i * 0.1 + 0.05)
+            assert app._present(i * 0.1 + 0.05)
+        assert app.frames_presented == 6 and app.frames_skipped == 0
+        assert len(exported) == 6
+        assert app.idle
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_pipelined_mode_presents_same_frames():
+    frames = {}
+    for pipelined in (False, True):
+        exported = []
+        app, page = _make_app(
+            logic_fps=10,
+            pipelined=pipelined,
+            frame_exporter=lambda surf, ctx: exported.append(pygame.surfarray.array3d(surf)),
+        )
+        try:
+            app.set_fonts(
+                ascii_path=str(ROOT / "assets" / "fonts" / "Modern_DOS" / "ModernDOS8x16.ttf"),
+                cell_w=8,
+                cell_h=16,
+                size_px=16,
+            )
+            GUI.frame = 0
+            app._step_logic(0.0)
+            for i in range(1, 5):
+                app._step_logic(i * 0.1 + 0.05)
+                app._present(i * 0.1 + 0.05)
+            if app._pipeline is not None:
+                app._pipeline.flush()
+                app._present_completed()
+                app._pipeline.close()
+            frames[pipelined] = exported
+        finally:
+            GUI.reset_display_defaults()
+    serial, piped = frames[False], frames[True]
+    assert len(serial) == 4 and len({f.tobytes() for f in serial}) == 4
+    # The pipeline may drop a frame superseded before it was presented, never the last one.
+    assert 1 <= len(piped) <= 4
+    assert all(any(np.array_equal(p, f) for f in serial) for p in piped)
+    assert np.array_equal(piped[-1], serial[-1])
+
+
+def test_palette_rotation_while_pipeline_rasterizes():
+    app, page = _make_app()
+    palette = list(GUI.hsv_palette)
+    pipeline = None
+    try:
+        app.set_fonts(
+            ascii_path=str(ROOT / "assets" / "fonts" / "Modern_DOS" / "ModernDOS8x16.ttf"),
+            cell_w=8,
+            cell_h=16,
+            size_px=16,
+        )
+        # Palette mutators wait for a raster in progress instead of clearing caches under it.
+        held, release = threading.Event(), threading.Event()
+
+        def hold_raster_lock():
+            with GUI._raster_lock:
+                held.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold_raster_lock, daemon=True)
+        holder.start()
+        held.wait()
+        rotator = threading.Thread(target=GUI.rotate_palette_range, args=(200, 216), daemon=True)
+        try:
+            rotator.start()
+            rotator.join(0.05)
+            assert rotator.is_alive()
+        finally:
+            release.set()
+        holder.join()
+        rotator.join()
+
+        pipeline = RasterPipeline()
+        for i in range(40):
+            GUI.begin_frame()
+            GUI.static(0, 0, "White", f"frame {i} " * 3)
+            GUI.static(0, 2, i % 200, "palette")
+            GUI.draw_rect("CRT_Cyan", 4, 4, 30, 10, filled=True)
+            pipeline.submit()
+            GUI.rotate_palette_range(200, 216)
+            pipeline.take_completed()
+        # Rasterize one last frame with no rotation in flight, then compare it to a direct draw.
+        pipeline.submit()
+        pipeline.flush()
+        surface, _ = pipeline.take_completed()
+        expected = GUI.create_render_surface()
+        GUI.draw_to_surface(expected)
+        assert np.array_equal(pygame.surfarray.array3d(surface), pygame.surfarray.array3d(expected))
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        GUI.hsv_palette[:] = palette
+        GUI.refresh_palette_cache()
+        GUI.reset_display_defaults()
+
+
+def test_headless_virtual_clock_and_posted_events():
+    exported = []
+    app, page = _make_app(
+        output_mode="headless",
+        logic_fps=60,
+        virtual_fps=30,
+        frame_exporter=lambda surf, ctx: exported.append(pygame.surfarray.array3d(surf)),
+    )
+    try:
+        assert app.screen_surf is None and app.frame_array() is None
+        app.post_event(pygame.event.Event(pygame.USEREVENT))
+        GUI.frame = 0
+        app.run(max_frames=10)
+        # Each iteration advances the virtual clock by 1/30 s: two logic steps, one present.
+        assert len(page.updates) == 10 and len(page.renders) == 5
+        assert page.events == [(pygame.USEREVENT, 0)]
+        assert len(exported) == 5
+        rgb = app.frame_array()
+        w, h = GUI.get_window_size_px()
+        assert rgb.shape == (h, w, 3) and rgb.dtype == np.uint8
+        assert np.array_equal(rgb, exported[-1].swapaxes(0, 1))
+    finally:
+        GUI.reset_display_defaults()
+
+def test_scale_at_present_exports_presented_size_frame():
+    frames = {}
+    for at_present in (False, True):
+        exported = []
+        app, page = _make_app(
+            output_mode="headless",
+            display_defaults={"cols": 20, "rows": 6, "pixel_scale": 2, "scale_at_present": at_present},
+            frame_exporter=lambda surf, ctx: exported.append(pygame.surfarray.array3d(surf)),
+        )
+        try:
+            GUI.frame = 0
+            app.run(max_frames=1)
+            w, h = GUI.get_window_size_px()
+            assert exported and exported[-1].shape == (w, h, 3)
+            assert app.frame_array().shape == (h, w, 3)
+            frames[at_present] = exported[-1]
+        finally:
+            GUI.reset_display_defaults()
+    assert frames[True].shape == frames[False].shape and frames[True].any()
+
+
+_HEADLESS_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import pygame
+from core.anyware import AnywareApp
+from core.anyware.page import Page
+
+class Ticker(Page):
+    def render(self, ctx):
+        ctx.label(1, 1, "White", f"tick {ctx.frame.frame}")
+
+if __name__ == "__main__":
+    frames = []
+    app = AnywareApp(output_mode="headless", display_defaults={"cols": 20, "rows": 6},
+                     frame_exporter=lambda surf, ctx: frames.append(ctx.frame.frame))
+    app.set_root_page(Ticker("ticker"))
+    app.run(max_frames=30)
+    assert len(frames) == 30 and app.frame_array().any()
+    assert not pygame.display.get_init()
+    print("headless ok")
+"""
+
+
+def test_headless_mode_never_touches_display():
+    # An unusable video driver makes any pygame.display use fail loudly.
+    env = dict(os.environ, SDL_VIDEODRIVER="no-such-driver")
+    result = subprocess.run(
+        [sys.executable, "-c", _HEADLESS_SCRIPT, str(ROOT)], env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert "headless ok" in result.stdout
+
+
+if __name__ == "__main__":
+    test_fixed_logic_step_with_independent_present_rate()
+    test_present_skips_without_pending_logic_and_caps_catch_up()
+    test_idle_wake_replays_time_spent_asleep()
+    test_identical_frames_skip_raster_and_go_idle()
+    test_identical_frames_present_by_default()
+    test_pipelined_mode_presents_same_frames()
+    test_palette_rotation_while_pipeline_rasterizes()
+    test_headless_virtual_clock_and_posted_events()
+    test_scale_at_present_exports_presented_size_frame()
+    test_headless_mode_never_touches_display()
+    print("Anyware runtime tests: PASS")
@@ -0,0 +1,1335 @@
+import os
+import signal
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pygame
+
+from core import GUI
+from core.GUIBands import BandRasterizer
+
+
+def _init_fonts():
+    font_ascii = ROOT / "assets" / "fonts" / "Modern_DOS" / "ModernDOS8x16.ttf"
+    font_cjk = ROOT / "assets" / "fonts" / "长坂点宋16" / "长坂点宋16.ttf"
+    GUI.set_fonts(ascii_path=str(font_ascii), cjk_path=str(font_cjk), cell_w=8, cell_h=16, size_px=16)
+
+
+def _reference_pixels():
+    """Per-pixel reference rasterization of the text grid (pre-sprite algorithm)."""
+    w, h = GUI.get_window_size_px()
+    out = np.zeros((w, h, 3), dtype=np.uint8)
+    out[:, :] = GUI.get_layout_mode_colors()["bg_rgb"] if GUI.get_layout_mode() else GUI.window_bg_color_rgb
+    cols, rows = GUI.row_column_resolution
+    ch_h, ch_w = GUI.char_resolution
+    scale = GUI.PIXEL_SCALE
+    eff_w = (ch_w + GUI.char_block_spacing_px) * scale
+    eff_h = (ch_h + GUI.line_block_spacing_px) * scale
+    pad = GUI.border_padding_px * scale
+    for r in range(rows):
+        for c in range(cols):
+            ch = GUI.screen[r][c]
+            if ch == GUI.WIDE_CONT:
+                continue
+            span = 2 if (GUI._is_wide_char(ch) and c + 1 < cols and GUI.screen[r][c + 1] == GUI.WIDE_CONT) else 1
+            block = GUI.screen_raw[r * ch_h : (r + 1) * ch_h, c * ch_w : c * ch_w + ch_w * span]
+            rgb = GUI.get_color_rgb(int(GUI.screen_color[r][c]))
+            for py, px in zip(*np.nonzero(block)):
+                x0 = pad + c * eff_w + px * scale
+                y0 = pad + r * eff_h + py * scale
+                out[x0 : x0 + scale, y0 : y0 + scale] = rgb
+    return out
+
+
+def _reference_screen_raw():
+    """Per-cell reference for render() (pre-atlas algorithm)."""
+    cols, rows = GUI.row_column_resolution
+    ch_h, ch_w = GUI.char_resolution
+    raw = np.zeros_like(GUI.screen_raw)
+    for row in range(rows):
+        col = 0
+        while col < cols:
+            ch = GUI.screen[row][col]
+            if ch in (GUI.WIDE_CONT, " ", ""):
+                col += 1
+                continue
+            wide = GUI._is_wide_char(ch) and col + 1 < cols and GUI.screen[row][col + 1] == GUI.WIDE_CONT
+            bmp = GUI._get_glyph_bitmap(ch, wide)
+            if bmp is not None:
+                h, w = bmp.shape
+                raw[row * ch_h : row * ch_h + h, col * ch_w : col * ch_w + w] = bmp
+            col += 2 if wide else 1
+    return raw
+
+
+def _rasterize():
+    GUI.render(GUI.screen, GUI.screen_color)
+    surf = pygame.Surface(GUI.get_window_size_px())
+    GUI.draw_to_surface(surf)
+    return pygame.surfarray.array3d(surf)
+
+
+def _write_sample_text():
+    GUI.clear_screen()
+    GUI.reset_overlays()
+    GUI.static(0, 0, "CRT_Cyan", "Hello, grid")
+    GUI.static(2, 1, "neon_pink", "A测B试")
+    GUI.static(GUI.row_column_resolution[0] - 1, 2, "White", "测")
+
+
+def test_render_atlas_gather_matches_reference():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=4)
+        _write_sample_text()
+        GUI.screen[3][0] = GUI.WIDE_CONT
+        GUI.screen[3][4] = "\u6d4b"
+        GUI.render(GUI.screen, GUI.screen_color)
+        assert np.array_equal(GUI.screen_raw, _reference_screen_raw())
+        atlas_size = GUI._glyph_atlas_count
+        GUI.render(GUI.screen, GUI.screen_color)
+        assert GUI._glyph_atlas_count == atlas_size
+
+        GUI.clear_screen()
+        GUI.render(GUI.screen, GUI.screen_color)
+        assert not GUI.screen_raw.any()
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_sprite_blits_match_reference():
+    pygame.init()
+    _init_fonts()
+    try:
+        for scale in (1, 2):
+            GUI.set_display_defaults(cols=16, rows=4, pixel_scale=scale)
+            _write_sample_text()
+            assert np.array_equal(_rasterize(), _reference_pixels())
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_numpy_rasterizer_matches_reference():
+    pygame.init()
+    _init_fonts()
+    try:
+        for scale in (1, 3):
+            GUI.set_display_defaults(cols=16, rows=4, pixel_scale=scale, char_block_spacing_px=2, rasterizer="numpy")
+            assert GUI.get_display_defaults()["rasterizer"] == "numpy"
+            _write_sample_text()
+            assert np.array_equal(_rasterize(), _reference_pixels())
+        GUI.set_layout_mode(True)
+        _write_sample_text()
+        assert np.array_equal(_rasterize(), _reference_pixels())
+    finally:
+        GUI.set_layout_mode(False)
+        GUI.reset_display_defaults()
+
+
+def test_text_layer_backends_agree_without_render():
+    pygame.init()
+    _init_fonts()
+    try:
+        results = {}
+        for mode, raster, color_mode in (("blit", "blit", "rgb"), ("numpy", "numpy", "rgb"), ("indexed", "blit", "indexed")):
+            GUI.set_display_defaults(cols=16, rows=4, rasterizer=raster, color_mode=color_mode)
+            _write_sample_text()
+            GUI.render(GUI.screen, GUI.screen_color)
+            # Text written after the last render() must still reach the atlas-based paths.
+            GUI.static(1, 0, "White", "stale?")
+            surf = GUI.create_render_surface()
+            GUI.draw_to_surface(surf)
+            results[mode] = pygame.surfarray.array3d(surf)
+        assert np.array_equal(results["blit"], _reference_pixels())
+        assert np.array_equal(results["numpy"], results["blit"])
+        assert np.array_equal(results["indexed"], results["blit"])
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_rasterizer_option_is_sanitized():
+    try:
+        assert GUI.set_display_defaults(rasterizer=" NumPy ")["rasterizer"] == "numpy"
+        assert GUI.set_display_defaults(rasterizer="bogus")["rasterizer"] == "blit"
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_sprite_cache_invalidation():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=8, rows=2)
+        GUI.set_layout_mode(False)
+        _write_sample_text()
+        _rasterize()
+        assert GUI._glyph_sprite_cache
+
+        GUI.set_layout_mode(True)
+        assert not GUI._glyph_sprite_cache
+        assert np.array_equal(_rasterize(), _reference_pixels())
+        GUI.set_layout_mode(False)
+
+        _rasterize()
+        GUI.refresh_palette_cache()
+        assert not GUI._glyph_sprite_cache
+
+        _rasterize()
+        GUI.set_display_defaults(pixel_scale=2)
+        assert not GUI._glyph_sprite_cache
+
+        _write_sample_text()
+        _rasterize()
+        _init_fonts()
+        assert not GUI._glyph_sprite_cache
+    finally:
+        GUI.set_layout_mode(False)
+        GUI.reset_display_defaults()
+
+
+def _draw_tracked(surf):
+    GUI.render(GUI.screen, GUI.screen_color)
+    GUI.draw_to_surface(surf)
+    return pygame.surfarray.array3d(surf)
+
+
+def _draw_full():
+    surf = pygame.Surface(GUI.get_window_size_px())
+    GUI.mark_full_redraw()
+    GUI.draw_to_surface(surf)
+    GUI.mark_full_redraw()
+    return pygame.surfarray.array3d(surf)
+
+
+def test_dirty_tracking_matches_full_redraw():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=4, pixel_scale=2, dirty_tracking=True)
+        surf = pygame.Surface(GUI.get_window_size_px())
+        _write_sample_text()
+        GUI.draw_rect("White", 0, 0, 40, 40, filled=False, thickness=1)
+        _draw_tracked(surf)
+        assert GUI.get_dirty_rects() == [surf.get_rect()]
+
+        _draw_tracked(surf)
+        assert GUI.get_dirty_rects() == []
+
+        GUI.static(4, 0, "neon_pink", "XY")
+        GUI.static(2, 1, "neon_pink", "  ")
+        GUI.line_queue.clear()
+        GUI.draw_rect("White", 60, 10, 20, 20, filled=False, thickness=1)
+        tracked = _draw_tracked(surf)
+        rects = GUI.get_dirty_rects()
+        assert rects and all(r.width * r.height < surf.get_width() * surf.get_height() for r in rects)
+        assert np.array_equal(tracked, _draw_full())
+
+        GUI.mark_full_redraw()
+        _draw_tracked(surf)
+        assert GUI.get_dirty_rects() == [surf.get_rect()]
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_dirty_tracking_diffs_overlays_in_bulk():
+    pygame.init()
+    _init_fonts()
+    item_key_calls = []
+    original = GUI._overlay_item_keys
+
+    def counting(kind, queue, clip_table):
+        item_key_calls.append(kind)
+        return original(kind, queue, clip_table)
+
+    GUI._overlay_item_keys = counting
+    try:
+        GUI.set_display_defaults(cols=16, rows=4, dirty_tracking=True)
+        surf = pygame.Surface(GUI.get_window_size_px())
+
+        def frame(moved_x):
+            GUI.reset_overlays()
+            GUI.draw_rects("CRT_Cyan", [(i * 6, 2, 4, 4) for i in range(20)])
+            GUI.draw_rect("White", moved_x, 30, 10, 10, filled=False)
+            GUI.draw_pattern_rect("White", 0, 40, 30, 20, mode="raster")
+            GUI.draw_super_text_px(70, 5, "White", "ok")
+            return _draw_tracked(surf)
+
+        _write_sample_text()
+        frame(20)
+        frame(20)
+        assert GUI.get_dirty_rects() == [] and item_key_calls == []
+        # Only the line queue changed, so only it falls back to per-item diffing.
+        tracked = frame(50)
+        assert set(item_key_calls) == {1}
+        assert GUI.get_dirty_rects() and np.array_equal(tracked, _draw_full())
+
+        # hash(-1) == hash(-2): the digest must still see a label moved between them.
+        for x in (-1, -2):
+            GUI.reset_overlays()
+            GUI.draw_super_text_px(x, 5, "White", "ok")
+            tracked = _draw_tracked(surf)
+        assert GUI.get_dirty_rects() and np.array_equal(tracked, _draw_full())
+    finally:
+        GUI._overlay_item_keys = original
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def test_dirty_tracking_off_reports_full_surface():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=8, rows=2)
+        assert GUI.get_display_defaults()["dirty_tracking"] is False
+        _rasterize()
+        _rasterize()
+        assert GUI.get_dirty_rects() == [pygame.Rect((0, 0), GUI.get_window_size_px())]
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_indexed_surface_matches_reference():
+    pygame.init()
+    _init_fonts()
+    try:
+        assert GUI.set_display_defaults(color_mode="bogus")["color_mode"] == "rgb"
+        for scale in (1, 2):
+            GUI.set_display_defaults(cols=16, rows=4, pixel_scale=scale, char_block_spacing_px=1, color_mode="indexed")
+            surf = GUI.create_render_surface()
+            assert surf.get_bitsize() == 8
+            _write_sample_text()
+            GUI.render(GUI.screen, GUI.screen_color)
+            GUI.draw_to_surface(surf)
+            assert np.array_equal(pygame.surfarray.array3d(surf), _reference_pixels())
+        GUI.set_layout_mode(True)
+        GUI.draw_to_surface(surf)
+        assert np.array_equal(pygame.surfarray.array3d(surf), _reference_pixels())
+    finally:
+        GUI.set_layout_mode(False)
+        GUI.reset_display_defaults()
+
+
+def test_indexed_surface_draws_background_slot_color():
+    pygame.init()
+    _init_fonts()
+    saved = list(GUI.hsv_palette)
+    try:
+        GUI.set_display_defaults(cols=8, rows=2)
+
+        def frame(indexed):
+            GUI.set_display_defaults(color_mode="indexed" if indexed else "rgb")
+            surf = GUI.create_render_surface()
+            GUI.clear_screen()
+            GUI.reset_overlays()
+            GUI.static(0, 0, GUI.INDEXED_BG_INDEX, "AB")
+            GUI.draw_rect(GUI.INDEXED_BG_INDEX, 40, 2, 10, 10, filled=True)
+            GUI.draw_super_text_px(2, 20, GUI.INDEXED_BG_INDEX, "px")
+            GUI.render(GUI.screen, GUI.screen_color)
+            GUI.draw_to_surface(surf)
+            return pygame.surfarray.array3d(surf)
+
+        # The default palette repeats slot 255's color, so indexed output is exact.
+        expected = frame(False)
+        assert np.array_equal(frame(True), expected)
+        assert (expected != GUI.window_bg_color_rgb).any(axis=2).sum() > 0
+
+        # A unique slot 255 color falls back to the closest remaining palette color, never the background.
+        GUI.hsv_palette[GUI.INDEXED_BG_INDEX] = (0.6, 0.5, 0.7, "stat255")
+        GUI.refresh_palette_cache()
+        lit = (frame(False) != GUI.window_bg_color_rgb).any(axis=2)
+        got = frame(True)
+        assert (got[lit] != GUI.window_bg_color_rgb).any(axis=1).all()
+    finally:
+        GUI.hsv_palette[:] = saved
+        GUI.refresh_palette_cache()
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def test_indexed_palette_change_skips_repaint():
+    pygame.init()
+    _init_fonts()
+    saved = list(GUI.hsv_palette)
+    try:
+        GUI.set_display_defaults(cols=8, rows=2, color_mode="indexed", dirty_tracking=True)
+        surf = GUI.create_render_surface()
+        GUI.static(0, 0, "blink0", "AB")
+        GUI.render(GUI.screen, GUI.screen_color)
+        GUI.draw_to_surface(surf)
+        indices = pygame.surfarray.array2d(surf)
+        lit_rgb = GUI.get_color_rgb("blink0")
+
+        GUI.rotate_palette_range(0, 16, 1)
+        assert GUI.get_color_rgb("blink1") == lit_rgb
+        GUI.draw_to_surface(surf)
+        assert np.array_equal(pygame.surfarray.array2d(surf), indices)
+        assert GUI.get_dirty_rects() == [surf.get_rect()]
+        assert surf.get_palette_at(GUI.pal("blink0"))[:3] == GUI.get_color_rgb("blink0")
+
+        GUI.draw_to_surface(surf)
+        assert GUI.get_dirty_rects() == []
+    finally:
+        GUI.hsv_palette[:] = saved
+        GUI.refresh_palette_cache()
+        GUI.reset_display_defaults()
+
+
+def test_scale_at_present_matches_reference():
+    pygame.init()
+    _init_fonts()
+    try:
+        for mode in ("rgb", "indexed"):
+            GUI.set_display_defaults(cols=16, rows=4, pixel_scale=3, border_padding_px=1, scale_at_present=True, color_mode=mode)
+            w, h = GUI.get_present_size_px()
+            assert GUI.get_render_size_px() == (w // 3, h // 3)
+            assert GUI.create_render_surface().get_size() == GUI.get_render_size_px()
+            _write_sample_text()
+            surf = pygame.Surface((w, h))
+            GUI.finish_frame(surf)
+            assert np.array_equal(pygame.surfarray.array3d(surf), _reference_pixels())
+
+        # Overlays keep present-space coordinates.
+        GUI.clear_screen()
+        GUI.draw_rect("White", GUI.gx(2), GUI.gy(1), 30, 30, filled=True)
+        GUI.finish_frame(surf)
+        pixels = pygame.surfarray.array3d(surf)
+        assert tuple(pixels[int(GUI.gx(2)) + 15, int(GUI.gy(1)) + 15]) == GUI.get_color_rgb("White")
+        assert tuple(pixels[int(GUI.gx(2)) - 6, int(GUI.gy(1)) + 15]) == GUI.window_bg_color_rgb
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_compact_glyph_store_and_memory_stats():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=4)
+        assert GUI.screen_raw.dtype == np.uint8
+        plain = {ch: GUI._get_glyph_bitmap(ch, GUI._is_wide_char(ch)) for ch in "Ag测"}
+        assert all(bmp.dtype == np.uint8 for bmp in plain.values())
+        plain_stats = GUI.get_memory_stats()
+        assert plain_stats["glyph_cache"]["entries"] == 3
+        assert plain_stats["screen_raw"]["bytes"] == GUI.screen_raw.size
+
+        GUI.set_display_defaults(glyph_cache_packed=True)
+        _init_fonts()
+        for ch, bmp in plain.items():
+            packed = GUI._get_glyph_bitmap(ch, GUI._is_wide_char(ch))
+            assert np.array_equal(packed, bmp)
+            assert np.array_equal(GUI._get_glyph_bitmap(ch, GUI._is_wide_char(ch)), bmp)
+        packed_stats = GUI.get_memory_stats()
+        assert packed_stats["glyph_cache"]["packed"] is True
+        assert packed_stats["glyph_cache"]["bytes"] * 8 == plain_stats["glyph_cache"]["bytes"]
+        assert packed_stats["total_bytes"] == sum(v["bytes"] for k, v in packed_stats.items() if k != "total_bytes")
+
+        _write_sample_text()
+        assert np.array_equal(_rasterize(), _reference_pixels())
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_glyph_caches_are_bounded_lru():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=4, glyph_cache_max_entries=3, glyph_sprite_cache_max_entries=2)
+        GUI.reset_glyph_cache_stats()
+        for ch in "ABCA":
+            GUI._get_glyph_bitmap(ch, False)
+        stats = GUI.get_glyph_cache_stats()["glyph_cache"]
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 0)
+        GUI._get_glyph_bitmap("D", False)
+        assert "B" not in {key[0] for key in GUI._glyph_cache._data}
+        assert GUI.get_glyph_cache_stats()["glyph_cache"]["evictions"] == 1
+
+        limit = GUI._get_glyph_bitmap("A", False).nbytes * 2
+        GUI.set_display_defaults(glyph_cache_max_bytes=limit)
+        for ch in "EFG":
+            GUI._get_glyph_bitmap(ch, False)
+        assert len(GUI._glyph_cache) == 2
+        assert GUI.get_memory_stats()["glyph_cache"]["bytes"] <= limit
+
+        GUI.static(0, 0, "White", "abcdefgh")
+        _rasterize()
+        assert len(GUI._glyph_sprite_cache) <= 2
+        assert GUI._glyph_atlas_count > 3
+        assert np.array_equal(_rasterize(), _reference_pixels())
+        assert GUI.get_glyph_cache_stats()["glyph_atlas"]["resets"] >= 1
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_glyph_disk_cache_round_trip(tmp_path):
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=4, glyph_disk_cache_dir=str(tmp_path))
+        _init_fonts()
+        cold = {ch: GUI._get_glyph_bitmap(ch, GUI._is_wide_char(ch)) for ch in "Ag 测试"}
+        GUI.flush_glyph_disk_cache()
+        files = sorted(tmp_path.iterdir())
+        assert all(p.name.endswith(GUI._GlyphDiskStore.SUFFIX) for p in files) and len(files) == 2
+        sizes = {p: p.stat().st_size for p in files}
+
+        _init_fonts()
+        calls = []
+        original = GUI._rasterize_glyph
+        GUI._rasterize_glyph = lambda *args: calls.append(args) or original(*args)
+        try:
+            warm = {ch: GUI._get_glyph_bitmap(ch, GUI._is_wide_char(ch)) for ch in "Ag 测试"}
+            extra = GUI._get_glyph_bitmap("Z", False)
+        finally:
+            GUI._rasterize_glyph = original
+        assert [args[1] for args in calls] == ["Z"]
+        assert warm[" "] is None
+        for ch, bmp in cold.items():
+            if bmp is not None:
+                assert np.array_equal(warm[ch], bmp)
+
+        GUI.flush_glyph_disk_cache()
+        # Write-back appends only the new record; the existing part of the file is untouched.
+        grown = [p for p in files if p.stat().st_size != sizes[p]]
+        assert len(grown) == 1
+        path = str(grown[0])[: -len(GUI._GlyphDiskStore.SUFFIX)]
+        store = GUI._GlyphDiskStore(path, 16, 8)
+        assert store._map is not None and isinstance(store.index["NA"], np.ndarray)
+        record = store._RECORD.size + len("NZ") + 16 * 16
+        assert grown[0].stat().st_size == sizes[grown[0]] + record
+        _init_fonts()
+        assert np.array_equal(GUI._get_glyph_bitmap("Z", False), extra)
+        _write_sample_text()
+        assert np.array_equal(_rasterize(), _reference_pixels())
+
+        # Another process appending (same file, separate store) never remaps existing keys.
+        other = GUI._GlyphDiskStore(path, 16, 8)
+        other.put("Q", False, np.ones((16, 8), dtype=np.uint8))
+        mine = GUI._GlyphDiskStore(path, 16, 8)
+        other.flush()
+        mine.put("P", False, None)
+        mine.flush()
+        both = GUI._GlyphDiskStore(path, 16, 8)
+        assert np.array_equal(both.get("Z", False), extra) and both.get("Q", False).all() and both.get("P", False) is None
+        # A torn record fails its CRC; the reader skips to the next record and nothing is rewritten.
+        size = grown[0].stat().st_size
+        with open(grown[0], "ab") as fh:
+            fh.write(b"GR\x05\x00\x01garbage")
+        torn = GUI._GlyphDiskStore(path, 16, 8)
+        assert np.array_equal(torn.get("Z", False), extra) and torn.get("R", False) is GUI._MISSING
+        torn.put("R", False, None)
+        torn.flush()
+        assert grown[0].stat().st_size == size + 12 + torn._RECORD.size + len("NR")
+        healed = GUI._GlyphDiskStore(path, 16, 8)
+        assert healed.get("R", False) is None and healed.get("Q", False).all()
+        # A file with a foreign header is neither read nor appended to.
+        with open(grown[0], "r+b") as fh:
+            fh.seek(4)
+            fh.write(struct.pack("<H", 99))
+        size = grown[0].stat().st_size
+        stale = GUI._GlyphDiskStore(path, 16, 8)
+        assert not stale.writable and stale.get("Z", False) is GUI._MISSING
+        stale.put("S", False, None)
+        stale.flush()
+        assert grown[0].stat().st_size == size
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_prewarm_glyphs_background_merge():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=4)
+        sample = "Prewarm 测试用字"
+        assert GUI.prewarm_glyphs(sample) == len(set(sample) - {" "})
+        assert GUI.wait_glyph_prewarm(timeout=10)
+        GUI.reset_glyph_cache_stats()
+        expected = {}
+        for ch in set(sample) - {" "}:
+            wide = GUI._is_wide_char(ch)
+            expected[ch] = GUI._get_glyph_bitmap(ch, wide)
+            font, _ = GUI._glyph_font(wide)
+            cell_h, cell_w = GUI.char_resolution
+            assert np.array_equal(expected[ch], GUI._rasterize_glyph(font, ch, cell_h, cell_w * (2 if wide else 1)))
+        assert GUI.get_glyph_cache_stats()["glyph_cache"]["misses"] == 0
+        assert GUI.prewarm_glyphs(sample) == 0
+
+        # Results computed for an older font generation are dropped.
+        GUI.prewarm_glyphs("XYZ")
+        _init_fonts()
+        GUI.wait_glyph_prewarm(timeout=10)
+        assert len(GUI._glyph_cache) == 0
+
+        assert GUI.prewarm_glyphs("Q", background=False) == 1
+        assert len(GUI._glyph_cache) == 1
+
+        # Worker freetype calls wait for the raster lock, so they never overlap another thread's.
+        with GUI._raster_lock:
+            assert GUI.prewarm_glyphs("RST") == 3
+            assert not GUI.wait_glyph_prewarm(timeout=0.1)
+        assert GUI.wait_glyph_prewarm(timeout=10)
+        assert len(GUI._glyph_cache) == 4
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_overlay_command_buffers():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=6)
+        GUI.reset_overlays()
+        GUI.line_queue.append((1, 2, 3, 4, 204, 1.0))
+        GUI.line_queue.extend([(3, 4, 9, 9, 204, 1.0), (0, 0, 5, 5, 211, 2.0)])
+        assert len(GUI.line_queue) == 3
+        assert GUI.line_queue[0] == (1.0, 2.0, 3.0, 4.0, 204, 1.0)
+        assert list(GUI.line_queue)[-1] == (0.0, 0.0, 5.0, 5.0, 211, 2.0)
+        GUI.fillpoly_queue.append(([(0, 0), (10, 0), (5, 8)], 203))
+        assert GUI.fillpoly_queue[0] == ([(0.0, 0.0), (10.0, 0.0), (5.0, 8.0)], 203)
+
+        GUI.reset_overlays()
+        for i in range(300):
+            GUI.draw_rect(("White", "CRT_Cyan", "neon_pink")[i % 3], (i * 7) % 100, (i * 5) % 60, 12, 9, filled=False, thickness=1 + i % 2)
+            GUI.draw_rect("CRT_Green", (i * 3) % 100, (i * 11) % 60, 6, 6, filled=True)
+        GUI.draw_pattern_rect("White", 10, 10, 40, 30)
+        stats = GUI.get_overlay_queue_stats()
+        assert stats["lines"]["count"] == len(GUI.line_queue) > 1200
+        assert stats["fillpolys"]["count"] == 300
+
+        expected = pygame.Surface(GUI.get_window_size_px())
+        for v, c in GUI.fillpoly_queue:
+            pygame.draw.polygon(expected, GUI.get_color_rgb(c), v)
+        for x1, y1, x2, y2, c, t in GUI.line_queue:
+            pygame.draw.line(expected, GUI.get_color_rgb(c), (x1, y1), (x2, y2), max(1, int(round(t))))
+        actual = pygame.Surface(GUI.get_window_size_px())
+        GUI._draw_fillpolys(actual, GUI.fillpoly_queue)
+        GUI._draw_lines(actual, GUI.line_queue)
+        assert np.array_equal(pygame.surfarray.array3d(actual), pygame.surfarray.array3d(expected))
+
+        capacity = stats["lines"]["capacity"]
+        GUI.reset_overlays()
+        assert len(GUI.line_queue) == 0
+        assert GUI.get_overlay_queue_stats()["lines"]["capacity"] == capacity
+        assert GUI.get_overlay_queue_stats()["lines"]["peak"] == stats["lines"]["count"]
+    finally:
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def _reference_super_text(surface, text, x_px, y_px, color, scale):
+    """Per-glyph, per-pixel super-text fill (pre text-run algorithm)."""
+    cell_h, cell_w = GUI.char_resolution
+    rgb = GUI.get_color_rgb(color)
+    px_scale = scale * GUI.PIXEL_SCALE
+    for line_idx, line in enumerate(text.split("\n")):
+        x = x_px
+        y = y_px + line_idx * cell_h * px_scale
+        for ch in line:
+            wide = GUI._is_wide_char(ch)
+            bmp = GUI._get_glyph_bitmap_custom(ch, wide, cell_w, cell_h)
+            if bmp is not None:
+                for py, px in zip(*np.nonzero(bmp)):
+                    surface.fill(rgb, (x + px * px_scale, y + py * px_scale, px_scale, px_scale))
+            x += cell_w * px_scale * (2 if wide else 1)
+
+
+def test_super_text_runs_are_cached():
+    pygame.init()
+    _init_fonts()
+    try:
+        for mode, scale in (("rgb", 1), ("rgb", 2), ("indexed", 2)):
+            GUI.set_display_defaults(cols=24, rows=6, pixel_scale=scale, color_mode=mode)
+            GUI.clear_screen()
+            GUI.reset_overlays()
+            GUI.draw_super_text_px(3, 5, "CRT_Cyan", "Run 测试\nAB", scale=2)
+            assert len(GUI.super_text_queue) == 2
+            expected = pygame.Surface(GUI.get_window_size_px())
+            expected.fill(GUI.window_bg_color_rgb)
+            _reference_super_text(expected, "Run 测试\nAB", 3, 5, "CRT_Cyan", 2)
+            GUI.reset_glyph_cache_stats()
+            for _ in range(3):
+                surf = GUI.create_render_surface()
+                GUI.finish_frame(surf)
+                assert np.array_equal(pygame.surfarray.array3d(surf), pygame.surfarray.array3d(expected))
+            stats = GUI.get_glyph_cache_stats()["text_runs"]
+            assert (stats["misses"], stats["hits"]) == (2, 4)
+            assert GUI.get_memory_stats()["text_runs"]["bytes"] == stats["bytes"] > 0
+
+        GUI.set_display_defaults(text_run_cache_max_entries=2)
+        for i in range(5):
+            GUI.draw_super_text_px(0, i * 40, "White", f"line {i}")
+        GUI.finish_frame(GUI.create_render_surface())
+        stats = GUI.get_glyph_cache_stats()["text_runs"]
+        assert stats["entries"] == 2 and stats["evictions"] >= 3
+    finally:
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def _reference_hatch(vertices, spacing, angle_deg, offset):
+    """Scanline-by-scanline hatch clipping (pre-vectorization algorithm)."""
+    theta = np.deg2rad(angle_deg)
+    direction = (float(np.cos(theta)), float(np.sin(theta)))
+    normal = (-direction[1], direction[0])
+
+    def dot(a, b):
+        return a[0] * b[0] + a[1] * b[1]
+
+    proj = [dot(v, normal) for v in vertices]
+    k = np.floor((min(proj) - offset) / spacing) * spacing + offset
+    segments = []
+    while k <= max(proj) + spacing * 1e-6 + 1e-9:
+        pts = []
+        for i, a in enumerate(vertices):
+            b = vertices[(i + 1) % len(vertices)]
+            da, db = dot(a, normal) - k, dot(b, normal) - k
+            if abs(da) <= 1e-9:
+                pts.append(a)
+                if abs(db) <= 1e-9:
+                    pts.append(b)
+            elif abs(db) <= 1e-9:
+                pts.append(b)
+            elif da * db < 0.0:
+                t = da / (da - db)
+                pts.append((a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])))
+        unique = []
+        for p in pts:
+            if (round(p[0], 6), round(p[1], 6)) not in [(round(q[0], 6), round(q[1], 6)) for q in unique]:
+                unique.append(p)
+        unique.sort(key=lambda p: dot(p, direction))
+        for i in range(len(unique) // 2):
+            p1, p2 = unique[2 * i], unique[2 * i + 1]
+            if abs(p1[0] - p2[0]) > 1e-6 or abs(p1[1] - p2[1]) > 1e-6:
+                segments.append((p1[0], p1[1], p2[0], p2[1]))
+        k += spacing
+    return np.array(segments, dtype=np.float64).reshape(-1, 4)
+
+
+def test_hatch_segments_vectorized_and_cached():
+    shapes = (
+        [(0, 0), (40, 0), (40, 30), (0, 30)],
+        [(0, 0), (30, 10), (5, 25)],
+        [(0, 0), (40, 0), (40, 40), (20, 12), (0, 40)],
+        [(0, 0), (10, 0), (10, 10), (20, 10), (20, 20), (0, 20)],
+    )
+    for verts in shapes:
+        for angle in (0.0, 45.0, 90.0, 135.0, 30.0):
+            for offset in (0.0, 2.5, 7.0):
+                got = GUI._build_hatch_segments(verts, 5.0, angle, offset)
+                expected = _reference_hatch([(float(x), float(y)) for x, y in verts], 5.0, angle, offset)
+                assert got.shape == expected.shape
+                assert np.allclose(got, expected, atol=1e-6)
+
+    GUI.reset_overlays()
+    GUI._hatch_cache.clear()
+    GUI._hatch_cache.reset_stats()
+    try:
+        for frame in range(8):
+            GUI.reset_overlays()
+            GUI.draw_pattern_rect("White", 33, 20, 40, 30, offset=frame % 4)
+        stats = GUI.get_overlay_queue_stats()["hatch_cache"]
+        assert (stats["misses"], stats["hits"]) == (4, 4)
+        base_h = float(GUI.char_resolution[0])
+        rect = [(0, 0), (40, 0), (40, 30), (0, 30)]
+        absolute = [(33 + x, 20 + y) for x, y in GUI._poly_local_vertices_scaled(rect, base_h)]
+        spacing = GUI._design_px_to_render_px(4.0, base_h)
+        expected = _reference_hatch(absolute, spacing, 45.0, GUI._design_px_to_render_px(3, base_h))
+        assert np.allclose(GUI.line_queue.array[:, :4], expected, atol=1e-4)
+    finally:
+        GUI.reset_overlays()
+
+
+def _lit(surface, color):
+    return (pygame.surfarray.array3d(surface) == GUI.get_color_rgb(color)).all(axis=2)
+
+
+def _near(mask):
+    out = mask.copy()
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            out |= np.roll(np.roll(mask, dx, axis=0), dy, axis=1)
+    return out
+
+
+def test_raster_pattern_mode():
+    pygame.init()
+    try:
+        GUI.set_display_defaults(cols=20, rows=6)
+        for angle in (0.0, 30.0, 45.0, 90.0, 135.0):
+            GUI.reset_overlays()
+            GUI.draw_pattern_rect("White", 13, 7, 90, 50, angle_deg=angle, offset=1.5)
+            lines = pygame.Surface(GUI.get_window_size_px())
+            GUI.draw_to_surface(lines)
+            GUI.reset_overlays()
+            GUI.draw_pattern_rect("White", 13, 7, 90, 50, angle_deg=angle, offset=1.5, mode="raster")
+            assert len(GUI.line_queue) == 0 and len(GUI.pattern_queue) == 1
+            raster = pygame.Surface(GUI.get_window_size_px())
+            GUI.draw_to_surface(raster)
+            a, b = _lit(raster, "White"), _lit(lines, "White")
+            # Same stripes up to pixel snapping of the raster tile (and at most one stripe at the clip edge).
+            assert (a & ~_near(b)).sum() <= 0.1 * a.sum()
+            assert abs(int(a.sum()) - int(b.sum())) <= 0.1 * b.sum()
+
+        GUI._pattern_surface_cache.clear()
+        GUI._pattern_surface_cache.reset_stats()
+        GUI.set_display_defaults(dirty_tracking=True)
+        surf = pygame.Surface(GUI.get_window_size_px())
+        for frame in range(12):
+            GUI.reset_overlays()
+            GUI.draw_pattern_rect("CRT_Cyan", 20, 10, 200, 60, offset=frame % 4, mode="raster")
+            GUI.draw_to_surface(surf)
+        stats = GUI.get_overlay_queue_stats()["pattern_surfaces"]
+        assert stats["misses"] <= 4 and stats["hits"] >= 8
+        tracked = pygame.surfarray.array3d(surf)
+        GUI.mark_full_redraw()
+        GUI.draw_to_surface(surf)
+        assert np.array_equal(pygame.surfarray.array3d(surf), tracked)
+    finally:
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def test_poly_shapes_cache_scaled_vertices():
+    try:
+        GUI.add_poly("test_arrow", [(0, 0), (8, 4), (0, 8)], base_font_height_px=8)
+        shape = GUI.poly_shapes["test_arrow"]
+        # Public field stays a tuple of float pairs; shapes compare and hash by value.
+        assert shape.vertices_px == ((0.0, 0.0), (8.0, 4.0), (0.0, 8.0))
+        twin = GUI.PolyShape(vertices_px=shape.vertices_px, base_font_height_px=8.0)
+        assert twin == shape and hash(twin) == hash(shape) and len({shape, twin}) == 1
+
+        GUI.reset_overlays()
+        GUI._poly_scaled_cache.reset_stats()
+        for i in range(5):
+            GUI.draw_poly("test_arrow", "White", 10 * i, 5, filled=True)
+        stats = GUI._poly_scaled_cache.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 4)
+        factor = GUI.char_resolution[0] / 8 * GUI.PIXEL_SCALE
+        verts, _ = GUI.fillpoly_queue[4]
+        assert np.allclose(verts, [(40, 5), (40 + 8 * factor, 5 + 4 * factor), (40, 5 + 8 * factor)])
+
+        GUI.reset_overlays()
+        GUI.draw_poly("test_arrow", "White", 1, 2, filled=False, thickness=2)
+        edges = [tuple(round(v, 6) for v in seg[:4]) for seg in GUI.line_queue]
+        p = [(1, 2), (1 + 8 * factor, 2 + 4 * factor), (1, 2 + 8 * factor)]
+        assert edges == [(*p[i], *p[(i + 1) % 3]) for i in range(3)]
+
+        GUI.set_display_defaults(pixel_scale=GUI.PIXEL_SCALE + 1)
+        assert len(GUI._poly_scaled_cache) == 0
+        factor = GUI.char_resolution[0] / 8 * GUI.PIXEL_SCALE
+        assert np.allclose(GUI._poly_local_vertices_scaled(shape, 8)[1], (8 * factor, 4 * factor))
+
+        out = GUI.transform_poly_vertices("test_arrow", scale_x=2.0, scale_y=0.5, angle_deg=30.0)
+        theta = np.deg2rad(30.0)
+        expected = [
+            (x * 2.0 * np.cos(theta) - y * 0.5 * np.sin(theta), x * 2.0 * np.sin(theta) + y * 0.5 * np.cos(theta))
+            for x, y in [(0, 0), (8, 4), (0, 8)]
+        ]
+        assert isinstance(out, tuple) and np.allclose(out, expected)
+    finally:
+        GUI.poly_shapes.pop("test_arrow", None)
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def _queued():
+    return [(np.round(v, 6).tolist(), c) for v, c in GUI.fillpoly_queue], [tuple(np.round(r, 6)) for r in GUI.line_queue.array]
+
+
+def test_batched_primitives_match_single_calls():
+    rects = [(4, 5, 10, 6), (20.5, 3, 7, 9), (40, 40, 3, 2)]
+    colors = ["White", None, "CRT_Cyan"]
+    try:
+        GUI.add_poly("test_tri", [(0, 0), (6, 2), (1, 5)], base_font_height_px=8)
+        for filled in (True, False):
+            GUI.reset_overlays()
+            for (x, y, w, h), c in zip(rects, colors):
+                if c is not None:
+                    GUI.draw_rect(c, x, y, w, h, filled=filled, thickness=2)
+            for x, y in ((1, 2), (30, 8)):
+                GUI.draw_poly("test_tri", "neon_pink", x, y, filled=filled)
+            GUI.draw_poly([(0, 0), (4, 0), (2, 3)], "White", 9, 9, filled=filled)
+            expected = _queued()
+
+            GUI.reset_overlays()
+            assert GUI.draw_rects(colors, rects, filled=filled, thickness=2) == 2
+            assert GUI.draw_polys("test_tri", "neon_pink", [(1, 2), (30, 8)], filled=filled) == 2
+            assert GUI.draw_polys([[(0, 0), (4, 0), (2, 3)]], ["White"], [(9, 9)], filled=filled) == 1
+            assert _queued() == expected
+
+        GUI.reset_overlays()
+        assert GUI.draw_lines("White", [(0, 0, 5, 5), (5, 5, 9, 1)], thickness=3) == 2
+        assert list(GUI.line_queue) == [(0.0, 0.0, 5.0, 5.0, GUI.pal("White"), 3.0), (5.0, 5.0, 9.0, 1.0, GUI.pal("White"), 3.0)]
+
+        values = [0, 1.5, 7]
+        assert np.allclose(GUI.gx_array(values), [GUI.gx(v) for v in values])
+        assert np.allclose(GUI.gy_array(values), [GUI.gy(v) for v in values])
+        xs, ys = GUI.grid_to_px_array(values, 2, ox=1)
+        assert np.allclose(np.stack([xs, ys], 1), [GUI.grid_to_px(v, 2, ox=1) for v in values])
+    finally:
+        GUI.poly_shapes.pop("test_tri", None)
+        GUI.reset_overlays()
+
+
+def test_instruments_use_batched_primitives():
+    from core.anyware import MeterBar, SegmentDisplay
+    from core.anyware.context import AnywareContext
+
+    ctx = AnywareContext(GUI.create_runtime(min_api_level=1))
+    try:
+        for orientation in ("horizontal", "vertical"):
+            meter = MeterBar(
+                gx=1, gy=1, width_px=80, height_px=40, value=0.45, mode="segments", segments=6,
+                orientation=orientation, empty_color="CRT_Green",
+            )
+            GUI.reset_overlays()
+            meter._draw_segments(ctx, 10, 20, 80, 40, 0.45)
+            queued = _queued()
+            GUI.reset_overlays()
+            count, gap = 6, meter.gap_px
+            inner = (12.0, 22.0, 76.0, 36.0)
+            for i in range(count):
+                color = "CRT_Cyan" if i < 2 else "CRT_Green"
+                if orientation == "vertical":
+                    seg_h = (inner[3] - gap * (count - 1)) / count
+                    GUI.draw_rect(color, inner[0], inner[1] + (count - 1 - i) * (seg_h + gap), inner[2], seg_h, filled=True)
+                else:
+                    seg_w = (inner[2] - gap * (count - 1)) / count
+                    GUI.draw_rect(color, inner[0] + i * (seg_w + gap), inner[1], seg_w, inner[3], filled=True)
+            assert queued == _queued()
+
+        display = SegmentDisplay(gx=0, gy=0, text="8.1", off_color="CRT_Green")
+        GUI.reset_overlays()
+        display.render(ctx)
+        # Eight lit segments + decimal point, then "1": two lit and five unlit segments.
+        assert len(GUI.fillpoly_queue) == 7 + 1 + 7
+    finally:
+        GUI.reset_overlays()
+
+
+def test_clip_stack_culls_and_clips():
+    pygame.init()
+    try:
+        GUI.set_display_defaults(cols=20, rows=6)
+        w, h = GUI.get_window_size_px()
+        GUI.reset_overlays()
+        assert GUI.get_clip_rect() == (0, 0, w, h)
+        GUI.draw_rect("White", w + 50, 10, 20, 20, filled=True)
+        GUI.draw_super_text_px(10, h + 40, "White", "off screen")
+        assert len(GUI.fillpoly_queue) == 0 and len(GUI.super_text_queue) == 0
+        assert GUI.get_overlay_queue_stats()["culling"]["culled"] == 2
+
+        GUI.reset_overlays()
+        assert GUI.push_clip_rect(20, 10, 60, 40) == (20, 10, 60, 40)
+        assert GUI.push_clip_rect(0, 0, 50, 200) == (20, 10, 30, 40)
+        assert GUI.pop_clip_rect() == (20, 10, 30, 40)
+        GUI.draw_rect("White", 30, 20, 10, 10, filled=True)
+        GUI.draw_rect("CRT_Cyan", 0, 0, 50, 30, filled=True)
+        GUI.draw_rect("White", 100, 10, 10, 10, filled=True)
+        GUI.draw_lines("White", [(0, 60, 10, 60), (10, 30, 120, 30)])
+        GUI.draw_pattern_rect("White", 200, 20, 40, 40)
+        GUI.draw_super_text_px(60, 40, "White", "clip")
+        GUI.pop_clip_rect()
+        GUI.draw_rect("White", 0, 0, 4, 4, filled=True)
+        assert list(GUI.fillpoly_queue.clip_ids) == [0, 1, 0]
+        assert list(GUI.line_queue.clip_ids) == [1]
+        assert GUI.super_text_queue.clip_ids == [1]
+        assert GUI.get_overlay_queue_stats()["culling"] == {"culled": 3, "clipped": 3, "clip_depth": 0}
+
+        surf = pygame.Surface((w, h))
+        GUI.draw_to_surface(surf)
+        cyan = _lit(surf, "CRT_Cyan")
+        assert cyan[20:50, 10:30].all() and not cyan[:20].any() and not cyan[:, :10].any()
+        lit = cyan | _lit(surf, "White")
+        assert lit[0:4, 0:4].all()
+        assert not lit[80:, :60].any() and not lit[:, 50:].any()
+
+        # Moving only the clip rect is a change for dirty tracking.
+        GUI.set_display_defaults(dirty_tracking=True)
+        surf = pygame.Surface((w, h))
+        for clip_w in (60, 30):
+            GUI.reset_overlays()
+            GUI.push_clip_rect(20, 10, clip_w, 40)
+            GUI.draw_rect("CRT_Cyan", 0, 0, 100, 30, filled=True)
+            GUI.pop_clip_rect()
+            GUI.draw_to_surface(surf)
+        assert GUI.get_dirty_rects() and not _lit(surf, "CRT_Cyan")[50:].any()
+        tracked = pygame.surfarray.array3d(surf)
+        GUI.mark_full_redraw()
+        GUI.draw_to_surface(surf)
+        assert np.array_equal(pygame.surfarray.array3d(surf), tracked)
+    finally:
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def _write_psf2(path, glyphs, table=None):
+    """PSF2 file from an (N, h, w) 0/1 array; table lists the characters of each glyph."""
+    n, h, w = glyphs.shape
+    rows = np.packbits(glyphs.astype(np.uint8), axis=2)
+    header = struct.pack("<4sIIIIIII", b"\x72\xb5\x4a\x86", 0, 32, 1 if table else 0, n, rows[0].size, h, w)
+    data = header + rows.tobytes()
+    if table:
+        data += b"".join(chars.encode("utf-8") + b"\xff" for chars in table)
+    Path(path).write_bytes(data)
+
+
+def test_bitmap_fonts_bypass_freetype(tmp_path):
+    pygame.init()
+    builtin = GUI.get_builtin_bitmap_font("5x7")
+    letter_a = builtin.glyph("A")
+    assert letter_a.shape == (7, 5) and letter_a[4].all() and not letter_a[0, 0]
+
+    cell = np.zeros((3, 9, 8), dtype=np.uint8)
+    cell[1, 1:8, 1:6] = letter_a
+    cell[2, 0] = 1
+    _write_psf2(tmp_path / "font.psfu", cell, [" ", "A\u0391", "_"])
+    psf1 = np.zeros((256, 9), dtype=np.uint8)
+    psf1[ord("A")] = np.packbits(cell[1], axis=1)[:, 0]
+    (tmp_path / "font.psf").write_bytes(bytes([0x36, 0x04, 0, 9]) + psf1.tobytes())
+    (tmp_path / "font.bdf").write_text(
+        "STARTFONT 2.1\nFONTBOUNDINGBOX 16 9 0 -2\n"
+        "STARTCHAR A\nENCODING 65\nDWIDTH 8 0\nBBX 5 7 1 0\nBITMAP\n"
+        + "".join(f"{int(''.join(map(str, row)), 2) << 3:02X}\n" for row in letter_a)
+        + "ENDCHAR\nSTARTCHAR wide\nENCODING 20013\nDWIDTH 16 0\nBBX 16 1 0 -2\nBITMAP\nFFFF\nENDCHAR\nENDFONT\n"
+    )
+
+    psf2 = GUI.load_bitmap_font(tmp_path / "font.psfu")
+    assert psf2.mapped and (psf2.cell_w, psf2.cell_h) == (8, 9)
+    assert psf2.index["A"] == psf2.index["\u0391"] == 1
+    assert np.array_equal(psf2.glyph("A"), cell[1])
+    assert np.array_equal(GUI.load_bitmap_font(tmp_path / "font.psf").glyph("A"), cell[1])
+    bdf = GUI.load_bitmap_font(tmp_path / "font.bdf")
+    assert (bdf.cell_w, bdf.cell_h) == (8, 9)
+    # Baseline sits two rows above the cell bottom, so the undescended glyph fills rows 0-6.
+    assert np.array_equal(bdf.glyph("A")[:7], cell[1][1:8])
+    assert bdf.glyph("中").shape == (9, 16) and bdf.glyph("中")[8].all()
+
+    rasterize = GUI._rasterize_glyph
+
+    def _no_freetype(*args, **kwargs):
+        raise AssertionError("bitmap fonts must not be rasterized")
+
+    GUI._rasterize_glyph = _no_freetype
+    try:
+        GUI.set_display_defaults(cols=8, rows=2)
+        GUI.set_fonts(ascii_path=str(tmp_path / "font.psfu"))
+        assert list(GUI.char_resolution) == [9, 8]
+        GUI.clear_screen()
+        GUI.static(1, 0, "White", "A_")
+        GUI.render(GUI.screen, GUI.screen_color)
+        assert np.array_equal(GUI.screen_raw[:9, 8:16], cell[1])
+        assert np.array_equal(GUI.screen_raw[:9, 16:24], cell[2])
+        assert GUI.get_memory_stats()["bitmap_fonts"]["mapped_bytes"] == cell.size // 8
+
+        GUI.reset_overlays()
+        GUI.draw_super_text_px(4, 4, "White", "A A", mode="5x7")
+        (_, _, run, _, _), = GUI.super_text_queue
+        bmp = GUI._text_run_bitmap(run)
+        assert bmp.shape == (7, 15)
+        assert np.array_equal(bmp[:, :5], letter_a) and np.array_equal(bmp[:, 10:], letter_a) and not bmp[:, 5:10].any()
+    finally:
+        GUI._rasterize_glyph = rasterize
+        GUI.reset_overlays()
+        _init_fonts()
+        GUI.reset_display_defaults()
+
+
+def test_text_layout_table_and_cache():
+    import unicodedata
+
+    for cp in list(range(0, 0x3000, 7)) + list(range(0x3000, 0x10000, 13)):
+        ch = chr(cp)
+        assert GUI._is_wide_char(ch) == (unicodedata.east_asian_width(ch) in ("W", "F"))
+    assert GUI._is_wide_char("\U0001F600") and not GUI._is_wide_char("\U0001D400")
+
+    pygame.init()
+    _init_fonts()
+    GUI.set_display_defaults(cols=20, rows=6)
+    try:
+        text = "Hello 世界\nsecond line that overflows"
+        assert GUI.measure_text_cells(text) == (26, 2)
+        assert GUI.measure_text_cells(text, orientation="vertical", line_step=2) == (3, 51)
+        assert GUI._truncate_line_to_cells("ab世界", 3) == "ab世"
+        assert GUI._truncate_line_to_cells("ab世界", 4) == "ab世"
+        assert GUI._truncate_line_to_cells("ab世界x", 6) == "ab世界"
+
+        def _box():
+            GUI.clear_screen()
+            GUI.draw_text_box(2, 1, 12, 4, "White", text, align_h="center", align_v="middle")
+            return GUI.screen.copy()
+
+        GUI.reset_glyph_cache_stats()
+        first = _box()
+        misses = GUI.get_glyph_cache_stats()["text_layout"]["misses"]
+        second = _box()
+        stats = GUI.get_glyph_cache_stats()["text_layout"]
+        assert stats["misses"] == misses and stats["hits"] >= 1
+        assert np.array_equal(first, second)
+        assert "".join(first[2, 2:14]) == "Hello 世\ufff9界\ufff9  "
+        assert "".join(first[3, 2:14]) == "second line "
+    finally:
+        GUI.reset_display_defaults()
+
+
+def _reference_static(screen, colors, x, y, c_idx, text, vertical=False, step=1):
+    rows, cols = screen.shape
+
+    def _clear(r, c):
+        if not (0 <= r < rows and 0 <= c < cols):
+            return
+        if screen[r, c] == GUI.WIDE_CONT:
+            if c > 0 and GUI._is_wide_char(screen[r, c - 1]):
+                screen[r, c - 1] = " "
+                colors[r, c - 1] = 0
+            screen[r, c] = " "
+            colors[r, c] = 0
+        elif GUI._is_wide_char(screen[r, c]) and c + 1 < cols and screen[r, c + 1] == GUI.WIDE_CONT:
+            screen[r, c + 1] = " "
+            colors[r, c + 1] = 0
+
+    for ch in text:
+        if not (0 <= x < cols and 0 <= y < rows):
+            break
+        ch = " " if ch == GUI.WIDE_CONT else ch
+        _clear(y, x)
+        if GUI._is_wide_char(ch) and x + 1 < cols:
+            _clear(y, x + 1)
+            screen[y, x], screen[y, x + 1] = ch, GUI.WIDE_CONT
+            colors[y, x] = colors[y, x + 1] = c_idx
+            x += 0 if vertical else 2
+        else:
+            screen[y, x] = ch
+            colors[y, x] = c_idx
+            x += 0 if vertical else 1
+        y += step if vertical else 0
+
+
+def test_static_writes_match_per_char_reference():
+    GUI.set_display_defaults(cols=24, rows=10)
+    try:
+        rng = np.random.default_rng(7)
+        alphabet = list("ab c") + ["世", "界", "\U0001F600", GUI.WIDE_CONT]
+        for _ in range(300):
+            GUI.clear_screen()
+            ref = GUI.screen.copy()
+            ref_c = GUI.screen_color.copy()
+            for _ in range(6):
+                text = "".join(rng.choice(alphabet, size=int(rng.integers(0, 14))))
+                x, y = int(rng.integers(-1, 25)), int(rng.integers(0, 10))
+                color = int(rng.integers(1, 8))
+                vertical = bool(rng.integers(0, 2))
+                step = int(rng.integers(1, 3))
+                if vertical:
+                    GUI.hstatic(x, y, color, text, line_step=step)
+                else:
+                    GUI.static(x, y, color, text)
+                if 0 <= x < 24:
+                    _reference_static(ref, ref_c, x, y, color, text, vertical, step)
+                assert np.array_equal(GUI.screen, ref), (text, x, y, vertical)
+                assert np.array_equal(GUI.screen_color, ref_c)
+        GUI.clear_screen()
+        GUI.static(0, 0, "White", "plain ascii row")
+        assert "".join(GUI.screen[0, :15]) == "plain ascii row"
+    finally:
+        GUI.reset_display_defaults()
+
+
+def test_frame_snapshot_rasterizes_off_live_state():
+    pygame.init()
+    _init_fonts()
+    GUI.set_display_defaults(cols=20, rows=6)
+    try:
+        w, h = GUI.get_window_size_px()
+        GUI.begin_frame()
+        GUI.static(1, 1, "White", "snap 世界")
+        GUI.hstatic(18, 0, "CRT_Cyan", "abc")
+        GUI.push_clip_rect(0, 0, 60, 40)
+        GUI.draw_rect("CRT_Cyan", 10, 10, 80, 20, filled=True)
+        GUI.draw_lines("White", [(0, 30, 100, 30)])
+        GUI.pop_clip_rect()
+        GUI.draw_pattern_rect("White", 100, 40, 30, 30, mode="raster")
+        GUI.draw_super_text_px(20, 60, "White", "px")
+        expected = pygame.Surface((w, h))
+        GUI.draw_to_surface(expected)
+
+        snapshot = GUI.FrameSnapshot().capture()
+        GUI.begin_frame()
+        GUI.static(0, 0, "White", "next frame")
+        GUI.draw_rect("White", 0, 0, w, h, filled=False)
+        got = pygame.Surface((w, h))
+        GUI.draw_snapshot_to_surface(snapshot, got)
+        assert np.array_equal(pygame.surfarray.array3d(got), pygame.surfarray.array3d(expected))
+        # Capturing again reuses the slot storage.
+        grid = snapshot.screen
+        assert snapshot.capture().screen is grid and snapshot.frame == GUI.frame
+    finally:
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def test_band_rasterizer_matches_numpy():
+    pygame.init()
+    _init_fonts()
+    frames = {}
+    try:
+        for mode in ("numpy", "bands"):
+            frames[mode] = []
+            for scale in (1, 2):
+                GUI.set_display_defaults(
+                    cols=16, rows=7, pixel_scale=scale, char_block_spacing_px=2, rasterizer=mode, raster_workers=3
+                )
+                surf = GUI.create_render_surface()
+                for text in ("Hello, grid", "A测B试 new glyphs"):
+                    _write_sample_text()
+                    GUI.static(0, 6, "White", text)
+                    GUI.draw_rect("CRT_Cyan", 4, 4, 40, 12, filled=True)
+                    GUI.render(GUI.screen, GUI.screen_color)
+                    GUI.draw_to_surface(surf)
+                    frames[mode].append(pygame.surfarray.array3d(surf))
+                snapshot = GUI.FrameSnapshot().capture()
+                GUI.clear_screen()
+                GUI.draw_snapshot_to_surface(snapshot, surf)
+                frames[mode].append(pygame.surfarray.array3d(surf))
+            if mode == "bands":
+                # Band targets wrap worker shared memory; the screen_raw gather only runs on demand.
+                _write_sample_text()
+                GUI.render(GUI.screen, GUI.screen_color)
+                assert GUI._band_targets.get(surf) is not None and GUI._screen_raw_pending
+                GUI._compose_text_layer()
+                assert not GUI._screen_raw_pending
+                assert np.array_equal(GUI.screen_raw, _reference_screen_raw())
+        assert len(frames["bands"]) == 6
+        for got, expected in zip(frames["bands"], frames["numpy"]):
+            assert np.array_equal(got, expected)
+        assert GUI.set_display_defaults(raster_workers=-2)["raster_workers"] == 0
+    finally:
+        GUI.close_band_rasterizer()
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def test_band_rasterizer_falls_back_when_a_worker_dies():
+    pygame.init()
+    _init_fonts()
+    try:
+        GUI.set_display_defaults(cols=16, rows=7, rasterizer="numpy")
+        _write_sample_text()
+        GUI.render(GUI.screen, GUI.screen_color)
+        expected = GUI.create_render_surface()
+        GUI.draw_to_surface(expected)
+
+        GUI.set_display_defaults(cols=16, rows=7, rasterizer="bands", raster_workers=2)
+        surf = GUI.create_render_surface()
+        pool = GUI._band_rasterizer
+        pool._procs[0].kill()
+        pool._procs[0].join()
+        _write_sample_text()
+        GUI.render(GUI.screen, GUI.screen_color)
+        GUI.draw_to_surface(surf)
+        assert pool.closed and GUI._band_rasterizer is None
+        assert np.array_equal(pygame.surfarray.array3d(surf), pygame.surfarray.array3d(expected))
+        # The orphaned target keeps drawing through the numpy path.
+        GUI.draw_to_surface(surf)
+        assert np.array_equal(pygame.surfarray.array3d(surf), pygame.surfarray.array3d(expected))
+        if hasattr(signal, "SIGSTOP"):
+            # A hung worker trips the timeout instead of blocking the frame forever.
+            stuck = BandRasterizer(1, timeout=0.2)
+            target = stuck.create_target((8, 8))
+            os.kill(stuck._procs[0].pid, signal.SIGSTOP)
+            zeros = np.zeros((1, 1), dtype=np.int32)
+            try:
+                stuck.rasterize(
+                    target, np.zeros((2, 4, 4), np.uint8), 1, 0, zeros, zeros, zeros, zeros, np.zeros((256, 3)), (4, 2, 0, 0, 0, 1)
+                )
+            except RuntimeError as exc:
+                assert "timed out" in str(exc)
+            else:
+                raise AssertionError("stopped worker did not time out")
+            assert stuck.closed and not stuck._procs[0].is_alive()
+    finally:
+        GUI.close_band_rasterizer()
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+def test_frame_fingerprint_covers_every_queue():
+    pygame.init()
+    _init_fonts()
+    GUI.set_display_defaults(cols=20, rows=6)
+    try:
+
+        def frame(change=None):
+            GUI.clear_screen()
+            GUI.reset_overlays()
+            GUI.static(0, 0, "White", "fingerprint")
+            GUI.draw_rect("CRT_Cyan", 4, 4, 30, 10, filled=True)
+            GUI.push_clip_rect(0, 0, 90 if change == "clip" else 80, 40)
+            GUI.draw_lines("White", [(0, 30, 100, 30)])
+            GUI.pop_clip_rect()
+            GUI.draw_pattern_rect("White", 100, 40, 30, 30, mode="raster")
+            GUI.draw_super_text_px(20, 60, "White", "px" if change != "super" else "py")
+            # hash(-1) == hash(-2), so only an exact digest tells these two apart.
+            GUI.draw_super_text_px(-2 if change == "offscreen" else -1, 80, "White", "edge")
+            if change == "poly":
+                GUI.draw_rect("CRT_Cyan", 50, 4, 10, 10, filled=True)
+            if change == "line":
+                GUI.draw_lines("White", [(0, 50, 10, 50)])
+            if change == "pattern":
+                GUI.draw_pattern_rect("White", 0, 40, 30, 30, mode="raster")
+            return GUI.frame_fingerprint()
+
+        base = frame()
+        assert frame() == base
+        changed = {kind: frame(kind) for kind in ("clip", "super", "offscreen", "poly", "line", "pattern")}
+        assert base not in changed.values() and len(set(changed.values())) == len(changed)
+    finally:
+        GUI.reset_overlays()
+        GUI.reset_display_defaults()
+
+
+if __name__ == "__main__":
+    test_render_atlas_gather_matches_reference()
+    test_sprite_blits_match_reference()
+    test_numpy_rasterizer_matches_reference()
+    test_text_layer_backends_agree_without_render()
+    test_rasterizer_option_is_sanitized()
+    test_sprite_cache_invalidation()
+    test_dirty_tracking_matches_full_redraw()
+    test_dirty_tracking_diffs_overlays_in_bulk()
+    test_dirty_tracking_off_reports_full_surface()
+    test_indexed_surface_matches_reference()
+    test_indexed_surface_draws_background_slot_color()
+    test_indexed_palette_change_skips_repaint()
+    test_scale_at_present_matches_reference()
+    test_compact_glyph_store_and_memory_stats()
+    test_glyph_caches_are_bounded_lru()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_glyph_disk_cache_round_trip(Path(tmp))
+    test_prewarm_glyphs_background_merge()
+    test_overlay_command_buffers()
+    test_super_text_runs_are_cached()
+    test_hatch_segments_vectorized_and_cached()
+    test_raster_pattern_mode()
+    test_poly_shapes_cache_scaled_vertices()
+    test_batched_primitives_match_single_calls()
+    test_instruments_use_batched_primitives()
+    test_clip_stack_culls_and_clips()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bitmap_fonts_bypass_freetype(Path(tmp))
+    test_text_layout_table_and_cache()
+    test_static_writes_match_per_char_reference()
+    test_frame_snapshot_rasterizes_off_live_state()
+    test_frame_fingerprint_covers_every_queue()
+    test_band_rasterizer_matches_numpy()
+    test_band_rasterizer_falls_back_when_a_worker_dies()
+    print("GUI raster tests: PASS")
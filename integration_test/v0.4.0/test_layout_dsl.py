@@ -9,13 +9,15 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from core.anyware.layout_dsl import LayoutReloader, compile_layout, render_layout
+from core.anyware.layout_dsl import LayoutPage, LayoutReloader, compile_layout, render_layout
 
 
 class DummyCtx:
     def __init__(self, *, scale=10):
         self.scale = scale
         self.draw_calls = []
+        self.prewarm_calls = []
+        self.focus_scope = None
         self._focus = None
 
     def gx(self, value):
@@ -49,6 +51,19 @@ class DummyCtx:
         self._focus = node_id
         return True
 
+    def set_active_focus_scope(self, scope):
+        self.focus_scope = scope
+
+    def add_focus_node(self, node_id, rect, **kwargs):
+        self.draw_calls.append(("focus_node", node_id))
+
+    def remove_focus_node(self, node_id):
+        return True
+
+    def prewarm_glyphs(self, chars, *, background=True):
+        self.prewarm_calls.append((chars, background))
+        return len(set(chars))
+
 
 YAML_CONTENT = """
 globals:
@@ -166,6 +181,27 @@ def test_layout_compile_and_render():
         assert gtext[0]["gy"] == 11
 
 
+def test_layout_page_prewarms_plan_text():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        loader = LayoutReloader(_write_yaml(Path(tmpdir)))
+        ctx = DummyCtx()
+        page = LayoutPage("home", layout=loader, actions={"do_it": lambda *args: None}, bindings={})
+        page.on_enter(ctx)
+        assert len(ctx.prewarm_calls) == 1
+        chars, background = ctx.prewarm_calls[0]
+        assert background is True
+        for text in ("HELLO", "OK", "BIG", "IN"):
+            assert text in chars
+
+        # Context stand-ins without prewarm_glyphs still enter the page.
+        bare = DummyCtx()
+        bare.prewarm_glyphs = None
+        page = LayoutPage("home", layout=loader, actions={"do_it": lambda *args: None}, bindings={})
+        page.on_enter(bare)
+        assert any(call[0] == "focus_node" for call in bare.draw_calls) and not bare.prewarm_calls
+
+
 if __name__ == "__main__":
     test_layout_compile_and_render()
+    test_layout_page_prewarms_plan_text()
     print("ok")